@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Benchmark: CSV encoding detection with chardet over the whole file (the
+previous CsvParser._detect_encoding) versus the sample-based detector in
+parsers.encoding_detection, cold and with the per-bank encoding cache.
+
+Run from the backend directory:
+    python benchmarks/bench_csv_encoding.py [size_mb ...]
+"""
+
+import logging
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import chardet
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from parsers.encoding_detection import BankEncodingCache, detect_encoding  # noqa: E402
+
+HEADER = "Хаан банк дансны хуулга\nОгноо,Гуйлгээний утга,Дебит,Кредит,Улдэгдэл\n"
+
+
+def make_csv(size_mb: int, encoding: str) -> bytes:
+    """Statement CSV of about size_mb megabytes (cp1251-safe Cyrillic only)."""
+    parts = [HEADER]
+    size = 0
+    i = 0
+    while size < size_mb * 1024 * 1024:
+        line = (
+            f"2024.{i % 12 + 1:02d}.{i % 28 + 1:02d},"
+            f'Худалдан авалт POS терминал {i},"{i % 997},500.00",,'
+            f'"{i * 7 % 100000},000.00"\n'
+        )
+        parts.append(line)
+        size += len(line.encode(encoding))
+        i += 1
+    return "".join(parts).encode(encoding)
+
+
+def legacy_detect_encoding(content: bytes) -> str:
+    """The previous CsvParser._detect_encoding (chardet on the whole file)."""
+    result = chardet.detect(content)
+    encoding = result.get("encoding", "utf-8")
+    if encoding:
+        encoding = encoding.lower()
+        if encoding in ("ascii", "iso-8859-1", "windows-1252"):
+            try:
+                content.decode("utf-8")
+                return "utf-8"
+            except UnicodeDecodeError:
+                pass
+        return encoding
+    return "utf-8"
+
+
+def timed(fn, *args) -> tuple[str, float]:
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main(sizes: list[int]) -> None:
+    logging.disable(logging.INFO)
+    print(f"chardet {chardet.__version__}\n")
+    with tempfile.TemporaryDirectory() as tmp:
+        for encoding in ("utf-8", "cp1251"):
+            for size_mb in sizes:
+                content = make_csv(size_mb, encoding)
+                cache = BankEncodingCache(str(Path(tmp) / f"{encoding}.json"))
+
+                legacy, legacy_time = timed(legacy_detect_encoding, content)
+                (cold, method), cold_time = timed(detect_encoding, content, 256 * 1024)
+                if method == "detector":
+                    cache.record("Хаан Банк", cold)
+                (cached, cached_method), cached_time = timed(
+                    detect_encoding, content, 256 * 1024, cache
+                )
+
+                print(f"{encoding} {len(content) / 1e6:6.1f} MB")
+                print(f"  {'whole-file chardet':<22} {legacy_time:8.3f}s  {legacy}")
+                print(f"  {'sample':<22} {cold_time:8.3f}s  {cold} ({method})")
+                print(
+                    f"  {'sample + bank cache':<22} {cached_time:8.3f}s  "
+                    f"{cached} ({cached_method})"
+                )
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [1, 10, 50])
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: statement row parsing with the old strptime date parser
+versus the precompiled regex parser in parsers.cell_values.
+
+Edge-case cells (two-digit years, invalid dates) are first checked to parse
+exactly as before; the run stops if one does not.
+
+Run from the backend directory:
+    python benchmarks/bench_date_parsing.py [rows]
+"""
+
+import logging
+import random
+import re
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from parsers.cell_values import parse_date  # noqa: E402
+from parsers.pdf_parser import PdfParser  # noqa: E402
+
+LEGACY_FORMATS = [
+    "%Y.%m.%d",
+    "%Y.%m.%d %H:%M:%S%p",
+    "%Y.%m.%d %I:%M:%S%p",
+    "%Y-%m-%d",
+    "%d.%m.%Y",
+    "%d/%m/%Y",
+    "%Y/%m/%d",
+]
+
+
+def legacy_parse_date(date_str: str) -> Optional[datetime]:
+    """The previous PdfParser._parse_date (up to 14 strptime calls per cell)."""
+    if not date_str:
+        return None
+    date_str = date_str.strip()
+    date_part = re.split(r"\s+", date_str)[0]
+    for fmt in LEGACY_FORMATS:
+        try:
+            return datetime.strptime(date_str, fmt)
+        except ValueError:
+            pass
+        try:
+            return datetime.strptime(date_part, fmt.split()[0])
+        except ValueError:
+            pass
+    return None
+
+
+class LegacyPdfParser(PdfParser):
+    """PdfParser with the old date parser, for before/after comparison."""
+
+    def _parse_date(self, date_str: str) -> Optional[datetime]:
+        return legacy_parse_date(date_str)
+
+
+# Cells the regex parser must treat exactly like the strptime one; two-digit
+# years are not dates in either (dd.mm.yy must not be read as yy.mm.dd)
+EDGE_CASES = [
+    "25.1.1",
+    "31.12.25",
+    "01.02.26",
+    "25-01-31",
+    "26/2/1",
+    "5.1.1",
+    "2026.2.1 3:32:01AM",
+    "2026.13.01",
+    "29.02.2025",
+    "29/02/2024",
+    "1.2.2026",
+    "",
+]
+
+
+def check_edge_cases() -> None:
+    for cell in EDGE_CASES:
+        expected, actual = legacy_parse_date(cell), parse_date(cell)
+        if actual != expected:
+            raise SystemExit(f"parse_date({cell!r}) = {actual}, expected {expected}")
+    for cell in ("25.1.1", "31.12.25", "01.02.26"):
+        if parse_date(cell) is not None:
+            raise SystemExit(f"parse_date({cell!r}) should be None")
+    print(f"Edge cases: {len(EDGE_CASES)} cells parse as before")
+
+
+def make_table(rows: int) -> list[list[str]]:
+    """Build a synthetic statement table with mixed date formats."""
+    rnd = random.Random(42)
+    table = [["Огноо", "Орлого", "Зарлага", "Гүйлгээний утга", "Үлдэгдэл"]]
+    for i in range(rows):
+        month, day = rnd.randint(1, 12), rnd.randint(1, 28)
+        date_cell = rnd.choice(
+            [
+                f"2026.{month:02d}.{day:02d}",
+                f"2026.{month}.{day} 3:32:01AM",
+                f"{day:02d}/{month:02d}/2026",
+                f"{day:02d}.{month:02d}.2026",
+                f"2026-{month:02d}-{day:02d}",
+            ]
+        )
+        income = rnd.choice([0, rnd.randint(100, 900000)])
+        expense = 0 if income else rnd.randint(100, 500000)
+        table.append(
+            [
+                date_cell,
+                f"{income:,.2f}",
+                f"{expense:,.2f}",
+                f"Гүйлгээ {i}",
+                f"{rnd.randint(0, 10**7):,.2f}",
+            ]
+        )
+    return table
+
+
+def bench(label: str, fn, rows: int) -> float:
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    rate = rows / elapsed
+    print(f"  {label:<34} {elapsed:8.3f}s  {rate:12,.0f} rows/sec")
+    return rate
+
+
+def main(rows: int = 50000) -> None:
+    logging.disable(logging.INFO)
+    check_edge_cases()
+    table = make_table(rows)
+    date_cells = [row[0] for row in table[1:]]
+
+    print(f"Date cells ({rows:,} rows)")
+    before = bench(
+        "strptime loop", lambda: [legacy_parse_date(c) for c in date_cells], rows
+    )
+    parse_date.cache_clear()
+    after = bench(
+        "regex dispatch (cold memo)", lambda: [parse_date(c) for c in date_cells], rows
+    )
+    bench(
+        "regex dispatch (warm memo)", lambda: [parse_date(c) for c in date_cells], rows
+    )
+    print(f"  speedup: {after / before:.1f}x")
+
+    print(f"_extract_transactions_from_table ({rows:,} rows)")
+    parse_date.cache_clear()
+    before = bench(
+        "legacy parser",
+        lambda: LegacyPdfParser()._extract_transactions_from_table(table, None),
+        rows,
+    )
+    after = bench(
+        "current parser",
+        lambda: PdfParser()._extract_transactions_from_table(table, None),
+        rows,
+    )
+    print(f"  speedup: {after / before:.1f}x")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50000)
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Benchmark: pdfplumber layout text versus PDFium text for the text-fallback
+path, and whether the text extractors find the same transactions on both. The
+extractors must return a TransactionBatch, also for text that is not in
+their format.
+
+Run from the backend directory with one or more statement PDFs:
+    python benchmarks/bench_text_backend.py statement.pdf [...]
+"""
+
+import io
+import logging
+import sys
+import time
+from pathlib import Path
+
+import pdfplumber
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from parsers.base import TransactionBatch  # noqa: E402
+from parsers.pdf_parser import PdfParser  # noqa: E402
+from parsers.pdfium_text import PdfiumTextEngine  # noqa: E402
+
+EXTRACTORS = [
+    "_extract_from_mbank",
+    "_extract_from_lines",
+    "_extract_transactions_from_text",
+]
+
+
+def clean_lines(page_text) -> list[str]:
+    """Same line cleanup as the text fallback in PdfParser."""
+    return [line.strip() for line in (page_text or "").split("\n") if line.strip()]
+
+
+def pdfplumber_lines(file_content: bytes) -> tuple[list[str], int]:
+    lines = []
+    with pdfplumber.open(io.BytesIO(file_content)) as pdf:
+        for page in pdf.pages:
+            text = page.extract_text(layout=True, x_tolerance=3, y_tolerance=3)
+            lines.extend(clean_lines(text))
+            page.close()
+        return lines, len(pdf.pages)
+
+
+def pdfium_lines(file_content: bytes) -> tuple[list[str], int]:
+    with pdfplumber.open(io.BytesIO(file_content)) as pdf:
+        page_count = len(pdf.pages)
+    engine = PdfiumTextEngine(file_content)
+    lines = []
+    try:
+        for page_num in range(page_count):
+            lines.extend(clean_lines(engine.page_text(page_num)))
+    finally:
+        engine.close()
+    return lines, page_count
+
+
+def timed(fn, file_content: bytes) -> tuple[list[str], int, float]:
+    start = time.perf_counter()
+    lines, pages = fn(file_content)
+    return lines, pages, time.perf_counter() - start
+
+
+def fingerprint(transactions) -> list[tuple]:
+    return [
+        (t.date, t.description, t.amount, t.transaction_type, t.balance)
+        for t in transactions
+    ]
+
+
+def check_batch_types(parser: PdfParser, text: str) -> int:
+    """Count extractors that do not return a TransactionBatch for text."""
+    wrong = 0
+    for name in EXTRACTORS:
+        result = getattr(parser, name)(text)
+        if not isinstance(result, TransactionBatch):
+            print(f"  {name} returned {type(result).__name__}, not TransactionBatch")
+            wrong += 1
+    return wrong
+
+
+def main(paths: list[str]) -> int:
+    logging.disable(logging.INFO)
+    parser = PdfParser()
+    # Text in none of the formats: every extractor gives an empty batch
+    mismatches = check_batch_types(parser, "Хуулга\nОгноо\tДүн")
+
+    for path in paths:
+        file_content = Path(path).read_bytes()
+        plumber, pages, plumber_time = timed(pdfplumber_lines, file_content)
+        pdfium, _, pdfium_time = timed(pdfium_lines, file_content)
+
+        print(f"{path} ({pages} pages)")
+        print(
+            f"  {'pdfplumber layout text':<28} {pages / plumber_time:10,.1f} pages/sec"
+        )
+        print(f"  {'pdfium text':<28} {pages / pdfium_time:10,.1f} pages/sec")
+        print(f"  speedup: {plumber_time / pdfium_time:.1f}x")
+
+        plumber_text = "\n".join(plumber).strip()
+        pdfium_text = "\n".join(pdfium).strip()
+        mismatches += check_batch_types(parser, pdfium_text)
+        for name in EXTRACTORS:
+            expected = fingerprint(getattr(parser, name)(plumber_text))
+            actual = fingerprint(getattr(parser, name)(pdfium_text))
+            status = "identical" if expected == actual else "DIFFERENT"
+            if expected != actual:
+                mismatches += 1
+            print(f"  {name:<34} {len(expected):6} / {len(actual):6}  {status}")
+
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(2)
+    sys.exit(main(sys.argv[1:]))
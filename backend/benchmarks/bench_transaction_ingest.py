@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Benchmark: transaction ingest throughput (rows/sec) of the previous
+per-row INSERTs in upload_statement and bulk_create_transactions versus
+database.insert_transactions (COPY, and unnest when ids are returned).
+
+Needs DATABASE_URL pointing at a development database; the tables are
+created if missing, and the benchmark user (with everything it owns) is
+deleted at the end. Run from the backend directory:
+    python benchmarks/bench_transaction_ingest.py [rows ...]
+"""
+
+import asyncio
+import sys
+import time
+import uuid
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import database  # noqa: E402
+from database import get_db, init_db, insert_transactions  # noqa: E402
+
+
+def make_columns(rows: int) -> tuple[list, list, list, list]:
+    """Statement-like transaction columns."""
+    start = date(2024, 1, 1)
+    dates = [start + timedelta(days=i % 365) for i in range(rows)]
+    descriptions = [f"Худалдан авалт POS терминал {i % 500}" for i in range(rows)]
+    amounts = [float(i % 997 * 1000 + 500) for i in range(rows)]
+    types = ["expense" if i % 4 else "income" for i in range(rows)]
+    return dates, descriptions, amounts, types
+
+
+async def legacy_upload(conn, statement_id, user_id, columns) -> None:
+    """The previous upload_statement loop (one execute per row, autocommit)."""
+    for txn_date, description, amount, txn_type in zip(*columns):
+        await conn.execute(
+            """
+            INSERT INTO transactions (
+                statement_id, user_id, date, description, amount, type,
+                is_categorized
+            )
+            VALUES ($1, $2, $3, $4, $5, $6, false)
+            """,
+            statement_id,
+            user_id,
+            txn_date,
+            description,
+            amount,
+            txn_type,
+        )
+
+
+async def legacy_bulk(conn, statement_id, user_id, columns) -> None:
+    """The previous bulk_create_transactions loop (fetchrow RETURNING id per row)."""
+    for txn_date, description, amount, txn_type in zip(*columns):
+        row = await conn.fetchrow(
+            """
+            INSERT INTO transactions (
+                statement_id, user_id, date, description, amount, type,
+                ai_suggested_category_id, is_categorized
+            )
+            VALUES ($1, $2, $3, $4, $5, $6, $7, false)
+            RETURNING id
+            """,
+            statement_id,
+            user_id,
+            txn_date,
+            description,
+            amount,
+            txn_type,
+            None,
+        )
+        str(row["id"])
+
+
+async def copy_upload(conn, statement_id, user_id, columns) -> None:
+    await insert_transactions(conn, statement_id, user_id, *columns)
+
+
+async def unnest_bulk(conn, statement_id, user_id, columns) -> None:
+    await insert_transactions(conn, statement_id, user_id, *columns, return_ids=True)
+
+
+async def main(sizes: list[int]) -> None:
+    await init_db()
+    async with get_db() as conn:
+        user_id = await conn.fetchval(
+            "INSERT INTO users (google_id, email) VALUES ($1, $1) RETURNING id",
+            f"bench-{uuid.uuid4()}",
+        )
+        statement_id = await conn.fetchval(
+            """
+            INSERT INTO statements (user_id, file_name, file_format)
+            VALUES ($1, 'bench.csv', 'csv') RETURNING id
+            """,
+            user_id,
+        )
+        try:
+            for rows in sizes:
+                columns = make_columns(rows)
+                print(f"{rows} rows")
+                for name, ingest in (
+                    ("per-row execute", legacy_upload),
+                    ("per-row RETURNING id", legacy_bulk),
+                    ("COPY", copy_upload),
+                    ("unnest RETURNING id", unnest_bulk),
+                ):
+                    start = time.perf_counter()
+                    await ingest(conn, statement_id, user_id, columns)
+                    elapsed = time.perf_counter() - start
+                    print(
+                        f"  {name:<22} {elapsed:8.3f}s  {rows / elapsed:10.0f} rows/s"
+                    )
+                    await conn.execute(
+                        "DELETE FROM transactions WHERE statement_id = $1", statement_id
+                    )
+        finally:
+            await conn.execute("DELETE FROM users WHERE id = $1", user_id)
+    await database.close_db()
+
+
+if __name__ == "__main__":
+    asyncio.run(main([int(arg) for arg in sys.argv[1:]] or [300, 3000, 30000]))
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Benchmark: xlsx parsing with a fully loaded openpyxl workbook (the previous
+ExcelParser._parse_xlsx) versus the read-only streaming workbook, on a
+synthetic statement workbook.
+
+Each run happens in a fresh process so peak RSS is measured per mode. A
+copy of a small workbook whose sheet claims a stale dimension ("A1", as some
+exporters write) is checked to parse like the original.
+
+Run from the backend directory:
+    python benchmarks/bench_xlsx_streaming.py [rows]
+"""
+
+import io
+import multiprocessing
+import random
+import re
+import resource
+import sys
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from parsers.excel_parser import ExcelParser  # noqa: E402
+
+HEADER = ["Огноо", "Гүйлгээний утга", "Дебит", "Кредит", "Үлдэгдэл", "Харьцсан данс"]
+
+
+def make_workbook(rows: int) -> bytes:
+    """Write a Golomt-style statement with `rows` transactions."""
+    from openpyxl import Workbook
+
+    rng = random.Random(42)
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Statement")
+    sheet.append(["Голомт банк", "Дансны хуулга"])
+    sheet.append(HEADER)
+    day = datetime(2021, 1, 1)
+    balance = 1_000_000.0
+    for i in range(rows):
+        amount = round(rng.uniform(1_000, 500_000), 2)
+        credit = rng.random() < 0.3
+        balance += amount if credit else -amount
+        sheet.append(
+            [
+                day + timedelta(minutes=17 * i),
+                f"Гүйлгээ {i} худалдан авалт POS {rng.randint(1000, 9999)}",
+                None if credit else amount,
+                amount if credit else None,
+                round(balance, 2),
+                f"{rng.randint(10**9, 10**10 - 1)}",
+            ]
+        )
+    out = io.BytesIO()
+    workbook.save(out)
+    return out.getvalue()
+
+
+def with_stale_dimension(file_content: bytes) -> bytes:
+    """Rewrite every sheet's <dimension> to "A1"."""
+    out = io.BytesIO()
+    with (
+        zipfile.ZipFile(io.BytesIO(file_content)) as src,
+        zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED) as dst,
+    ):
+        for item in src.infolist():
+            data = src.read(item.filename)
+            if item.filename.startswith("xl/worksheets/"):
+                data = re.sub(rb"<dimension [^>]*>", b'<dimension ref="A1"/>', data)
+            dst.writestr(item, data)
+    return out.getvalue()
+
+
+def check_stale_dimension(rows: int = 1000) -> None:
+    file_content = make_workbook(rows)
+    parser = ExcelParser()
+    for name, content in (
+        ("stored dimension", file_content),
+        ('stale dimension "A1"', with_stale_dimension(file_content)),
+    ):
+        result = parser.parse(content, "statement.xlsx", 10**9)
+        print(
+            f"  {name:<22} {result.raw_text.count(chr(10)):6,} lines"
+            f"  {len(result.transactions):6,} transactions"
+        )
+
+
+def legacy_parse_xlsx(file_content: bytes, max_chars: int) -> int:
+    """The previous _parse_xlsx loop over a fully loaded workbook."""
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(io.BytesIO(file_content), data_only=True)
+    text_parts = []
+    total_chars = 0
+    for sheet_name in workbook.sheetnames:
+        for row in workbook[sheet_name].iter_rows(values_only=True):
+            if total_chars >= max_chars:
+                break
+            if all(cell is None for cell in row):
+                continue
+            row_text = "\t".join(
+                str(cell).strip() if cell is not None else "" for cell in row
+            )
+            if row_text.strip():
+                text_parts.append(row_text)
+                total_chars += len(row_text)
+        if total_chars >= max_chars:
+            break
+    return len("\n".join(text_parts))
+
+
+def streaming_parse_xlsx(file_content: bytes, max_chars: int) -> int:
+    result = ExcelParser().parse(file_content, "statement.xlsx", max_chars)
+    return len(result.raw_text)
+
+
+def run(mode: str, path: str, max_chars: int) -> tuple[float, int, int]:
+    """Child process: parse once, return (seconds, chars, peak RSS in KB)."""
+    file_content = Path(path).read_bytes()
+    fn = legacy_parse_xlsx if mode == "full load" else streaming_parse_xlsx
+    start = time.perf_counter()
+    chars = fn(file_content, max_chars)
+    seconds = time.perf_counter() - start
+    return seconds, chars, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def measure(mode: str, path: str, max_chars: int) -> tuple[float, int, int]:
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+        return pool.submit(run, mode, path, max_chars).result()
+
+
+def main(rows: int) -> None:
+    path = Path(f"/tmp/bench_statement_{rows}.xlsx")
+    if not path.exists():
+        print(f"Writing {rows:,} row workbook to {path}...")
+        path.write_bytes(make_workbook(rows))
+    print(f"{path} ({path.stat().st_size / 1e6:.1f} MB)\n")
+
+    # Upload default, then a limit large enough to read every row
+    for max_chars in (50_000, 10**9):
+        print(f"max_chars={max_chars:,}")
+        for mode in ("full load", "read-only streaming"):
+            seconds, chars, peak_kb = measure(mode, str(path), max_chars)
+            print(
+                f"  {mode:<22} {seconds:8.2f}s  peak RSS {peak_kb / 1024:8.1f} MB"
+                f"  ({chars:,} chars)"
+            )
+        print()
+
+    print("stale <dimension> check")
+    check_stale_dimension()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
@@ -2,8 +2,11 @@
 PostgreSQL database setup using asyncpg for async operations.
 """
 
+import hashlib
 import os
+from collections.abc import Sequence
 from contextlib import asynccontextmanager
+from datetime import date
 
 import asyncpg
 from dotenv import load_dotenv
@@ -12,6 +15,11 @@ load_dotenv()
 
 DATABASE_URL = os.environ.get("DATABASE_URL")
 
+# Shared parse result cache table size limit (least recently used rows go first)
+PARSE_CACHE_PG_MAX_BYTES = int(
+    os.environ.get("PARSE_CACHE_PG_MAX_BYTES", str(2 * 1024 * 1024 * 1024))
+)
+
 # Connection pool (initialized on startup)
 pool: asyncpg.Pool | None = None
 
@@ -67,17 +75,27 @@ async def init_db():
             )
         """)
 
+        # Statement texts, stored once however many statements share them
+        # (content-addressed); ref_count is kept by the statement_blob_refs
+        # trigger below and a text goes with its last statement
+        await conn.execute("""
+            CREATE TABLE IF NOT EXISTS statement_blobs (
+                sha256 TEXT PRIMARY KEY,
+                content TEXT NOT NULL,
+                ref_count INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+
         # Statements table (individual uploaded files)
         await conn.execute("""
             CREATE TABLE IF NOT EXISTS statements (
                 id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
                 user_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
-                report_group_id UUID REFERENCES report_groups(id) ON DELETE CASCADE,
                 file_name TEXT NOT NULL,
                 file_format TEXT NOT NULL,
                 file_size INTEGER,
                 bank_name TEXT,
-                encrypted_text TEXT,
+                text_sha256 TEXT REFERENCES statement_blobs(sha256),
                 encryption_iv TEXT,
                 parsed_transactions JSONB,
                 status TEXT DEFAULT 'pending',
@@ -86,6 +104,103 @@ async def init_db():
             )
         """)
 
+        # Statements of each report group; a statement is shared by the
+        # groups extended from the one it was uploaded to, until one of them
+        # changes its transactions (detach_statements)
+        await conn.execute("""
+            CREATE TABLE IF NOT EXISTS report_group_statements (
+                report_group_id UUID NOT NULL REFERENCES report_groups(id) ON DELETE CASCADE,
+                statement_id UUID NOT NULL REFERENCES statements(id) ON DELETE CASCADE,
+                PRIMARY KEY (report_group_id, statement_id)
+            )
+        """)
+
+        # Statements stored before texts and group links were split out keep
+        # their report_group_id and encrypted_text columns (see
+        # migrate_statements.py); they are copied over below
+        await conn.execute("""
+            DO $$
+            BEGIN
+                IF NOT EXISTS (
+                    SELECT 1 FROM information_schema.columns
+                    WHERE table_name = 'statements' AND column_name = 'text_sha256'
+                ) THEN
+                    ALTER TABLE statements
+                        ADD COLUMN text_sha256 TEXT REFERENCES statement_blobs(sha256);
+                END IF;
+            END $$
+        """)
+
+        # Count the statements referencing each text, so deletes cascading
+        # from users are counted too; the new reference is added first, so
+        # setting the same text again does not drop it
+        await conn.execute("""
+            CREATE OR REPLACE FUNCTION statement_blob_refs() RETURNS trigger AS $$
+            BEGIN
+                IF TG_OP <> 'DELETE' AND NEW.text_sha256 IS NOT NULL THEN
+                    UPDATE statement_blobs SET ref_count = ref_count + 1
+                    WHERE sha256 = NEW.text_sha256;
+                END IF;
+                IF TG_OP <> 'INSERT' AND OLD.text_sha256 IS NOT NULL THEN
+                    UPDATE statement_blobs SET ref_count = ref_count - 1
+                    WHERE sha256 = OLD.text_sha256;
+                    DELETE FROM statement_blobs
+                    WHERE sha256 = OLD.text_sha256 AND ref_count <= 0;
+                END IF;
+                RETURN NULL;
+            END
+            $$ LANGUAGE plpgsql
+        """)
+        await conn.execute("""
+            DO $$
+            BEGIN
+                IF NOT EXISTS (
+                    SELECT 1 FROM pg_trigger WHERE tgname = 'statement_blob_refs'
+                ) THEN
+                    CREATE TRIGGER statement_blob_refs
+                    AFTER INSERT OR DELETE OR UPDATE OF text_sha256 ON statements
+                    FOR EACH ROW EXECUTE FUNCTION statement_blob_refs();
+                END IF;
+            END $$
+        """)
+
+        # Copy statements stored under the old columns (or written there by
+        # an app of the old version since) that are not copied yet; the
+        # trigger counts the texts. The old columns are only dropped by
+        # migrate_statements.py.
+        await conn.execute("""
+            DO $$
+            BEGIN
+                IF EXISTS (
+                    SELECT 1 FROM information_schema.columns
+                    WHERE table_name = 'statements' AND column_name = 'report_group_id'
+                ) THEN
+                    INSERT INTO report_group_statements (report_group_id, statement_id)
+                    SELECT s.report_group_id, s.id FROM statements s
+                    WHERE s.report_group_id IS NOT NULL
+                      AND NOT EXISTS (
+                          SELECT 1 FROM report_group_statements gs
+                          WHERE gs.statement_id = s.id
+                      )
+                    ON CONFLICT DO NOTHING;
+                END IF;
+                IF EXISTS (
+                    SELECT 1 FROM information_schema.columns
+                    WHERE table_name = 'statements' AND column_name = 'encrypted_text'
+                ) THEN
+                    INSERT INTO statement_blobs (sha256, content)
+                    SELECT DISTINCT encode(sha256(convert_to(encrypted_text, 'UTF8')), 'hex'),
+                           encrypted_text
+                    FROM statements
+                    WHERE encrypted_text IS NOT NULL AND text_sha256 IS NULL
+                    ON CONFLICT (sha256) DO UPDATE SET ref_count = statement_blobs.ref_count;
+                    UPDATE statements
+                    SET text_sha256 = encode(sha256(convert_to(encrypted_text, 'UTF8')), 'hex')
+                    WHERE encrypted_text IS NOT NULL AND text_sha256 IS NULL;
+                END IF;
+            END $$
+        """)
+
         # User encryption keys table
         await conn.execute("""
             CREATE TABLE IF NOT EXISTS user_keys (
@@ -132,6 +247,67 @@ async def init_db():
             )
         """)
 
+        # Statement processing queue (see jobs.py); the raw file is kept
+        # (in statement_job_chunks) until the job succeeds or is given up
+        await conn.execute("""
+            CREATE TABLE IF NOT EXISTS statement_jobs (
+                id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+                statement_id UUID UNIQUE NOT NULL REFERENCES statements(id) ON DELETE CASCADE,
+                status TEXT NOT NULL DEFAULT 'queued'
+                    CHECK (status IN ('queued', 'running', 'failed')),
+                attempts INTEGER NOT NULL DEFAULT 0,
+                run_after TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+                lease_id UUID,
+                locked_until TIMESTAMPTZ,
+                last_error TEXT,
+                created_at TIMESTAMPTZ DEFAULT NOW(),
+                updated_at TIMESTAMPTZ DEFAULT NOW()
+            )
+        """)
+
+        # Queued files, in chunks so neither side holds a whole file in memory
+        await conn.execute("""
+            CREATE TABLE IF NOT EXISTS statement_job_chunks (
+                job_id UUID NOT NULL REFERENCES statement_jobs(id) ON DELETE CASCADE,
+                seq INTEGER NOT NULL,
+                data BYTEA NOT NULL,
+                PRIMARY KEY (job_id, seq)
+            )
+        """)
+        # Jobs queued when the file was a statement_jobs column
+        await conn.execute("""
+            DO $$
+            BEGIN
+                IF EXISTS (
+                    SELECT 1 FROM information_schema.columns
+                    WHERE table_name = 'statement_jobs' AND column_name = 'file_content'
+                ) THEN
+                    INSERT INTO statement_job_chunks (job_id, seq, data)
+                    SELECT id, 0, file_content FROM statement_jobs
+                    WHERE status <> 'failed'
+                    ON CONFLICT DO NOTHING;
+                    ALTER TABLE statement_jobs DROP COLUMN file_content;
+                END IF;
+            END $$
+        """)
+        # Files of jobs given up before their chunks were deleted with them
+        await conn.execute("""
+            DELETE FROM statement_job_chunks c
+            USING statement_jobs j
+            WHERE j.id = c.job_id AND j.status = 'failed'
+        """)
+
+        # Parse result cache shared by app instances (content-addressed)
+        await conn.execute("""
+            CREATE TABLE IF NOT EXISTS parse_cache (
+                key TEXT PRIMARY KEY,
+                result BYTEA NOT NULL,
+                size_bytes INTEGER NOT NULL,
+                created_at TIMESTAMPTZ DEFAULT NOW(),
+                last_used_at TIMESTAMPTZ DEFAULT NOW()
+            )
+        """)
+
         # Seed default categories if not exists
         await conn.execute("""
             INSERT INTO categories (id, user_id, name, name_en, type, icon, color, is_default, sort_order)
@@ -173,7 +349,8 @@ async def init_db():
             CREATE INDEX IF NOT EXISTS idx_statements_user_id ON statements(user_id)
         """)
         await conn.execute("""
-            CREATE INDEX IF NOT EXISTS idx_statements_report_group_id ON statements(report_group_id)
+            CREATE INDEX IF NOT EXISTS idx_report_group_statements_statement_id
+            ON report_group_statements(statement_id)
         """)
         await conn.execute("""
             CREATE INDEX IF NOT EXISTS idx_categories_user_id ON categories(user_id)
@@ -190,6 +367,13 @@ async def init_db():
         await conn.execute("""
             CREATE INDEX IF NOT EXISTS idx_transactions_category_id ON transactions(category_id)
         """)
+        await conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_parse_cache_last_used_at ON parse_cache(last_used_at)
+        """)
+        await conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_statement_jobs_run_after ON statement_jobs(run_after)
+            WHERE status <> 'failed'
+        """)
 
 
 async def close_db():
@@ -208,3 +392,285 @@ async def get_db():
 
     async with pool.acquire() as conn:
         yield conn
+
+
+async def store_statement_text(
+    conn: asyncpg.Connection, text: str | None
+) -> str | None:
+    """
+    Store a statement text once, keyed by its SHA-256; returns the key for
+    statements.text_sha256 (None for no text).
+
+    Set the key on a statement in the same transaction: the text is counted
+    (and kept) only while a statement references it. The upsert locks an
+    existing text, so it cannot be dropped by a concurrent delete meanwhile.
+    """
+    if text is None:
+        return None
+    sha256 = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    await conn.execute(
+        """
+        INSERT INTO statement_blobs (sha256, content) VALUES ($1, $2)
+        ON CONFLICT (sha256) DO UPDATE SET ref_count = statement_blobs.ref_count
+        """,
+        sha256,
+        text,
+    )
+    return sha256
+
+
+async def delete_unlinked_statements(conn: asyncpg.Connection, statement_ids) -> None:
+    """Delete those of the statements no longer in any report group."""
+    await conn.execute(
+        """
+        DELETE FROM statements s
+        WHERE s.id = ANY($1::uuid[])
+          AND NOT EXISTS (
+              SELECT 1 FROM report_group_statements gs WHERE gs.statement_id = s.id
+          )
+        """,
+        list(statement_ids),
+    )
+
+
+async def detach_statements(
+    conn: asyncpg.Connection, statement_ids, report_group_id
+) -> bool:
+    """
+    Copy-on-write for statements shared between report groups, before
+    report_group_id changes their transactions.
+
+    Each statement that report_group_id shares with other groups is copied
+    (same text, copies of its transactions) and the other groups are moved
+    to the copy, so the change is seen by report_group_id only and the ids
+    it holds stay valid. Statements still being processed are left shared.
+    Run in a transaction; the groups, then the statements, are locked as
+    the statement workers lock them (a group linked after that is left
+    alone).
+
+    Returns:
+        False if report_group_id does not have all of the statements (e.g.
+        a concurrent change from another group moved it to a copy); nothing
+        is copied then
+    """
+    statement_ids = list(statement_ids)
+    group_rows = await conn.fetch(
+        """
+        SELECT id FROM report_groups
+        WHERE id IN (
+            SELECT report_group_id FROM report_group_statements
+            WHERE statement_id = ANY($1::uuid[])
+        )
+        ORDER BY id
+        FOR NO KEY UPDATE
+        """,
+        statement_ids,
+    )
+    group_ids = [row["id"] for row in group_rows]
+    await conn.execute(
+        "SELECT 1 FROM statements WHERE id = ANY($1::uuid[]) ORDER BY id FOR UPDATE",
+        statement_ids,
+    )
+    # Read again now that they are locked
+    rows = await conn.fetch(
+        """
+        SELECT s.id, s.status,
+               bool_or(gs.report_group_id = $2) AS linked,
+               count(*) FILTER (WHERE gs.report_group_id <> $2) AS others
+        FROM statements s
+        JOIN report_group_statements gs
+          ON gs.statement_id = s.id AND gs.report_group_id = ANY($3::uuid[])
+        WHERE s.id = ANY($1::uuid[])
+        GROUP BY s.id
+        """,
+        statement_ids,
+        report_group_id,
+        group_ids,
+    )
+    linked = [row for row in rows if row["linked"]]
+    if len(linked) < len(set(map(str, statement_ids))):
+        return False
+
+    for row in linked:
+        if row["others"] == 0 or row["status"] == "pending":
+            continue
+        copy_id = await conn.fetchval(
+            """
+            INSERT INTO statements (
+                user_id, file_name, file_format, file_size, bank_name,
+                text_sha256, encryption_iv, parsed_transactions, status,
+                error_message, created_at
+            )
+            SELECT user_id, file_name, file_format, file_size, bank_name,
+                   text_sha256, encryption_iv, parsed_transactions, status,
+                   error_message, created_at
+            FROM statements
+            WHERE id = $1
+            RETURNING id
+            """,
+            row["id"],
+        )
+        await conn.execute(
+            """
+            INSERT INTO transactions (
+                statement_id, user_id, date, description, amount, type,
+                category_id, is_categorized, ai_suggested_category_id,
+                raw_data, created_at, updated_at
+            )
+            SELECT $2, user_id, date, description, amount, type,
+                   category_id, is_categorized, ai_suggested_category_id,
+                   raw_data, created_at, updated_at
+            FROM transactions
+            WHERE statement_id = $1
+            """,
+            row["id"],
+            copy_id,
+        )
+        await conn.execute(
+            """
+            UPDATE report_group_statements SET statement_id = $2
+            WHERE statement_id = $1 AND report_group_id <> $3
+              AND report_group_id = ANY($4::uuid[])
+            """,
+            row["id"],
+            copy_id,
+            report_group_id,
+            group_ids,
+        )
+    return True
+
+
+async def insert_transactions(
+    conn: asyncpg.Connection,
+    statement_id,
+    user_id,
+    dates: Sequence[date],
+    descriptions: Sequence[str],
+    amounts: Sequence[float],
+    types: Sequence[str],
+    ai_suggested_category_ids: Sequence[str | None] | None = None,
+    return_ids: bool = False,
+) -> list[str]:
+    """
+    Insert a statement's transactions in bulk, all or nothing.
+
+    Rows are sent with COPY (copy_records_to_table). COPY cannot return the
+    generated ids, so with return_ids a single INSERT ... SELECT FROM
+    unnest(...) RETURNING id is used instead. Either way it is one round trip
+    for the rows, inside a transaction (a savepoint if the caller already
+    opened one).
+
+    Args:
+        conn: Connection to insert on
+        statement_id: Statement the transactions belong to
+        user_id: Owner of the transactions
+        dates, descriptions, amounts, types: Columns, one item per row
+            (type is 'income' or 'expense')
+        ai_suggested_category_ids: Optional category id column
+        return_ids: Whether to return the ids of the new rows
+
+    Returns:
+        Ids of the new rows in input order (empty unless return_ids)
+    """
+    if not dates:
+        return []
+    if ai_suggested_category_ids is None:
+        ai_suggested_category_ids = [None] * len(dates)
+
+    async with conn.transaction():
+        if not return_ids:
+            await conn.copy_records_to_table(
+                "transactions",
+                columns=(
+                    "statement_id",
+                    "user_id",
+                    "date",
+                    "description",
+                    "amount",
+                    "type",
+                    "ai_suggested_category_id",
+                    "is_categorized",
+                ),
+                records=(
+                    (statement_id, user_id, *row, False)
+                    for row in zip(
+                        dates,
+                        descriptions,
+                        amounts,
+                        types,
+                        ai_suggested_category_ids,
+                    )
+                ),
+            )
+            return []
+
+        rows = await conn.fetch(
+            """
+            INSERT INTO transactions (
+                statement_id, user_id, date, description, amount, type,
+                ai_suggested_category_id, is_categorized
+            )
+            SELECT $1, $2, t.date, t.description, t.amount, t.type,
+                   t.ai_suggested_category_id, false
+            FROM unnest(
+                $3::date[], $4::text[], $5::numeric[], $6::text[], $7::uuid[]
+            ) WITH ORDINALITY
+                AS t(date, description, amount, type, ai_suggested_category_id, n)
+            ORDER BY t.n
+            RETURNING id
+            """,
+            statement_id,
+            user_id,
+            list(dates),
+            list(descriptions),
+            list(amounts),
+            list(types),
+            list(ai_suggested_category_ids),
+        )
+    return [str(row["id"]) for row in rows]
+
+
+class PostgresParseCache:
+    """Parse result store backed by the parse_cache table."""
+
+    async def get(self, key: str) -> bytes | None:
+        """Get an encoded parse result and mark it as recently used."""
+        async with get_db() as conn:
+            row = await conn.fetchrow(
+                """
+                UPDATE parse_cache SET last_used_at = NOW()
+                WHERE key = $1
+                RETURNING result
+                """,
+                key,
+            )
+        return bytes(row["result"]) if row else None
+
+    async def set(self, key: str, blob: bytes) -> None:
+        """Store an encoded parse result, then trim the table to its size limit."""
+        async with get_db() as conn:
+            await conn.execute(
+                """
+                INSERT INTO parse_cache (key, result, size_bytes)
+                VALUES ($1, $2, $3)
+                ON CONFLICT (key) DO UPDATE SET last_used_at = NOW()
+                """,
+                key,
+                blob,
+                len(blob),
+            )
+            await conn.execute(
+                """
+                DELETE FROM parse_cache
+                WHERE key IN (
+                    SELECT key FROM (
+                        SELECT key, SUM(size_bytes) OVER (
+                            ORDER BY last_used_at DESC
+                        ) AS running_bytes
+                        FROM parse_cache
+                    ) ranked
+                    WHERE running_bytes > $1
+                )
+                """,
+                PARSE_CACHE_PG_MAX_BYTES,
+            )
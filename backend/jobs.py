@@ -0,0 +1,499 @@
+"""
+Postgres-backed job queue for statement processing.
+
+upload_statement stores the raw file (in chunks) and a 'pending' statement,
+enqueues a job and returns at once; workers claim jobs with SELECT ... FOR UPDATE SKIP
+LOCKED, parse the file, ingest its transactions and set the statement's
+status. Workers run inside the web process (STATEMENT_WORKERS) and/or as a
+separate process:
+    python jobs.py
+"""
+
+import asyncio
+import logging
+import os
+import signal
+import uuid
+from dataclasses import dataclass
+
+from database import (
+    close_db,
+    get_db,
+    init_db,
+    insert_transactions,
+    store_statement_text,
+)
+from parsers import ParserBusyError, ParserFactory
+from uploads import SpooledFile, SpoolWriter
+
+logger = logging.getLogger(__name__)
+
+# Concurrent jobs per process (0 = this process does not run jobs)
+STATEMENT_WORKERS = int(os.environ.get("STATEMENT_WORKERS", "2"))
+# Seconds a claimed job stays invisible to other workers; a job whose worker
+# died becomes claimable again after this (keep it above
+# PDF_DOCUMENT_TIME_BUDGET)
+JOB_VISIBILITY_TIMEOUT = int(os.environ.get("JOB_VISIBILITY_TIMEOUT", "300"))
+# Attempts before a job is given up, and the base retry delay in seconds
+# (doubled on every attempt)
+JOB_MAX_ATTEMPTS = int(os.environ.get("JOB_MAX_ATTEMPTS", "3"))
+JOB_RETRY_BACKOFF = int(os.environ.get("JOB_RETRY_BACKOFF", "10"))
+# Seconds an idle worker waits before looking for jobs again
+JOB_POLL_INTERVAL = float(os.environ.get("JOB_POLL_INTERVAL", "2"))
+
+JOB_FAILED_MESSAGE = "Файл боловсруулахад алдаа гарлаа. Дахин байршуулна уу."
+
+
+@dataclass
+class StatementJob:
+    """A claimed job; lease_id identifies this claim of it."""
+
+    id: uuid.UUID
+    statement_id: uuid.UUID
+    lease_id: uuid.UUID
+    attempts: int
+
+
+async def enqueue_statement_job(conn, statement_id, file: SpooledFile) -> None:
+    """
+    Queue a statement for processing (use the connection that inserted it).
+
+    The file is streamed from its spool file into statement_job_chunks with
+    COPY, one chunk read at a time.
+    """
+    job_id = await conn.fetchval(
+        "INSERT INTO statement_jobs (statement_id) VALUES ($1) RETURNING id",
+        statement_id,
+    )
+
+    async def records():
+        chunks = file.chunks()
+        try:
+            seq = 0
+            while chunk := await asyncio.to_thread(next, chunks, b""):
+                yield job_id, seq, chunk
+                seq += 1
+        finally:
+            chunks.close()
+
+    await conn.copy_records_to_table(
+        "statement_job_chunks",
+        records=records(),
+        columns=["job_id", "seq", "data"],
+    )
+
+
+async def create_pending_statement(
+    conn,
+    user_id,
+    report_group_id,
+    file_name: str,
+    file_format: str,
+    file: SpooledFile,
+    encrypted_text: str | None = None,
+    encryption_iv: str | None = None,
+):
+    """
+    Insert a 'pending' statement into a report group and queue its
+    processing job.
+
+    Call inside a transaction so the rows are created together.
+
+    Returns:
+        The new statement (the fields of StatementResponse)
+    """
+    row = await conn.fetchrow(
+        """
+        INSERT INTO statements (
+            user_id, file_name, file_format, file_size, text_sha256,
+            encryption_iv, status
+        )
+        VALUES ($1, $2, $3, $4, $5, $6, 'pending')
+        RETURNING id, file_name, file_format, file_size, bank_name,
+                  encryption_iv, status, error_message, created_at
+        """,
+        user_id,
+        file_name,
+        file_format,
+        file.size,
+        await store_statement_text(conn, encrypted_text),
+        encryption_iv,
+    )
+    await conn.execute(
+        """
+        INSERT INTO report_group_statements (report_group_id, statement_id)
+        VALUES ($1, $2)
+        """,
+        report_group_id,
+        row["id"],
+    )
+    await enqueue_statement_job(conn, row["id"], file)
+    return dict(row, encrypted_text=encrypted_text)
+
+
+async def claim_job(conn) -> StatementJob | None:
+    """
+    Claim the next runnable job, if any.
+
+    Runnable are queued jobs whose run_after has passed and running jobs whose
+    visibility timeout expired (their worker died). SKIP LOCKED lets any
+    number of workers claim concurrently without waiting on each other.
+    """
+    row = await conn.fetchrow(
+        """
+        UPDATE statement_jobs
+        SET status = 'running',
+            attempts = attempts + 1,
+            lease_id = gen_random_uuid(),
+            locked_until = NOW() + make_interval(secs => $1),
+            updated_at = NOW()
+        WHERE id = (
+            SELECT id FROM statement_jobs
+            WHERE (status = 'queued' AND run_after <= NOW())
+               OR (status = 'running' AND locked_until < NOW())
+            ORDER BY run_after
+            LIMIT 1
+            FOR UPDATE SKIP LOCKED
+        )
+        RETURNING id, statement_id, lease_id, attempts
+        """,
+        JOB_VISIBILITY_TIMEOUT,
+    )
+    if row is None:
+        return None
+    return StatementJob(
+        id=row["id"],
+        statement_id=row["statement_id"],
+        lease_id=row["lease_id"],
+        attempts=row["attempts"],
+    )
+
+
+async def _spool_job_file(conn, job: StatementJob, file_name: str) -> SpooledFile:
+    """Stream a job's file from statement_job_chunks to a spool file."""
+    writer = SpoolWriter(file_name, max_bytes=None)
+    try:
+        async with conn.transaction():
+            async for chunk in conn.cursor(
+                """
+                SELECT data FROM statement_job_chunks
+                WHERE job_id = $1 ORDER BY seq
+                """,
+                job.id,
+                prefetch=1,
+            ):
+                await asyncio.to_thread(writer.write, chunk["data"])
+    except BaseException:
+        writer.discard()
+        raise
+    return writer.close()
+
+
+async def _lock_statement(conn, statement_id) -> list | None:
+    """
+    Lock a statement for writing its outcome; None if it was deleted.
+
+    Its user (KEY SHARE) and report groups (NO KEY UPDATE, for updated_at)
+    are locked first, in the order deleting a user, a group or a statement
+    takes them; otherwise deleting one while its statements finish could
+    deadlock.
+
+    Returns:
+        The ids of the locked report groups (a group linked after this is
+        left alone)
+    """
+    user_id = await conn.fetchval(
+        "SELECT user_id FROM statements WHERE id = $1", statement_id
+    )
+    if user_id is None:
+        return None
+    await conn.execute("SELECT 1 FROM users WHERE id = $1 FOR KEY SHARE", user_id)
+    group_rows = await conn.fetch(
+        """
+        SELECT id FROM report_groups
+        WHERE id IN (
+            SELECT report_group_id FROM report_group_statements
+            WHERE statement_id = $1
+        )
+        ORDER BY id
+        FOR NO KEY UPDATE
+        """,
+        statement_id,
+    )
+    locked = await conn.fetchval(
+        "SELECT id FROM statements WHERE id = $1 FOR UPDATE", statement_id
+    )
+    if locked is None:
+        return None
+    return [row["id"] for row in group_rows]
+
+
+async def _release_job(conn, job: StatementJob) -> bool:
+    """Delete a finished job; False if the claim was lost (timed out or statement deleted)."""
+    job_id = await conn.fetchval(
+        "DELETE FROM statement_jobs WHERE id = $1 AND lease_id = $2 RETURNING id",
+        job.id,
+        job.lease_id,
+    )
+    return job_id is not None
+
+
+async def process_job(job: StatementJob) -> None:
+    """
+    Parse a claimed job's file and store the outcome on its statement.
+
+    A file that does not parse is a result (status 'error'), not a job
+    failure; exceptions propagate to the caller, which retries the job.
+    """
+    async with get_db() as conn:
+        statement = await conn.fetchrow(
+            """
+            SELECT user_id, file_name FROM statements WHERE id = $1
+            """,
+            job.statement_id,
+        )
+        if statement is None:
+            return
+        spooled = await _spool_job_file(conn, job, statement["file_name"])
+
+    try:
+        with spooled.mapped() as content:
+            result = await ParserFactory.parse_file(
+                content, statement["file_name"], sha256=spooled.sha256
+            )
+    finally:
+        spooled.remove()
+
+    async with get_db() as conn, conn.transaction():
+        group_ids = await _lock_statement(conn, job.statement_id)
+        if group_ids is None:
+            return
+        if not await _release_job(conn, job):
+            logger.warning(f"[Jobs] Lost claim on job {job.id}, discarding result")
+            return
+
+        if not result.success:
+            await conn.execute(
+                """
+                UPDATE statements
+                SET status = 'error', error_message = $2, text_sha256 = NULL
+                WHERE id = $1
+                """,
+                job.statement_id,
+                result.error,
+            )
+            return
+
+        # Client-side encrypted text sent with the upload takes precedence
+        has_text = await conn.fetchval(
+            "SELECT text_sha256 IS NOT NULL FROM statements WHERE id = $1",
+            job.statement_id,
+        )
+        await conn.execute(
+            """
+            UPDATE statements
+            SET status = 'extracted', error_message = NULL, bank_name = $2,
+                text_sha256 = COALESCE(text_sha256, $3)
+            WHERE id = $1
+            """,
+            job.statement_id,
+            result.metadata.get("bank_name"),
+            None if has_text else await store_statement_text(conn, result.raw_text),
+        )
+
+        # If transactions were extracted directly from the file, save them
+        if result.transactions:
+            batch = result.transactions
+            await insert_transactions(
+                conn,
+                job.statement_id,
+                statement["user_id"],
+                batch.dates(),
+                batch.descriptions(),
+                batch.amounts(),
+                [
+                    "income" if transaction_type == "credit" else "expense"
+                    for transaction_type in batch.transaction_types()
+                ],
+            )
+            logger.info(
+                f"Saved {len(batch)} transactions for statement {job.statement_id}"
+            )
+
+        # Update the updated_at of the report groups it is in
+        await conn.execute(
+            "UPDATE report_groups SET updated_at = NOW() WHERE id = ANY($1::uuid[])",
+            group_ids,
+        )
+
+
+async def retry_job(job: StatementJob, error: Exception) -> None:
+    """Requeue a job that raised, or give it up after JOB_MAX_ATTEMPTS."""
+    async with get_db() as conn, conn.transaction():
+        if isinstance(error, ParserBusyError):
+            # Not the job's fault: wait for the executor, keep the attempt
+            await conn.execute(
+                """
+                UPDATE statement_jobs
+                SET status = 'queued', attempts = attempts - 1, lease_id = NULL,
+                    run_after = NOW() + make_interval(secs => $3), updated_at = NOW()
+                WHERE id = $1 AND lease_id = $2
+                """,
+                job.id,
+                job.lease_id,
+                error.retry_after,
+            )
+            return
+
+        if job.attempts < JOB_MAX_ATTEMPTS:
+            delay = JOB_RETRY_BACKOFF * 2 ** (job.attempts - 1)
+            logger.warning(
+                f"[Jobs] Job {job.id} attempt {job.attempts} failed, "
+                f"retrying in {delay}s: {error}"
+            )
+            await conn.execute(
+                """
+                UPDATE statement_jobs
+                SET status = 'queued', lease_id = NULL, last_error = $3,
+                    run_after = NOW() + make_interval(secs => $4), updated_at = NOW()
+                WHERE id = $1 AND lease_id = $2
+                """,
+                job.id,
+                job.lease_id,
+                str(error),
+                delay,
+            )
+            return
+
+        logger.error(
+            f"[Jobs] Job {job.id} failed after {job.attempts} attempts: {error}"
+        )
+        await _fail_job(conn, job, str(error))
+
+
+async def _fail_job(conn, job: StatementJob, error: str) -> None:
+    """
+    Give a job up and mark its statement as failed.
+
+    The job row stays as a record of the failure, but its file chunks (the
+    raw, unencrypted statement) are deleted with it.
+    """
+    if await _lock_statement(conn, job.statement_id) is None:
+        return
+    updated = await conn.fetchval(
+        """
+        UPDATE statement_jobs
+        SET status = 'failed', lease_id = NULL, last_error = $3, updated_at = NOW()
+        WHERE id = $1 AND lease_id = $2
+        RETURNING id
+        """,
+        job.id,
+        job.lease_id,
+        error,
+    )
+    if updated is not None:
+        await conn.execute("DELETE FROM statement_job_chunks WHERE job_id = $1", job.id)
+        await conn.execute(
+            "UPDATE statements SET status = 'error', error_message = $2 WHERE id = $1",
+            job.statement_id,
+            JOB_FAILED_MESSAGE,
+        )
+
+
+class StatementWorkerPool:
+    """
+    Background tasks that claim and process statement jobs.
+
+    Idle workers poll every JOB_POLL_INTERVAL seconds; notify() wakes them at
+    once when this process enqueued a job.
+    """
+
+    def __init__(self, workers: int = STATEMENT_WORKERS):
+        self.workers = workers
+        self._wakeup = asyncio.Event()
+        self._tasks: list[asyncio.Task] = []
+
+    def start(self) -> None:
+        """Start the worker tasks on the running event loop."""
+        self._tasks = [
+            asyncio.create_task(self._run(), name=f"statement-worker-{i}")
+            for i in range(self.workers)
+        ]
+        if self._tasks:
+            logger.info(f"[Jobs] Started {len(self._tasks)} statement workers")
+
+    async def stop(self) -> None:
+        """
+        Cancel the workers.
+
+        A job interrupted mid-way keeps its claim and is picked up again once
+        its visibility timeout expires.
+        """
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def notify(self) -> None:
+        """Wake idle workers (a job was just enqueued)."""
+        self._wakeup.set()
+
+    async def run_once(self) -> bool:
+        """Claim and process one job; False if there was none."""
+        async with get_db() as conn:
+            job = await claim_job(conn)
+        if job is None:
+            return False
+
+        if job.attempts > JOB_MAX_ATTEMPTS:
+            # Reclaimed after its worker died on every attempt
+            async with get_db() as conn, conn.transaction():
+                await _fail_job(conn, job, "visibility timeout expired")
+            return True
+
+        try:
+            await process_job(job)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            await retry_job(job, e)
+        return True
+
+    async def _run(self) -> None:
+        while True:
+            # Cleared before looking, so a job enqueued meanwhile is not missed
+            self._wakeup.clear()
+            try:
+                if await self.run_once():
+                    continue
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"[Jobs] Worker error: {e}")
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), JOB_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+
+
+async def main() -> None:
+    """Run statement workers without the web server until SIGINT/SIGTERM."""
+    await init_db()
+    pool = StatementWorkerPool(max(1, STATEMENT_WORKERS))
+    pool.start()
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    await stop.wait()
+
+    await pool.stop()
+    await close_db()
+    ParserFactory.shutdown()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+One-off migration: drop the statements columns replaced by statement_blobs
+and report_group_statements (report_group_id, encrypted_text).
+
+init_db copies statements stored under those columns over on every startup
+and leaves the columns in place, so an app of the old version can keep
+running meanwhile. Once none is left, check the copy and drop the columns:
+
+    python migrate_statements.py          # check only
+    python migrate_statements.py --drop   # check, then drop if nothing is missing
+
+Dropping is refused while any statement is not fully copied.
+"""
+
+import asyncio
+import sys
+
+from database import close_db, get_db, init_db
+
+LEGACY_COLUMNS = ("report_group_id", "encrypted_text")
+
+# Problems that block dropping the old columns, by the column they concern
+CHECKS = {
+    "report_group_id": (
+        "statements in a report group with no report_group_statements link",
+        """
+        SELECT COUNT(*) FROM statements s
+        WHERE s.report_group_id IS NOT NULL
+          AND NOT EXISTS (
+              SELECT 1 FROM report_group_statements gs WHERE gs.statement_id = s.id
+          )
+        """,
+    ),
+    "encrypted_text": (
+        "statement texts missing from statement_blobs or different there",
+        """
+        SELECT COUNT(*) FROM statements s
+        LEFT JOIN statement_blobs b ON b.sha256 = s.text_sha256
+        WHERE s.encrypted_text IS NOT NULL
+          AND (b.content IS NULL OR b.content <> s.encrypted_text)
+        """,
+    ),
+}
+
+REF_COUNT_CHECK = """
+    SELECT COUNT(*) FROM statement_blobs b
+    WHERE b.ref_count <> (
+        SELECT COUNT(*) FROM statements s WHERE s.text_sha256 = b.sha256
+    )
+"""
+
+
+async def legacy_columns(conn) -> list[str]:
+    """The old columns statements still has."""
+    rows = await conn.fetch(
+        """
+        SELECT column_name FROM information_schema.columns
+        WHERE table_name = 'statements' AND column_name = ANY($1::text[])
+        """,
+        list(LEGACY_COLUMNS),
+    )
+    return [row["column_name"] for row in rows]
+
+
+async def check(conn, columns: list[str]) -> int:
+    """Print what is not copied yet; returns the number of problems."""
+    problems = 0
+    for column in columns:
+        label, query = CHECKS[column]
+        count = await conn.fetchval(query)
+        print(f"  {label}: {count}")
+        problems += count
+    count = await conn.fetchval(REF_COUNT_CHECK)
+    print(f"  statement_blobs with a wrong ref_count: {count}")
+    return problems + count
+
+
+async def main(drop: bool) -> int:
+    # init_db copies whatever the old columns still hold
+    await init_db()
+    try:
+        async with get_db() as conn, conn.transaction():
+            columns = await legacy_columns(conn)
+            if not columns:
+                print("statements has no old columns; nothing to do")
+                return 0
+
+            # Keep an app of the old version from writing while checking
+            await conn.execute("LOCK TABLE statements IN SHARE MODE")
+            print(f"Old columns: {', '.join(columns)}")
+            if await check(conn, columns):
+                print(
+                    "Not dropping: the copy is incomplete (restart the app to re-run it)"
+                )
+                return 1
+            if not drop:
+                print("Copy complete; run with --drop to drop the old columns")
+                return 0
+
+            await conn.execute(
+                "ALTER TABLE statements "
+                + ", ".join(f"DROP COLUMN {column}" for column in columns)
+            )
+            print(f"Dropped {', '.join(columns)}")
+            return 0
+    finally:
+        await close_db()
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main("--drop" in sys.argv[1:])))
@@ -119,6 +119,16 @@ class StatementUpload(BaseModel):
     encryption_iv: Optional[str] = None
 
 
+class BatchUploadResult(BaseModel):
+    file_name: str
+    statement: Optional[StatementResponse] = None
+    error: Optional[str] = None
+
+
+class BatchUploadResponse(BaseModel):
+    results: list[BatchUploadResult]
+
+
 # --- Encryption Key Models ---
 
 
@@ -147,6 +157,18 @@ class ExtractionResult(BaseModel):
     metadata: Optional[dict] = None
 
 
+class ExtractionPreview(BaseModel):
+    success: bool
+    bank_name: Optional[str] = None
+    pages: Optional[int] = None
+    header: Optional[list[str]] = None
+    column_map: Optional[dict[str, int]] = None
+    sample_transactions: list[dict] = []
+    text: Optional[str] = None
+    error: Optional[str] = None
+    metadata: Optional[dict] = None
+
+
 # --- Category Models ---
 
 
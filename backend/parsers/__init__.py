@@ -3,13 +3,36 @@ File parsers module for extracting data from various bank statement formats.
 Supports PDF, Excel (xlsx/xls), and CSV files.
 """
 
-from .base import BaseParser, FileFormat, ParsedTransaction, ParseResult
+from .base import (
+    PARSER_VERSION,
+    BaseParser,
+    FileFormat,
+    ParsedTransaction,
+    ParseResult,
+    TransactionBatch,
+)
+from .executor import ParseExecutor, ParserBusyError
 from .factory import ParserFactory
+from .instrumentation import ParseTimer, get_timing_histograms
+from .mapped_file import FileContent, MappedFile, map_file
+from .pdf_parser import shutdown_process_pool
+from .result_cache import ParseResultCache
 
 __all__ = [
     "FileFormat",
     "ParseResult",
     "ParsedTransaction",
+    "TransactionBatch",
+    "FileContent",
+    "MappedFile",
+    "map_file",
     "BaseParser",
     "ParserFactory",
+    "ParseExecutor",
+    "ParserBusyError",
+    "ParseResultCache",
+    "ParseTimer",
+    "get_timing_histograms",
+    "PARSER_VERSION",
+    "shutdown_process_pool",
 ]
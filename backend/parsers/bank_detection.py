@@ -0,0 +1,120 @@
+"""
+Bank name detection from statement text and PDF metadata.
+"""
+
+import os
+import re
+from typing import Optional
+
+# Number of leading characters scanned before falling back to the full text;
+# the bank name is almost always in the first page header
+BANK_DETECT_PREFIX_CHARS = int(os.environ.get("BANK_DETECT_PREFIX_CHARS", "8192"))
+
+# Lowercase patterns of Mongolian banks, in priority order
+BANK_PATTERNS = {
+    "хаан банк": "Хаан Банк",
+    "khan bank": "Хаан Банк",
+    "голомт банк": "Голомт Банк",
+    "golomt bank": "Голомт Банк",
+    "худалдаа хөгжлийн банк": "Худалдаа Хөгжлийн Банк",
+    "trade and development bank": "Худалдаа Хөгжлийн Банк",
+    "tdb": "Худалдаа Хөгжлийн Банк",
+    "төрийн банк": "Төрийн Банк",
+    "state bank": "Төрийн Банк",
+    "хас банк": "Хас Банк",
+    "xac bank": "Хас Банк",
+    "капитрон банк": "Капитрон Банк",
+    "capitron bank": "Капитрон Банк",
+    "богд банк": "Богд Банк",
+    "bogd bank": "Богд Банк",
+    "үндэсний хөрөнгө оруулалтын банк": "Үндэсний Хөрөнгө Оруулалтын Банк",
+    "national investment bank": "Үндэсний Хөрөнгө Оруулалтын Банк",
+    "чингис хаан банк": "Чингис Хаан Банк",
+    "chinggis khaan bank": "Чингис Хаан Банк",
+    "транс банк": "Транс Банк",
+    "trans bank": "Транс Банк",
+    "ариг банк": "Ариг Банк",
+    "arig bank": "Ариг Банк",
+    "кредит банк": "Кредит Банк",
+    "credit bank": "Кредит Банк",
+}
+
+# PDF document info fields that may name the issuing bank
+PDF_METADATA_FIELDS = ("Producer", "Title", "Author", "Creator", "Subject")
+
+_PATTERN_PRIORITY = {pattern: idx for idx, pattern in enumerate(BANK_PATTERNS)}
+_BANK_NAMES = list(BANK_PATTERNS.values())
+
+# One alternation over all patterns. The lookahead reports every start
+# position, so patterns nested in longer ones ("хаан банк" inside
+# "чингис хаан банк") are still seen, as with separate substring checks.
+_BANK_RE = re.compile(
+    "(?=("
+    + "|".join(re.escape(p) for p in sorted(BANK_PATTERNS, key=len, reverse=True))
+    + "))"
+)
+
+
+def _match_bank(text_lower: str) -> Optional[str]:
+    """Find the highest-priority bank pattern in lowercased text in one pass."""
+    best = None
+    for match in _BANK_RE.finditer(text_lower):
+        priority = _PATTERN_PRIORITY[match.group(1)]
+        if best is None or priority < best:
+            best = priority
+            if best == 0:
+                break
+    return None if best is None else _BANK_NAMES[best]
+
+
+def detect_bank_name(
+    content: str, prefix_chars: int = BANK_DETECT_PREFIX_CHARS
+) -> Optional[str]:
+    """
+    Detect the bank name from statement text.
+
+    Scans the first prefix_chars characters and only scans the full text when
+    the prefix has no bank name.
+
+    Args:
+        content: Extracted text content
+        prefix_chars: Length of the header prefix scanned first
+
+    Returns:
+        Bank name if detected, None otherwise
+    """
+    if not content:
+        return None
+    bank_name = _match_bank(content[:prefix_chars].lower())
+    if bank_name or len(content) <= prefix_chars:
+        return bank_name
+
+    # On megabytes of text CPython's substring search beats the regex engine
+    content_lower = content.lower()
+    for pattern, bank_name in BANK_PATTERNS.items():
+        if pattern in content_lower:
+            return bank_name
+    return None
+
+
+def detect_bank_from_metadata(metadata: Optional[dict]) -> Optional[str]:
+    """
+    Detect the bank name from PDF document info (Producer, Title, ...).
+
+    Args:
+        metadata: pdfplumber's pdf.metadata dict
+
+    Returns:
+        Bank name if a metadata field names a bank, None otherwise
+    """
+    if not metadata:
+        return None
+    for field_name in PDF_METADATA_FIELDS:
+        value = metadata.get(field_name)
+        if isinstance(value, bytes):
+            value = value.decode("utf-8", errors="ignore")
+        if isinstance(value, str) and value:
+            bank_name = _match_bank(value.lower())
+            if bank_name:
+                return bank_name
+    return None
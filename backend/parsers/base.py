@@ -2,11 +2,34 @@
 Base parser class and common data structures for file parsing.
 """
 
+import logging
+import math
+import os
+import re
 from abc import ABC, abstractmethod
+from array import array
 from dataclasses import dataclass, field
-from datetime import date
+from datetime import date, datetime
 from enum import Enum
-from typing import Any, Optional
+from itertools import islice
+from typing import Any, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from .bank_detection import detect_bank_name
+from .cell_values import parse_amount, parse_date
+from .mapped_file import FileContent
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever parser output changes, so cached parse results are invalidated
+PARSER_VERSION = "4"
+
+# Defaults for BaseParser.preview
+PREVIEW_MAX_PAGES = 2
+PREVIEW_MAX_ROWS = 50
+PREVIEW_SAMPLE_SIZE = 5
+
+# Directory for on-disk parser caches (the Docker image creates /app/data)
+PARSER_CACHE_DIR = os.environ.get("PARSER_CACHE_DIR", "data")
 
 
 class FileFormat(Enum):
@@ -18,7 +41,7 @@ class FileFormat(Enum):
     CSV = "csv"
 
 
-@dataclass
+@dataclass(slots=True)
 class ParsedTransaction:
     """
     Normalized transaction format across all file types.
@@ -47,6 +70,169 @@ class ParsedTransaction:
             "raw_data": self.raw_data,
         }
 
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "ParsedTransaction":
+        """Create from a dictionary produced by to_dict."""
+        return cls(
+            date=date.fromisoformat(data["date"]),
+            description=data["description"],
+            amount=data["amount"],
+            transaction_type=data["transaction_type"],
+            balance=data.get("balance"),
+            category=data.get("category"),
+            reference=data.get("reference"),
+            raw_data=data.get("raw_data"),
+        )
+
+
+# Transaction types stored as one byte per row in TransactionBatch
+TRANSACTION_TYPES = ("debit", "credit")
+_TRANSACTION_TYPE_IDS = {name: idx for idx, name in enumerate(TRANSACTION_TYPES)}
+
+
+class TransactionBatch:
+    """
+    Columnar list of parsed transactions.
+
+    Dates, amounts, balances and types are kept in parallel arrays, and
+    descriptions are indices into a string pool (statements repeat the same
+    descriptions a lot). Row objects (ParsedTransaction) are only built when
+    the batch is iterated or indexed, e.g. at the API edge.
+    """
+
+    __slots__ = (
+        "_dates",
+        "_amounts",
+        "_balances",
+        "_types",
+        "_description_ids",
+        "_descriptions",
+        "_description_index",
+        "_extras",
+    )
+
+    def __init__(self, transactions: Iterable[ParsedTransaction] = ()):
+        self._dates = array("l")  # date ordinals
+        self._amounts = array("d")
+        self._balances = array("d")  # NaN when there is no balance
+        self._types = bytearray()  # index into TRANSACTION_TYPES
+        self._description_ids = array("L")
+        self._descriptions: list[str] = []
+        self._description_index: dict[str, int] = {}
+        # Rarely set fields by row index: (category, reference, raw_data)
+        self._extras: dict[int, tuple] = {}
+        self.extend(transactions)
+
+    def _description_id(self, description: str) -> int:
+        idx = self._description_index.get(description)
+        if idx is None:
+            idx = len(self._descriptions)
+            self._descriptions.append(description)
+            self._description_index[description] = idx
+        return idx
+
+    def add(
+        self,
+        date: date,
+        description: str,
+        amount: float,
+        transaction_type: str,
+        balance: Optional[float] = None,
+        category: Optional[str] = None,
+        reference: Optional[str] = None,
+        raw_data: Optional[dict[str, Any]] = None,
+    ) -> None:
+        """Append a transaction from its field values."""
+        type_id = _TRANSACTION_TYPE_IDS.get(transaction_type)
+        if type_id is None:
+            raise ValueError(f"Unknown transaction type: {transaction_type}")
+        if category is not None or reference is not None or raw_data is not None:
+            self._extras[len(self._dates)] = (category, reference, raw_data)
+        self._dates.append(date.toordinal())
+        self._amounts.append(amount)
+        self._balances.append(math.nan if balance is None else balance)
+        self._types.append(type_id)
+        self._description_ids.append(self._description_id(description))
+
+    def append(self, transaction: ParsedTransaction) -> None:
+        """Append a row object."""
+        self.add(
+            transaction.date,
+            transaction.description,
+            transaction.amount,
+            transaction.transaction_type,
+            transaction.balance,
+            transaction.category,
+            transaction.reference,
+            transaction.raw_data,
+        )
+
+    def extend(self, transactions: Iterable[ParsedTransaction]) -> None:
+        """Append row objects, or all rows of another batch (column-wise)."""
+        if not isinstance(transactions, TransactionBatch):
+            for transaction in transactions:
+                self.append(transaction)
+            return
+
+        offset = len(self._dates)
+        remap = [self._description_id(d) for d in transactions._descriptions]
+        self._description_ids.extend(remap[i] for i in transactions._description_ids)
+        self._dates.extend(transactions._dates)
+        self._amounts.extend(transactions._amounts)
+        self._balances.extend(transactions._balances)
+        self._types.extend(transactions._types)
+        for idx, extras in transactions._extras.items():
+            self._extras[offset + idx] = extras
+
+    def __len__(self) -> int:
+        return len(self._dates)
+
+    def __getitem__(self, idx: int) -> ParsedTransaction:
+        if idx < 0:
+            idx += len(self._dates)
+        if not 0 <= idx < len(self._dates):
+            raise IndexError("transaction index out of range")
+        balance = self._balances[idx]
+        category, reference, raw_data = self._extras.get(idx, (None, None, None))
+        return ParsedTransaction(
+            date=date.fromordinal(self._dates[idx]),
+            description=self._descriptions[self._description_ids[idx]],
+            amount=self._amounts[idx],
+            transaction_type=TRANSACTION_TYPES[self._types[idx]],
+            balance=None if math.isnan(balance) else balance,
+            category=category,
+            reference=reference,
+            raw_data=raw_data,
+        )
+
+    def __iter__(self) -> Iterator[ParsedTransaction]:
+        for idx in range(len(self._dates)):
+            yield self[idx]
+
+    def __repr__(self) -> str:
+        return f"TransactionBatch({len(self._dates)} transactions)"
+
+    def dates(self) -> list[date]:
+        """Date column."""
+        return [date.fromordinal(ordinal) for ordinal in self._dates]
+
+    def descriptions(self) -> list[str]:
+        """Description column."""
+        pool = self._descriptions
+        return [pool[idx] for idx in self._description_ids]
+
+    def amounts(self) -> array:
+        """Amount column (array of doubles)."""
+        return self._amounts
+
+    def transaction_types(self) -> list[str]:
+        """Transaction type column ('credit' or 'debit')."""
+        return [TRANSACTION_TYPES[type_id] for type_id in self._types]
+
+    def balances(self) -> list[Optional[float]]:
+        """Balance column (None where the statement had no balance)."""
+        return [None if math.isnan(b) else b for b in self._balances]
+
 
 @dataclass
 class ParseResult:
@@ -54,7 +240,7 @@ class ParseResult:
 
     success: bool
     raw_text: str  # For AI analysis
-    transactions: list[ParsedTransaction] = field(default_factory=list)
+    transactions: TransactionBatch = field(default_factory=TransactionBatch)
     metadata: dict[str, Any] = field(default_factory=dict)
     error: Optional[str] = None
 
@@ -68,6 +254,19 @@ class ParseResult:
             "error": self.error,
         }
 
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "ParseResult":
+        """Create from a dictionary produced by to_dict."""
+        return cls(
+            success=data["success"],
+            raw_text=data["raw_text"],
+            transactions=TransactionBatch(
+                ParsedTransaction.from_dict(t) for t in data.get("transactions", [])
+            ),
+            metadata=data.get("metadata", {}),
+            error=data.get("error"),
+        )
+
 
 class BaseParser(ABC):
     """
@@ -76,14 +275,17 @@ class BaseParser(ABC):
     """
 
     @abstractmethod
-    async def parse(
-        self, file_content: bytes, filename: str, max_chars: int = 50000
+    def parse(
+        self, file_content: FileContent, filename: str, max_chars: int = 50000
     ) -> ParseResult:
         """
         Parse the file content and extract text and transactions.
 
+        Parsing is synchronous and CPU-bound; async callers should go through
+        ParserFactory.parse_file, which runs it on the parse executor.
+
         Args:
-            file_content: Raw bytes of the file
+            file_content: Raw bytes of the file, or a MappedFile of it
             filename: Original filename (used for format detection)
             max_chars: Maximum characters to extract
 
@@ -92,6 +294,75 @@ class BaseParser(ABC):
         """
         pass
 
+    @abstractmethod
+    def preview(
+        self,
+        file_content: FileContent,
+        filename: str,
+        max_pages: int = PREVIEW_MAX_PAGES,
+        max_rows: int = PREVIEW_MAX_ROWS,
+        sample_size: int = PREVIEW_SAMPLE_SIZE,
+    ) -> ParseResult:
+        """
+        Read only the start of a file: bank, size, header row and sample rows.
+
+        Args:
+            file_content: Raw bytes of the file, or a MappedFile of it
+            filename: Original filename
+            max_pages: PDF pages to read
+            max_rows: Spreadsheet/CSV rows to read
+            sample_size: Maximum number of sample transactions
+
+        Returns:
+            ParseResult with the preview text, sample transactions and
+            metadata (preview, bank_name, header, column_map, ...)
+        """
+        pass
+
+    def _build_preview(
+        self,
+        tables: List[List[List[str]]],
+        text: str,
+        metadata: dict[str, Any],
+        sample_size: int,
+    ) -> ParseResult:
+        """
+        Build a preview result from the tables read so far.
+
+        The header row and column map come from the first table with a
+        statement header; sample transactions from the tables in order.
+        """
+        header_row = None
+        col_map = None
+        samples = TransactionBatch()
+        for table in tables:
+            if len(samples) >= sample_size:
+                break
+            header = self._find_table_header(table)
+            if header is None:
+                continue
+            if header_row is None:
+                header_idx, col_map = header
+                header_row = [
+                    str(cell).strip() if cell else "" for cell in table[header_idx]
+                ]
+            transactions = self._extract_transactions_from_table(
+                table, metadata.get("bank_name")
+            )
+            samples.extend(islice(transactions, sample_size - len(samples)))
+
+        return ParseResult(
+            success=True,
+            raw_text=text,
+            transactions=samples,
+            metadata={
+                **metadata,
+                "preview": True,
+                "header": header_row,
+                "column_map": col_map,
+            },
+        )
+
     def detect_bank(self, content: str) -> Optional[str]:
         """
         Detect the bank name from the content.
@@ -103,38 +374,215 @@ class BaseParser(ABC):
         Returns:
             Bank name if detected, None otherwise
         """
-        # Common Mongolian banks
-        banks = {
-            "хаан банк": "Хаан Банк",
-            "khan bank": "Хаан Банк",
-            "голомт банк": "Голомт Банк",
-            "golomt bank": "Голомт Банк",
-            "худалдаа хөгжлийн банк": "Худалдаа Хөгжлийн Банк",
-            "trade and development bank": "Худалдаа Хөгжлийн Банк",
-            "tdb": "Худалдаа Хөгжлийн Банк",
-            "төрийн банк": "Төрийн Банк",
-            "state bank": "Төрийн Банк",
-            "хас банк": "Хас Банк",
-            "xac bank": "Хас Банк",
-            "капитрон банк": "Капитрон Банк",
-            "capitron bank": "Капитрон Банк",
-            "богд банк": "Богд Банк",
-            "bogd bank": "Богд Банк",
-            "үндэсний хөрөнгө оруулалтын банк": "Үндэсний Хөрөнгө Оруулалтын Банк",
-            "national investment bank": "Үндэсний Хөрөнгө Оруулалтын Банк",
-            "чингис хаан банк": "Чингис Хаан Банк",
-            "chinggis khaan bank": "Чингис Хаан Банк",
-            "транс банк": "Транс Банк",
-            "trans bank": "Транс Банк",
-            "ариг банк": "Ариг Банк",
-            "arig bank": "Ариг Банк",
-            "кредит банк": "Кредит Банк",
-            "credit bank": "Кредит Банк",
-        }
+        return detect_bank_name(content)
+
+    def _parse_amount(self, amount_str: str) -> float:
+        """Parse amount string to float, handling Mongolian number formats."""
+        return parse_amount(amount_str)
+
+    def _parse_date(self, date_str: str) -> Optional[datetime]:
+        """Parse various date formats from bank statements."""
+        return parse_date(date_str)
+
+    def _cell_date(self, value: Any) -> Optional[datetime]:
+        """Date of a table cell: datetime/date values as they are, text parsed."""
+        if isinstance(value, datetime):
+            return value
+        if isinstance(value, date):
+            return datetime(value.year, value.month, value.day)
+        return self._parse_date(str(value) if value else "")
+
+    def _cell_amount(self, value: Any) -> float:
+        """Amount of a table cell: numbers as they are, text parsed."""
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return float(value)
+        return self._parse_amount(str(value or ""))
+
+    def _map_header_row(self, row: Sequence[Any]) -> dict[str, int]:
+        """
+        Map the columns of a header row by their titles.
+
+        Returns:
+            {"date", "income", "expense", "description", "balance"} -> column
+            index, for the columns found
+        """
+        col_map = {}
+        for i, cell in enumerate(row):
+            if not cell:
+                continue
+            cell_lower = str(cell).lower().strip()
+
+            if "огноо" in cell_lower or "date" in cell_lower:
+                col_map["date"] = i
+            elif (
+                "орлого" in cell_lower
+                or "credit" in cell_lower
+                or "кредит" in cell_lower
+            ):
+                col_map["income"] = i
+            elif (
+                "зарлага" in cell_lower
+                or "debit" in cell_lower
+                or "дебит" in cell_lower
+            ):
+                col_map["expense"] = i
+            elif (
+                "утга" in cell_lower
+                or "description" in cell_lower
+                or "тайлбар" in cell_lower
+            ):
+                col_map["description"] = i
+            elif "үлдэгдэл" in cell_lower or "balance" in cell_lower:
+                col_map["balance"] = i
+        return col_map
+
+    def _is_statement_header(self, col_map: dict[str, int]) -> bool:
+        """Check that a column map has a date and an income or expense column."""
+        return "date" in col_map and ("income" in col_map or "expense" in col_map)
+
+    def _find_table_header(
+        self, table: List[List[str]]
+    ) -> Optional[Tuple[int, dict[str, int]]]:
+        """
+        Find the header row of a statement table and map its columns.
+
+        Returns:
+            (header row index, column map) if the table has a date column and an
+            income or expense column, None otherwise
+        """
+        if not table or len(table) < 2:
+            return None
+
+        # Find header row and column indices
+        header_row = None
+        header_idx = -1
+
+        for idx, row in enumerate(table):
+            if not row:
+                continue
+            row_lower = [str(cell).lower() if cell else "" for cell in row]
+            row_text = " ".join(row_lower)
+
+            # Look for common header patterns
+            if any(
+                kw in row_text
+                for kw in ["огноо", "date", "орлого", "зарлага", "дебит", "кредит"]
+            ):
+                header_row = row
+                header_idx = idx
+                break
+
+        if header_row is None:
+            return None
+
+        # Need at least date and one of income/expense
+        col_map = self._map_header_row(header_row)
+        if not self._is_statement_header(col_map):
+            return None
+
+        return header_idx, col_map
+
+    def _add_table_row(
+        self,
+        transactions: TransactionBatch,
+        row: Sequence[Any],
+        col_map: dict[str, int],
+    ) -> None:
+        """
+        Add the transaction in one data row of a statement table, if any.
+
+        Cells may be text (PDF tables, CSV) or typed values (Excel dates and
+        numbers). Summary rows and rows without a date or amount are skipped.
+        """
+        if not row:
+            return
+
+        # Skip summary rows (Нийт:, Total:, etc.)
+        first_cell = str(row[0]).lower() if row[0] else ""
+        if any(kw in first_cell for kw in ["нийт", "total", "дүн", "sum"]):
+            return
+
+        try:
+            # Extract date
+            date_value = row[col_map["date"]] if col_map["date"] < len(row) else None
+            parsed_date = self._cell_date(date_value)
+            if not parsed_date:
+                return
+
+            # Extract amounts
+            income_amount = 0.0
+            expense_amount = 0.0
+
+            if "income" in col_map and col_map["income"] < len(row):
+                income_amount = self._cell_amount(row[col_map["income"]])
+
+            if "expense" in col_map and col_map["expense"] < len(row):
+                expense_amount = self._cell_amount(row[col_map["expense"]])
+
+            # Determine transaction type and amount
+            if income_amount > 0 and expense_amount == 0:
+                txn_type = "credit"
+                amount = income_amount
+            elif expense_amount > 0 and income_amount == 0:
+                txn_type = "debit"
+                amount = expense_amount
+            elif income_amount > 0:
+                txn_type = "credit"
+                amount = income_amount
+            elif expense_amount > 0:
+                txn_type = "debit"
+                amount = expense_amount
+            else:
+                return  # Skip rows with no amounts
+
+            # Extract description
+            description = ""
+            if "description" in col_map and col_map["description"] < len(row):
+                description = str(row[col_map["description"]] or "").strip()
+
+            # If no description column, try to build from other cells
+            if not description:
+                # Use non-numeric cells as description
+                desc_parts = []
+                for i, cell in enumerate(row):
+                    if i in col_map.values():
+                        continue
+                    if cell and not re.match(r"^[\d,.\s]+$", str(cell)):
+                        desc_parts.append(str(cell).strip())
+                description = " ".join(desc_parts)[:200]
+
+            # Extract balance if available
+            balance = None
+            if "balance" in col_map and col_map["balance"] < len(row):
+                balance = self._cell_amount(row[col_map["balance"]])
+
+            transactions.add(
+                date=parsed_date.date(),
+                description=description or "Гүйлгээ",
+                amount=amount,
+                transaction_type=txn_type,
+                balance=balance,
+            )
+
+        except Exception as e:
+            logger.debug(f"Failed to parse row: {row}, error: {e}")
+
+    def _extract_transactions_from_table(
+        self, table: List[List[str]], bank_name: Optional[str]
+    ) -> TransactionBatch:
+        """Extract transactions from a parsed table based on bank format."""
+        transactions = TransactionBatch()
+
+        header = self._find_table_header(table)
+        if header is None:
+            return transactions
+        header_idx, col_map = header
+
+        logger.info(f"Found column mapping: {col_map}")
 
-        content_lower = content.lower()
-        for pattern, bank_name in banks.items():
-            if pattern in content_lower:
-                return bank_name
+        # Process data rows
+        for row in table[header_idx + 1 :]:
+            self._add_table_row(transactions, row, col_map)
 
-        return None
+        logger.info(f"Extracted {len(transactions)} transactions from table")
+        return transactions
@@ -0,0 +1,74 @@
+"""
+Fast parsing of date and amount cells from bank statement rows.
+"""
+
+import re
+from datetime import datetime
+from functools import lru_cache
+from typing import Optional
+
+# Date formats in Mongolian bank statements, matched in one pass:
+#   year first: 2026.02.01, 2026.2.1, 2026-02-01, 2026/02/01
+#   day first:  01.02.2026, 01/02/2026
+# The separator must be the same on both sides, like the strptime formats
+# these replace (%Y.%m.%d, %Y-%m-%d, %Y/%m/%d, %d.%m.%Y, %d/%m/%Y).
+_DATE_RE = re.compile(
+    r"(?P<y1>\d{4})(?P<s1>[.\-/])(?P<m1>\d{1,2})(?P=s1)(?P<d1>\d{1,2})"
+    r"|(?P<d2>\d{1,2})(?P<s2>[./])(?P<m2>\d{1,2})(?P=s2)(?P<y2>\d{4})"
+)
+
+# Characters dropped from amount cells before float conversion
+_AMOUNT_DELETE = str.maketrans("", "", ", ")
+
+
+@lru_cache(maxsize=8192)
+def parse_date(date_str: str) -> Optional[datetime]:
+    """
+    Parse a statement date cell.
+
+    Only the first whitespace-separated token is used, so trailing times
+    ("2026.2.1 3:32:01AM") are ignored. Results are memoized because the same
+    dates repeat on every row of a statement.
+
+    Args:
+        date_str: Raw cell text
+
+    Returns:
+        datetime at midnight, or None if the cell is not a valid date
+    """
+    if not date_str:
+        return None
+    parts = date_str.split(None, 1)
+    if not parts:
+        return None
+
+    match = _DATE_RE.fullmatch(parts[0])
+    if not match:
+        return None
+
+    if match.group("y1"):
+        year, month, day = match.group("y1", "m1", "d1")
+    else:
+        year, month, day = match.group("y2", "m2", "d2")
+    try:
+        return datetime(int(year), int(month), int(day))
+    except ValueError:
+        return None
+
+
+def parse_amount(amount_str: str) -> float:
+    """
+    Parse an amount cell such as "20,000.00" or "1 500.00".
+
+    Args:
+        amount_str: Raw cell text
+
+    Returns:
+        Amount as float, 0.0 if the cell is empty or not numeric
+    """
+    if not amount_str:
+        return 0.0
+    try:
+        return float(amount_str.translate(_AMOUNT_DELETE))
+    except ValueError:
+        return 0.0
@@ -1,20 +1,42 @@
 """
 CSV parser with automatic encoding and delimiter detection.
-Uses chardet for encoding detection.
+Uses chardet for encoding detection (see encoding_detection).
 """
 
+import codecs
 import csv
 import io
-from typing import Optional
+import time
+from typing import List, Optional, Tuple
 
-from .base import BaseParser, ParseResult
+from .base import (
+    PREVIEW_MAX_PAGES,
+    PREVIEW_MAX_ROWS,
+    PREVIEW_SAMPLE_SIZE,
+    BaseParser,
+    ParseResult,
+)
+from .encoding_detection import (
+    CSV_ENCODING_SAMPLE_BYTES,
+    detect_encoding,
+    get_bank_encoding_cache,
+)
+from .instrumentation import ParseTimer
+from .mapped_file import FileContent, open_content
+from .tabular import TabularTransactionExtractor
+
+# Bytes read from the start of the file for a preview
+PREVIEW_BYTES = 16 * 1024
+
+# Bytes from the start of the file the delimiter is detected on
+SNIFF_BYTES = 16 * 1024
 
 
 class CsvParser(BaseParser):
     """Parser for CSV bank statements with automatic encoding detection."""
 
-    async def parse(
-        self, file_content: bytes, filename: str, max_chars: int = 50000
+    def parse(
+        self, file_content: FileContent, filename: str, max_chars: int = 50000
     ) -> ParseResult:
         """
         Extract text from a CSV file.
@@ -27,111 +49,265 @@ class CsvParser(BaseParser):
         Returns:
             ParseResult with extracted text and metadata
         """
+        timer = ParseTimer("csv")
         try:
-            # Detect encoding
-            encoding = self._detect_encoding(file_content)
+            # Detect encoding from a sample (or the bank's known encoding)
+            encoding_cache = get_bank_encoding_cache()
+            with timer.stage("encoding_detection"):
+                encoding, encoding_method = detect_encoding(
+                    file_content, cache=encoding_cache
+                )
 
-            # Decode content
+            # Detect delimiter on the first lines only
+            with timer.stage("delimiter_detection"):
+                delimiter = self._detect_delimiter(
+                    self._head_text(file_content, encoding)
+                )
+
+            # Decode and parse rows as they are read
+            rows_start = time.perf_counter()
             try:
-                text_content = file_content.decode(encoding)
+                text_parts, total_rows, extractor = self._read_rows(
+                    file_content, encoding, "strict", delimiter, max_chars
+                )
             except UnicodeDecodeError:
-                # Fallback to utf-8 with error handling
-                text_content = file_content.decode("utf-8", errors="replace")
-
-            # Detect delimiter
-            delimiter = self._detect_delimiter(text_content)
-
-            # Parse CSV
-            text_parts = []
-            total_chars = 0
-            total_rows = 0
-
-            reader = csv.reader(io.StringIO(text_content), delimiter=delimiter)
-
-            for row in reader:
-                if total_chars >= max_chars:
-                    text_parts.append("\n\n[Текст хэт урт тул товчилсон...]")
-                    break
-
-                # Skip completely empty rows
-                if all(cell.strip() == "" for cell in row):
-                    continue
-
-                row_text = "\t".join(cell.strip() for cell in row)
-                if row_text.strip():
-                    text_parts.append(row_text)
-                    total_chars += len(row_text)
-                    total_rows += 1
+                encoding, errors = self._fallback_encoding(file_content, encoding)
+                encoding_method = "detector" if errors == "strict" else "fallback"
+                text_parts, total_rows, extractor = self._read_rows(
+                    file_content, encoding, errors, delimiter, max_chars
+                )
 
             full_text = "\n".join(text_parts).strip()
+            timer.add("rows", time.perf_counter() - rows_start)
 
             if not full_text:
+                timer.finish()
                 return ParseResult(
                     success=False,
                     raw_text="",
                     error="CSV файлаас өгөгдөл олдсонгүй.",
                 )
 
-            bank_name = self.detect_bank(full_text)
+            with timer.stage("bank_detection"):
+                bank_name = self.detect_bank(full_text)
+
+            if bank_name and encoding_method == "detector":
+                encoding_cache.record(bank_name, encoding)
+                encoding_cache.save()
 
             return ParseResult(
                 success=True,
                 raw_text=full_text[:max_chars],
+                transactions=extractor.transactions,
                 metadata={
                     "rows": total_rows,
                     "encoding": encoding,
+                    "encoding_detection": encoding_method,
                     "delimiter": delimiter,
                     "bank_name": bank_name,
                     "format": "csv",
                     "filename": filename,
+                    "transactions_extracted": len(extractor.transactions),
+                    "column_maps": extractor.column_maps,
+                    "timings": timer.finish(),
                 },
             )
 
         except Exception as e:
+            timer.finish()
             return ParseResult(
                 success=False,
                 raw_text="",
                 error=f"CSV файл уншихад алдаа гарлаа: {str(e)}",
             )
 
-    def _detect_encoding(self, content: bytes) -> str:
+    def preview(
+        self,
+        file_content: FileContent,
+        filename: str,
+        max_pages: int = PREVIEW_MAX_PAGES,
+        max_rows: int = PREVIEW_MAX_ROWS,
+        sample_size: int = PREVIEW_SAMPLE_SIZE,
+    ) -> ParseResult:
+        """
+        Read only the first rows of a CSV file (see BaseParser.preview).
+
+        Encoding and delimiter are detected on the first PREVIEW_BYTES only.
+
+        Returns:
+            ParseResult with the rows' text, sample transactions and metadata
+            (encoding, delimiter, bank_name, header, column_map)
         """
-        Detect the encoding of the file content.
+        try:
+            head = file_content[:PREVIEW_BYTES]
+            encoding = self._detect_encoding(file_content, PREVIEW_BYTES)
+            text_content = head.decode(encoding, errors="replace")
+            if len(file_content) > PREVIEW_BYTES:
+                # Drop the last line, it may be cut off
+                text_content = text_content.rsplit("\n", 1)[0]
+
+            delimiter = self._detect_delimiter(text_content)
+
+            rows = []
+            reader = csv.reader(io.StringIO(text_content), delimiter=delimiter)
+            for row in reader:
+                if len(rows) >= max_rows:
+                    break
+                cells = [cell.strip() for cell in row]
+                if any(cells):
+                    rows.append(cells)
+
+            text = "\n".join("\t".join(row) for row in rows).strip()
+            if not text:
+                return ParseResult(
+                    success=False,
+                    raw_text="",
+                    error="CSV файлаас өгөгдөл олдсонгүй.",
+                )
+
+            return self._build_preview(
+                [rows],
+                text,
+                {
+                    "rows": len(rows),
+                    "encoding": encoding,
+                    "delimiter": delimiter,
+                    "bank_name": self.detect_bank(text),
+                    "format": "csv",
+                    "filename": filename,
+                },
+                sample_size,
+            )
+
+        except Exception as e:
+            return ParseResult(
+                success=False,
+                raw_text="",
+                error=f"CSV файл уншихад алдаа гарлаа: {str(e)}",
+            )
+
+    def _detect_encoding(
+        self, content: FileContent, sample_bytes: int = CSV_ENCODING_SAMPLE_BYTES
+    ) -> str:
+        """
+        Detect the encoding of the file content from its first sample_bytes.
 
         Args:
             content: Raw bytes of the file
+            sample_bytes: Bytes from the start of the file to look at
 
         Returns:
             Detected encoding name
         """
-        try:
-            import chardet
-
-            result = chardet.detect(content)
-            encoding = result.get("encoding", "utf-8")
-
-            # Handle common encoding aliases
-            if encoding:
-                encoding = encoding.lower()
-                if encoding in ("ascii", "iso-8859-1", "windows-1252"):
-                    # These are often misdetected for UTF-8 files
-                    try:
-                        content.decode("utf-8")
-                        return "utf-8"
-                    except UnicodeDecodeError:
-                        pass
-                return encoding
-            return "utf-8"
-
-        except ImportError:
-            # chardet not installed, try common encodings
-            for encoding in ["utf-8", "utf-16", "cp1251", "iso-8859-1"]:
-                try:
-                    content.decode(encoding)
-                    return encoding
-                except UnicodeDecodeError:
+        encoding, _ = detect_encoding(
+            content, sample_bytes, cache=get_bank_encoding_cache()
+        )
+        return encoding
+
+    def _head_text(self, content: FileContent, encoding: str) -> str:
+        """Decode the first SNIFF_BYTES of the file, without a cut-off last line."""
+        head = content[:SNIFF_BYTES]
+        text = head.decode(encoding, errors="ignore")
+        if len(content) > SNIFF_BYTES:
+            text = text.rsplit("\n", 1)[0]
+        return text
+
+    def _read_rows(
+        self,
+        content: FileContent,
+        encoding: str,
+        errors: str,
+        delimiter: str,
+        max_chars: int,
+    ) -> Tuple[List[str], int, TabularTransactionExtractor]:
+        """
+        Decode and parse the file row by row.
+
+        The bytes are decoded incrementally by a TextIOWrapper, so the file is
+        never held as one string; each row goes to the text (up to max_chars)
+        and to the transaction extractor as soon as it is read.
+
+        Returns:
+            (text lines, text row count, extractor with the transactions)
+
+        Raises:
+            UnicodeDecodeError: If errors is "strict" and the file does not
+                decode with encoding
+        """
+        text_parts = []
+        total_chars = 0
+        total_rows = 0
+        truncated = False
+        extractor = TabularTransactionExtractor(self)
+
+        stream = io.TextIOWrapper(
+            open_content(content), encoding=encoding, errors=errors, newline=""
+        )
+        with stream:
+            for row in csv.reader(stream, delimiter=delimiter):
+                if total_chars >= max_chars:
+                    if not truncated:
+                        text_parts.append("\n\n[Текст хэт урт тул товчилсон...]")
+                        truncated = True
+                    # Past the text limit, read on only for transactions
+                    if not extractor.wants_rows():
+                        break
+
+                # Skip completely empty rows
+                if all(cell.strip() == "" for cell in row):
+                    continue
+
+                extractor.feed(row)
+                if truncated:
                     continue
-            return "utf-8"
+
+                row_text = "\t".join(cell.strip() for cell in row)
+                if row_text.strip():
+                    text_parts.append(row_text)
+                    total_chars += len(row_text)
+                    total_rows += 1
+
+        return text_parts, total_rows, extractor
+
+    def _fallback_encoding(
+        self, content: FileContent, encoding: str
+    ) -> Tuple[str, str]:
+        """
+        Pick the encoding to re-read a file that failed to decode midway.
+
+        The encoding is detected from a sample, so a file whose first part is
+        plain ASCII can still fail later on; detection is then repeated from
+        the first byte that did not decode.
+
+        Returns:
+            (encoding, errors) for _read_rows
+        """
+        start = self._first_undecodable(content, encoding)
+        if start is not None:
+            # One byte past the sample, so detection sees it is not the whole file
+            sample_end = start + CSV_ENCODING_SAMPLE_BYTES + 1
+            retry, _ = detect_encoding(content[start:sample_end])
+            if retry != encoding and self._first_undecodable(content, retry) is None:
+                return retry, "strict"
+        # Fallback to utf-8 with error handling
+        return "utf-8", "replace"
+
+    def _first_undecodable(self, content: FileContent, encoding: str) -> Optional[int]:
+        """Offset of the first byte that does not decode (None if all do)."""
+        try:
+            decoder = codecs.getincrementaldecoder(encoding)(errors="strict")
+        except LookupError:
+            return 0
+        for start in range(0, len(content), SNIFF_BYTES):
+            chunk = content[start : start + SNIFF_BYTES]
+            try:
+                decoder.decode(chunk, final=start + len(chunk) >= len(content))
+            except UnicodeDecodeError as e:
+                # e.object also holds the bytes the decoder had buffered
+                return max(start + len(chunk) - len(e.object) + e.start, 0)
+            except UnicodeError:
+                return start
+        return None
 
     def _detect_delimiter(self, content: str) -> str:
         """
@@ -0,0 +1,207 @@
+"""
+Encoding detection for CSV statements from a bounded sample of the file.
+
+Order of checks: byte order mark, strict UTF-8 on the sample, the encoding
+last seen for the statement's bank, then chardet's UniversalDetector fed
+the sample chunk by chunk until it is confident.
+"""
+
+import codecs
+import json
+import logging
+import os
+import threading
+from typing import Optional, Tuple
+
+from .bank_detection import detect_bank_name
+from .base import PARSER_CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+# Bytes from the start of the file used for detection, and the chunk size
+# the detector is fed in (it usually becomes confident after a few chunks)
+CSV_ENCODING_SAMPLE_BYTES = int(
+    os.environ.get("CSV_ENCODING_SAMPLE_BYTES", str(256 * 1024))
+)
+ENCODING_CHUNK_BYTES = 16 * 1024
+
+# Bytes decoded with a cached encoding to recognise the bank
+BANK_PROBE_BYTES = 8 * 1024
+
+BANK_ENCODING_CACHE_PATH = os.environ.get(
+    "BANK_ENCODING_CACHE_PATH",
+    os.path.join(PARSER_CACHE_DIR, "csv_encodings.json"),
+)
+
+# UTF-32 marks first: the UTF-32-LE mark starts with the UTF-16-LE one
+_BOMS = (
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+
+
+def decodes_as(sample: bytes, encoding: str, complete: bool) -> bool:
+    """
+    Check that a sample decodes strictly.
+
+    Args:
+        sample: Leading bytes of the file
+        encoding: Codec name
+        complete: False if the sample was cut from a longer file, so a
+            multi-byte character split at its end is not an error
+    """
+    try:
+        codecs.getincrementaldecoder(encoding)(errors="strict").decode(
+            sample, final=complete
+        )
+        return True
+    except (UnicodeDecodeError, LookupError):
+        return False
+
+
+class BankEncodingCache:
+    """
+    Process-wide map of bank name to CSV encoding, persisted as JSON.
+
+    Lets statements from a bank whose exports are known to be e.g. cp1251
+    skip the statistical detector.
+    """
+
+    def __init__(self, path: str = BANK_ENCODING_CACHE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._encodings: Optional[dict[str, str]] = None
+        self._dirty = False
+
+    def _load(self) -> dict[str, str]:
+        if self._encodings is None:
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    self._encodings = json.load(f)
+            except FileNotFoundError:
+                self._encodings = {}
+            except (OSError, ValueError) as e:
+                logger.warning(f"[Encoding Cache] Ignoring unreadable cache: {e}")
+                self._encodings = {}
+        return self._encodings
+
+    def snapshot(self) -> dict[str, str]:
+        """Get the cached encoding per bank."""
+        with self._lock:
+            return dict(self._load())
+
+    def record(self, bank_name: str, encoding: str) -> None:
+        """Remember the encoding of a bank's statements."""
+        with self._lock:
+            encodings = self._load()
+            if encodings.get(bank_name) != encoding:
+                encodings[bank_name] = encoding
+                self._dirty = True
+
+    def save(self) -> None:
+        """Write the cache to disk if it changed (atomic replace)."""
+        with self._lock:
+            if not self._dirty or self._encodings is None:
+                return
+            try:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                tmp_path = f"{self.path}.{os.getpid()}.tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(self._encodings, f, ensure_ascii=False)
+                os.replace(tmp_path, self.path)
+                self._dirty = False
+            except OSError as e:
+                logger.warning(f"[Encoding Cache] Could not persist cache: {e}")
+
+
+_default_cache: Optional[BankEncodingCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_bank_encoding_cache() -> BankEncodingCache:
+    """Get the shared process-wide bank encoding cache."""
+    global _default_cache
+
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = BankEncodingCache()
+        return _default_cache
+
+
+def _cached_bank_encoding(content: bytes, cache: BankEncodingCache) -> Optional[str]:
+    """Find a cached encoding under which the file names the bank it is cached for."""
+    encodings = cache.snapshot()
+    probe = content[:BANK_PROBE_BYTES]
+    complete = len(content) <= BANK_PROBE_BYTES
+    for encoding in set(encodings.values()):
+        if not decodes_as(probe, encoding, complete):
+            continue
+        text = probe.decode(encoding, errors="ignore")
+        bank_name = detect_bank_name(text)
+        if bank_name is not None and encodings.get(bank_name) == encoding:
+            return encoding
+    return None
+
+
+def _detector_encoding(sample: bytes) -> Optional[str]:
+    """Run chardet's UniversalDetector over the sample until it is confident."""
+    from chardet import UniversalDetector
+
+    detector = UniversalDetector()
+    for start in range(0, len(sample), ENCODING_CHUNK_BYTES):
+        detector.feed(sample[start : start + ENCODING_CHUNK_BYTES])
+        if detector.done:
+            break
+    detector.close()
+    encoding = detector.result.get("encoding")
+    return encoding.lower() if encoding else None
+
+
+def detect_encoding(
+    content: bytes,
+    sample_bytes: int = CSV_ENCODING_SAMPLE_BYTES,
+    cache: Optional[BankEncodingCache] = None,
+) -> Tuple[str, str]:
+    """
+    Detect the encoding of a CSV file from its first sample_bytes.
+
+    Args:
+        content: Raw bytes of the file
+        sample_bytes: Bytes from the start of the file to look at
+        cache: Per-bank encoding cache (None skips the cache)
+
+    Returns:
+        (encoding, method) where method is "bom", "utf-8", "bank_cache",
+        "detector" or "fallback"
+    """
+    head = content[:4]
+    for bom, encoding in _BOMS:
+        if head.startswith(bom):
+            return encoding, "bom"
+
+    sample = content[:sample_bytes]
+    complete = len(content) <= sample_bytes
+    if decodes_as(sample, "utf-8", complete):
+        return "utf-8", "utf-8"
+
+    if cache is not None:
+        encoding = _cached_bank_encoding(content, cache)
+        if encoding is not None:
+            return encoding, "bank_cache"
+
+    try:
+        encoding = _detector_encoding(sample)
+    except ImportError:
+        # chardet not installed, try common encodings
+        for encoding in ["utf-16", "cp1251", "iso-8859-1"]:
+            if decodes_as(sample, encoding, complete):
+                return encoding, "fallback"
+        return "utf-8", "fallback"
+
+    # The sample is not UTF-8, so a Latin guess cannot be a misread UTF-8 file
+    if encoding is None or not decodes_as(sample, encoding, complete):
+        return "utf-8", "fallback"
+    return encoding, "detector"
@@ -3,17 +3,26 @@ Excel parser for xlsx and xls files.
 Uses openpyxl for xlsx and xlrd for xls files.
 """
 
-import io
+import time
 from typing import Optional
 
-from .base import BaseParser, ParseResult
+from .base import (
+    PREVIEW_MAX_PAGES,
+    PREVIEW_MAX_ROWS,
+    PREVIEW_SAMPLE_SIZE,
+    BaseParser,
+    ParseResult,
+)
+from .instrumentation import ParseTimer
+from .mapped_file import FileContent, MappedFile, file_source
+from .tabular import TabularTransactionExtractor
 
 
 class ExcelParser(BaseParser):
     """Parser for Excel bank statements (xlsx and xls formats)."""
 
-    async def parse(
-        self, file_content: bytes, filename: str, max_chars: int = 50000
+    def parse(
+        self, file_content: FileContent, filename: str, max_chars: int = 50000
     ) -> ParseResult:
         """
         Extract text from an Excel file.
@@ -29,9 +38,9 @@ class ExcelParser(BaseParser):
         ext = filename.lower().split(".")[-1]
 
         if ext == "xlsx":
-            return await self._parse_xlsx(file_content, filename, max_chars)
+            return self._parse_xlsx(file_content, filename, max_chars)
         elif ext == "xls":
-            return await self._parse_xls(file_content, filename, max_chars)
+            return self._parse_xls(file_content, filename, max_chars)
         else:
             return ParseResult(
                 success=False,
@@ -39,147 +48,458 @@ class ExcelParser(BaseParser):
                 error=f"Дэмжигдээгүй Excel формат: {ext}",
             )
 
-    async def _parse_xlsx(
-        self, file_content: bytes, filename: str, max_chars: int
+    def preview(
+        self,
+        file_content: FileContent,
+        filename: str,
+        max_pages: int = PREVIEW_MAX_PAGES,
+        max_rows: int = PREVIEW_MAX_ROWS,
+        sample_size: int = PREVIEW_SAMPLE_SIZE,
     ) -> ParseResult:
-        """Parse xlsx files using openpyxl."""
+        """
+        Read only the first rows of the first non-empty sheet (see BaseParser.preview).
+
+        Returns:
+            ParseResult with the rows' text, sample transactions and metadata
+            (sheets, bank_name, header, column_map)
+        """
+        ext = filename.lower().split(".")[-1]
+
+        if ext == "xlsx":
+            return self._preview_xlsx(file_content, filename, max_rows, sample_size)
+        elif ext == "xls":
+            return self._preview_xls(file_content, filename, max_rows, sample_size)
+        else:
+            return ParseResult(
+                success=False,
+                raw_text="",
+                error=f"Дэмжигдээгүй Excel формат: {ext}",
+            )
+
+    @staticmethod
+    def _xlsx_rows(sheet):
+        """
+        Row values of a read-only sheet, as a fully loaded sheet gives them.
+
+        Read-only sheets trust the stored <dimension>, which some exporters
+        leave stale (e.g. "A1"), and would drop every row and column past
+        it; the sheet is read to its actual end instead, with rows padded to
+        the stored width as before.
+        """
+        width = sheet.max_column or 0
+        sheet.reset_dimensions()
+        for row in sheet.iter_rows(values_only=True):
+            if len(row) < width:
+                row = row + (None,) * (width - len(row))
+            yield row
+
+    def _preview_rows(self, rows, max_rows: int) -> list[list[str]]:
+        """Take up to max_rows non-empty rows as cell strings."""
+        preview_rows = []
+        for row in rows:
+            if len(preview_rows) >= max_rows:
+                break
+            cells = [
+                str(cell).strip() if cell is not None and cell != "" else ""
+                for cell in row
+            ]
+            if any(cells):
+                preview_rows.append(cells)
+        return preview_rows
+
+    def _build_sheet_preview(
+        self,
+        rows: list[list[str]],
+        sheets: list[str],
+        ext: str,
+        filename: str,
+        sample_size: int,
+    ) -> ParseResult:
+        """Build the preview result for rows read from one sheet."""
+        text = "\n".join("\t".join(row) for row in rows).strip()
+        if not text:
+            return ParseResult(
+                success=False,
+                raw_text="",
+                error="Excel файлаас өгөгдөл олдсонгүй.",
+            )
+        return self._build_preview(
+            [rows],
+            text,
+            {
+                "sheets": sheets,
+                "rows": len(rows),
+                "bank_name": self.detect_bank(text),
+                "format": ext,
+                "filename": filename,
+            },
+            sample_size,
+        )
+
+    def _preview_xlsx(
+        self, file_content: FileContent, filename: str, max_rows: int, sample_size: int
+    ) -> ParseResult:
+        """Preview xlsx files with a read-only (lazy) openpyxl workbook."""
         try:
             from openpyxl import load_workbook
 
-            workbook = load_workbook(io.BytesIO(file_content), data_only=True)
-            text_parts = []
-            total_chars = 0
-            total_rows = 0
+            workbook = load_workbook(
+                file_source(file_content), read_only=True, data_only=True
+            )
+            try:
+                rows = []
+                for sheet_name in workbook.sheetnames:
+                    rows = self._preview_rows(
+                        self._xlsx_rows(workbook[sheet_name]), max_rows
+                    )
+                    if rows:
+                        break
+                sheets = workbook.sheetnames
+            finally:
+                workbook.close()
 
-            for sheet_name in workbook.sheetnames:
-                sheet = workbook[sheet_name]
-                text_parts.append(f"\n--- {sheet_name} ---\n")
+            return self._build_sheet_preview(
+                rows, sheets, "xlsx", filename, sample_size
+            )
 
-                for row in sheet.iter_rows(values_only=True):
-                    if total_chars >= max_chars:
-                        text_parts.append("\n\n[Текст хэт урт тул товчилсон...]")
+        except ImportError:
+            return ParseResult(
+                success=False,
+                raw_text="",
+                error="openpyxl санг суулгаагүй байна. pip install openpyxl",
+            )
+        except Exception as e:
+            return ParseResult(
+                success=False,
+                raw_text="",
+                error=f"Excel файл уншихад алдаа гарлаа: {str(e)}",
+            )
+
+    def _preview_xls(
+        self, file_content: FileContent, filename: str, max_rows: int, sample_size: int
+    ) -> ParseResult:
+        """Preview xls files, loading sheets on demand with xlrd."""
+        try:
+            workbook = self._open_xls(file_content)
+            try:
+                rows = []
+                for sheet_idx in range(workbook.nsheets):
+                    sheet = workbook.sheet_by_index(sheet_idx)
+                    rows = self._preview_rows(
+                        (sheet.row_values(row_idx) for row_idx in range(sheet.nrows)),
+                        max_rows,
+                    )
+                    workbook.unload_sheet(sheet_idx)
+                    if rows:
                         break
+                sheets = workbook.sheet_names()
+            finally:
+                workbook.release_resources()
 
-                    # Skip completely empty rows
-                    if all(cell is None for cell in row):
-                        continue
+            return self._build_sheet_preview(rows, sheets, "xls", filename, sample_size)
 
-                    row_text = "\t".join(
-                        str(cell).strip() if cell is not None else "" for cell in row
-                    )
-                    if row_text.strip():
-                        text_parts.append(row_text)
-                        total_chars += len(row_text)
-                        total_rows += 1
+        except ImportError:
+            return ParseResult(
+                success=False,
+                raw_text="",
+                error="xlrd санг суулгаагүй байна. pip install xlrd",
+            )
+        except Exception as e:
+            return ParseResult(
+                success=False,
+                raw_text="",
+                error=f"Excel файл уншихад алдаа гарлаа: {str(e)}",
+            )
+
+    def _parse_xlsx(
+        self, file_content: FileContent, filename: str, max_chars: int
+    ) -> ParseResult:
+        """
+        Parse xlsx files using openpyxl.
 
-                if total_chars >= max_chars:
-                    break
+        The workbook is opened read-only, so rows are streamed from the sheet
+        XML instead of building every cell object up front, and reading stops
+        as soon as max_chars is reached.
+        """
+        timer = ParseTimer("xlsx")
+        try:
+            from openpyxl import load_workbook
+
+            with timer.stage("load"):
+                workbook = load_workbook(
+                    file_source(file_content), read_only=True, data_only=True
+                )
+            text_parts = []
+            total_chars = 0
+            total_rows = 0
+            truncated = False
+            extractor = TabularTransactionExtractor(self)
+
+            rows_start = time.perf_counter()
+            try:
+                sheets = workbook.sheetnames
+                for sheet_name in sheets:
+                    sheet = workbook[sheet_name]
+                    extractor.start_sheet()
+                    if not truncated:
+                        text_parts.append(f"\n--- {sheet_name} ---\n")
+
+                    for row in self._xlsx_rows(sheet):
+                        if total_chars >= max_chars:
+                            if not truncated:
+                                text_parts.append(
+                                    "\n\n[Текст хэт урт тул товчилсон...]"
+                                )
+                                truncated = True
+                            # Past the text limit, read on only for transactions
+                            if not extractor.wants_rows():
+                                break
+
+                        # Skip completely empty rows
+                        if all(cell is None for cell in row):
+                            continue
+
+                        extractor.feed(row)
+                        if truncated:
+                            continue
+
+                        row_text = "\t".join(
+                            str(cell).strip() if cell is not None else ""
+                            for cell in row
+                        )
+                        if row_text.strip():
+                            text_parts.append(row_text)
+                            total_chars += len(row_text)
+                            total_rows += 1
+            finally:
+                # Read-only workbooks keep the zip archive open until closed
+                workbook.close()
 
             full_text = "\n".join(text_parts).strip()
+            timer.add("rows", time.perf_counter() - rows_start)
 
             if not full_text:
+                timer.finish()
                 return ParseResult(
                     success=False,
                     raw_text="",
                     error="Excel файлаас өгөгдөл олдсонгүй.",
                 )
 
-            bank_name = self.detect_bank(full_text)
+            with timer.stage("bank_detection"):
+                bank_name = self.detect_bank(full_text)
 
             return ParseResult(
                 success=True,
                 raw_text=full_text[:max_chars],
+                transactions=extractor.transactions,
                 metadata={
-                    "sheets": workbook.sheetnames,
+                    "sheets": sheets,
                     "rows": total_rows,
                     "bank_name": bank_name,
                     "format": "xlsx",
                     "filename": filename,
+                    "transactions_extracted": len(extractor.transactions),
+                    "column_maps": extractor.column_maps,
+                    "timings": timer.finish(),
                 },
             )
 
         except ImportError:
+            timer.finish()
             return ParseResult(
                 success=False,
                 raw_text="",
                 error="openpyxl санг суулгаагүй байна. pip install openpyxl",
             )
         except Exception as e:
+            timer.finish()
             return ParseResult(
                 success=False,
                 raw_text="",
                 error=f"Excel файл уншихад алдаа гарлаа: {str(e)}",
             )
 
-    async def _parse_xls(
-        self, file_content: bytes, filename: str, max_chars: int
-    ) -> ParseResult:
-        """Parse xls files using xlrd."""
-        try:
-            import xlrd
+    def _xls_typed_row(self, row: list, types, workbook) -> list:
+        """Convert xlrd date cells (stored as day-number floats) to datetimes."""
+        import xlrd
+
+        typed = list(row)
+        for idx, cell_type in enumerate(types):
+            if cell_type == xlrd.XL_CELL_DATE:
+                try:
+                    typed[idx] = xlrd.xldate_as_datetime(row[idx], workbook.datemode)
+                except Exception:
+                    pass
+        return typed
+
+    def _extract_xls_columns(
+        self,
+        sheet,
+        start_row: int,
+        extractor: TabularTransactionExtractor,
+        workbook,
+    ) -> None:
+        """
+        Add the transactions in rows start_row.. of a sheet whose header is known.
 
-            workbook = xlrd.open_workbook(file_contents=file_content)
-            text_parts = []
-            total_chars = 0
-            total_rows = 0
+        Reads only the mapped columns (and the first one, for summary rows)
+        column by column, instead of every cell of every row. Rows with an
+        empty description cell are read in full, because their description
+        is built from the other cells.
+        """
+        col_map = extractor.col_map
+        if "description" not in col_map:
+            columns = list(range(sheet.ncols))
+        else:
+            columns = sorted(set(col_map.values()) | {0})
+        position = {col: idx for idx, col in enumerate(columns)}
+        compact_map = {name: position[col] for name, col in col_map.items()}
+
+        values = [
+            self._xls_typed_row(
+                sheet.col_values(col, start_row),
+                sheet.col_types(col, start_row),
+                workbook,
+            )
+            for col in columns
+        ]
+        description_idx = compact_map.get("description")
+        for offset, row in enumerate(zip(*values)):
+            if description_idx is not None and not row[description_idx]:
+                row_idx = start_row + offset
+                row = self._xls_typed_row(
+                    sheet.row_values(row_idx), sheet.row_types(row_idx), workbook
+                )
+                if any(cell != "" and cell is not None for cell in row):
+                    self._add_table_row(extractor.transactions, row, col_map)
+                continue
+            self._add_table_row(extractor.transactions, row, compact_map)
 
-            for sheet_idx in range(workbook.nsheets):
-                sheet = workbook.sheet_by_index(sheet_idx)
-                text_parts.append(f"\n--- {sheet.name} ---\n")
+    def _open_xls(self, file_content: FileContent):
+        """
+        Open an xls workbook with sheets loaded on demand.
 
-                for row_idx in range(sheet.nrows):
-                    if total_chars >= max_chars:
-                        text_parts.append("\n\n[Текст хэт урт тул товчилсон...]")
-                        break
+        A mapped file is opened by path: xlrd maps it itself, and closes the
+        map it was given when its resources are released.
+        """
+        import xlrd
 
-                    row = sheet.row_values(row_idx)
-                    # Skip completely empty rows
-                    if all(cell == "" or cell is None for cell in row):
-                        continue
+        if isinstance(file_content, MappedFile):
+            return xlrd.open_workbook(file_content.path, on_demand=True)
+        return xlrd.open_workbook(file_contents=file_content, on_demand=True)
 
-                    row_text = "\t".join(
-                        str(cell).strip() if cell else "" for cell in row
-                    )
-                    if row_text.strip():
-                        text_parts.append(row_text)
-                        total_chars += len(row_text)
-                        total_rows += 1
+    def _parse_xls(
+        self, file_content: FileContent, filename: str, max_chars: int
+    ) -> ParseResult:
+        """
+        Parse xls files using xlrd.
 
-                if total_chars >= max_chars:
-                    break
+        Sheets are loaded on demand and unloaded once read, so only one sheet
+        is held in memory at a time. Past max_chars a sheet is read further
+        only if a statement header was found in it, and then only its mapped
+        columns (see _extract_xls_columns).
+        """
+        timer = ParseTimer("xls")
+        try:
+            with timer.stage("load"):
+                workbook = self._open_xls(file_content)
+            text_parts = []
+            total_chars = 0
+            total_rows = 0
+            truncated = False
+            extractor = TabularTransactionExtractor(self)
+
+            rows_start = time.perf_counter()
+            try:
+                sheets = workbook.sheet_names()
+                for sheet_idx in range(workbook.nsheets):
+                    sheet = workbook.sheet_by_index(sheet_idx)
+                    extractor.start_sheet()
+                    if not truncated:
+                        text_parts.append(f"\n--- {sheet.name} ---\n")
+
+                    for row_idx in range(sheet.nrows):
+                        if total_chars >= max_chars:
+                            if not truncated:
+                                text_parts.append(
+                                    "\n\n[Текст хэт урт тул товчилсон...]"
+                                )
+                                truncated = True
+                            # Past the text limit, read on only for transactions
+                            if extractor.col_map is not None:
+                                self._extract_xls_columns(
+                                    sheet, row_idx, extractor, workbook
+                                )
+                                break
+                            if not extractor.wants_rows():
+                                break
+
+                        row = sheet.row_values(row_idx)
+                        # Skip completely empty rows
+                        if all(cell == "" or cell is None for cell in row):
+                            continue
+
+                        if extractor.wants_rows():
+                            extractor.feed(
+                                self._xls_typed_row(
+                                    row, sheet.row_types(row_idx), workbook
+                                )
+                            )
+                        if truncated:
+                            continue
+
+                        row_text = "\t".join(
+                            str(cell).strip() if cell else "" for cell in row
+                        )
+                        if row_text.strip():
+                            text_parts.append(row_text)
+                            total_chars += len(row_text)
+                            total_rows += 1
+
+                    workbook.unload_sheet(sheet_idx)
+            finally:
+                workbook.release_resources()
 
             full_text = "\n".join(text_parts).strip()
+            timer.add("rows", time.perf_counter() - rows_start)
 
             if not full_text:
+                timer.finish()
                 return ParseResult(
                     success=False,
                     raw_text="",
                     error="Excel файлаас өгөгдөл олдсонгүй.",
                 )
 
-            bank_name = self.detect_bank(full_text)
+            with timer.stage("bank_detection"):
+                bank_name = self.detect_bank(full_text)
 
             return ParseResult(
                 success=True,
                 raw_text=full_text[:max_chars],
+                transactions=extractor.transactions,
                 metadata={
-                    "sheets": [
-                        workbook.sheet_by_index(i).name for i in range(workbook.nsheets)
-                    ],
+                    "sheets": sheets,
                     "rows": total_rows,
                     "bank_name": bank_name,
                     "format": "xls",
                     "filename": filename,
+                    "transactions_extracted": len(extractor.transactions),
+                    "column_maps": extractor.column_maps,
+                    "timings": timer.finish(),
                 },
             )
 
         except ImportError:
+            timer.finish()
             return ParseResult(
                 success=False,
                 raw_text="",
                 error="xlrd санг суулгаагүй байна. pip install xlrd",
             )
         except Exception as e:
+            timer.finish()
             return ParseResult(
                 success=False,
                 raw_text="",
@@ -0,0 +1,94 @@
+"""
+Bounded executor for running CPU-bound parsers off the asyncio event loop.
+"""
+
+import asyncio
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Parse threads, extra parses allowed to wait for a thread, and the
+# Retry-After hint (seconds) returned to clients when the queue is full.
+PARSE_WORKERS = int(os.environ.get("PARSE_WORKERS", "2"))
+PARSE_QUEUE_DEPTH = int(os.environ.get("PARSE_QUEUE_DEPTH", "8"))
+PARSE_RETRY_AFTER = int(os.environ.get("PARSE_RETRY_AFTER", "5"))
+
+
+class ParserBusyError(Exception):
+    """Raised when the parse executor is saturated and cannot accept more work."""
+
+    def __init__(self, retry_after: int = PARSE_RETRY_AFTER):
+        super().__init__("Parse executor queue is full")
+        self.retry_after = retry_after
+
+
+class ParseExecutor:
+    """
+    Thread pool with a hard limit on running + queued parse jobs.
+
+    Submissions beyond max_workers + max_queue fail fast with ParserBusyError
+    instead of piling up, so the event loop keeps serving other requests.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = PARSE_WORKERS,
+        max_queue: int = PARSE_QUEUE_DEPTH,
+        retry_after: int = PARSE_RETRY_AFTER,
+    ):
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max(0, max_queue)
+        self.retry_after = retry_after
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="parser"
+        )
+        self._slots = threading.BoundedSemaphore(self.max_workers + self.max_queue)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+
+    @property
+    def in_flight(self) -> int:
+        """Number of running plus queued parse jobs."""
+        return self._in_flight
+
+    async def run(self, fn: Callable[..., T], *args: Any) -> T:
+        """
+        Run fn(*args) on a parse thread and await its result.
+
+        Raises:
+            ParserBusyError: If the executor is already at capacity
+        """
+        if not self._slots.acquire(blocking=False):
+            logger.warning(
+                f"[Parse Executor] Rejecting job: {self._in_flight} jobs in flight"
+            )
+            raise ParserBusyError(self.retry_after)
+
+        with self._lock:
+            self._in_flight += 1
+
+        try:
+            future = self._executor.submit(fn, *args)
+        except BaseException:
+            self._release()
+            raise
+
+        # Release the slot when the job finishes, not when the awaiting request
+        # goes away, so cancelled requests still count until their thread is free.
+        future.add_done_callback(lambda _: self._release())
+        return await asyncio.wrap_future(future)
+
+    def _release(self) -> None:
+        with self._lock:
+            self._in_flight -= 1
+        self._slots.release()
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop accepting work and shut down the parse threads."""
+        self._executor.shutdown(wait=wait, cancel_futures=True)
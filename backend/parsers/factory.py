@@ -2,12 +2,28 @@
 Parser factory for creating appropriate parser based on file format.
 """
 
+import asyncio
 from typing import Optional
 
-from .base import BaseParser, FileFormat, ParseResult
+from .base import (
+    PREVIEW_MAX_PAGES,
+    PREVIEW_MAX_ROWS,
+    PREVIEW_SAMPLE_SIZE,
+    BaseParser,
+    FileFormat,
+    ParseResult,
+)
 from .csv_parser import CsvParser
 from .excel_parser import ExcelParser
-from .pdf_parser import PdfParser
+from .executor import ParseExecutor
+from .mapped_file import FileContent
+from .pdf_parser import PdfParser, shutdown_process_pool
+from .result_cache import (
+    PARSE_CACHE_ENABLED,
+    ParseResultCache,
+    RemoteResultStore,
+    make_cache_key,
+)
 
 
 class ParserFactory:
@@ -23,6 +39,9 @@ class ParserFactory:
         FileFormat.CSV: CsvParser,
     }
 
+    _executor: Optional[ParseExecutor] = None
+    _result_cache: Optional[ParseResultCache] = None
+
     @classmethod
     def get_parser(cls, file_format: FileFormat) -> BaseParser:
         """
@@ -91,15 +110,152 @@ class ParserFactory:
             "application/csv",
         ]
 
+    @classmethod
+    def get_executor(cls) -> ParseExecutor:
+        """
+        Get the shared parse executor, creating it on first use.
+
+        Returns:
+            ParseExecutor that runs parsers off the event loop
+        """
+        if cls._executor is None:
+            cls._executor = ParseExecutor()
+        return cls._executor
+
+    @classmethod
+    def get_result_cache(cls) -> Optional[ParseResultCache]:
+        """
+        Get the shared parse result cache, creating it on first use.
+
+        Returns:
+            ParseResultCache, or None if PARSE_CACHE_ENABLED is off
+        """
+        if cls._result_cache is None and PARSE_CACHE_ENABLED:
+            cls._result_cache = ParseResultCache()
+        return cls._result_cache
+
+    @classmethod
+    def configure_result_cache(
+        cls, remote: Optional[RemoteResultStore] = None
+    ) -> None:
+        """
+        Attach a shared remote store (e.g. Postgres) behind the disk cache.
+
+        Args:
+            remote: Store shared by all app instances
+        """
+        if PARSE_CACHE_ENABLED:
+            cls._result_cache = ParseResultCache(remote=remote)
+
+    @classmethod
+    def shutdown(cls) -> None:
+        """Shut down the parse executor and the PDF page process pool."""
+        if cls._executor is not None:
+            cls._executor.shutdown()
+            cls._executor = None
+        shutdown_process_pool()
+
     @classmethod
     async def parse_file(
-        cls, file_content: bytes, filename: str, max_chars: int = 50000
+        cls,
+        file_content: FileContent,
+        filename: str,
+        max_chars: int = 50000,
+        sha256: Optional[str] = None,
+    ) -> ParseResult:
+        """
+        Parse a file on the bounded parse executor.
+
+        The parsers are CPU-bound and synchronous, so they never run on the
+        event loop itself. Files seen before are served from the parse result
+        cache without running a parser.
+
+        Args:
+            file_content: Raw bytes of the file, or a MappedFile of it
+            filename: Original filename
+            max_chars: Maximum characters to extract
+            sha256: Hex SHA-256 of the file if already known (e.g. computed
+                while spooling the upload), so it is not hashed again
+
+        Returns:
+            ParseResult with extracted data
+
+        Raises:
+            ParserBusyError: If the parse queue is full
+        """
+        file_format = cls.detect_format(filename)
+        cache = cls.get_result_cache() if file_format else None
+        if cache is None:
+            return await cls.get_executor().run(
+                cls.parse_file_sync, file_content, filename, max_chars
+            )
+
+        if sha256 is not None:
+            key = make_cache_key(file_content, file_format, max_chars, sha256)
+        else:
+            key = await asyncio.to_thread(
+                make_cache_key, file_content, file_format, max_chars
+            )
+        cached = await cache.get(key)
+        if cached is not None:
+            cached.metadata["filename"] = filename
+            return cached
+
+        result = await cls.get_executor().run(
+            cls.parse_file_sync, file_content, filename, max_chars
+        )
+        await cache.set(key, result)
+        result.metadata["parse_cache"] = "miss"
+        return result
+
+    @classmethod
+    async def preview_file(
+        cls,
+        file_content: FileContent,
+        filename: str,
+        max_pages: int = PREVIEW_MAX_PAGES,
+        max_rows: int = PREVIEW_MAX_ROWS,
+        sample_size: int = PREVIEW_SAMPLE_SIZE,
+    ) -> ParseResult:
+        """
+        Preview the start of a file on the parse executor (see BaseParser.preview).
+
+        Args:
+            file_content: Raw bytes of the file, or a MappedFile of it
+            filename: Original filename
+            max_pages: PDF pages to read
+            max_rows: Spreadsheet/CSV rows to read
+            sample_size: Maximum number of sample transactions
+
+        Returns:
+            ParseResult with preview data
+
+        Raises:
+            ParserBusyError: If the parse queue is full
+        """
+        file_format = cls.detect_format(filename)
+        if not file_format:
+            ext = filename.split(".")[-1] if "." in filename else "unknown"
+            return ParseResult(
+                success=False,
+                raw_text="",
+                error=f"Дэмжигдээгүй файлын формат: .{ext}. Дэмжигдэх форматууд: PDF, Excel (xlsx, xls), CSV",
+            )
+
+        parser = cls.get_parser(file_format)
+        return await cls.get_executor().run(
+            parser.preview, file_content, filename, max_pages, max_rows, sample_size
+        )
+
+    @classmethod
+    def parse_file_sync(
+        cls, file_content: FileContent, filename: str, max_chars: int = 50000
     ) -> ParseResult:
         """
         Parse a file by detecting its format and using the appropriate parser.
 
         Args:
-            file_content: Raw bytes of the file
+            file_content: Raw bytes of the file, or a MappedFile of it
             filename: Original filename
             max_chars: Maximum characters to extract
 
@@ -116,4 +272,4 @@ class ParserFactory:
             )
 
         parser = cls.get_parser(file_format)
-        return await parser.parse(file_content, filename, max_chars)
+        return parser.parse(file_content, filename, max_chars)
@@ -0,0 +1,191 @@
+"""
+Per-stage timing and memory instrumentation for the parsers.
+
+Each parse records its stages in a ParseTimer, which ends up in
+ParseResult.metadata["timings"] and in the process-wide TimingHistograms.
+"""
+
+import bisect
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Any, Iterator, Optional
+
+# Trace peak Python memory per parse (tracemalloc slows parsing down a lot)
+PARSE_TRACE_MEMORY = os.environ.get("PARSE_TRACE_MEMORY", "false").lower() == "true"
+
+# Upper bounds (seconds) of the histogram buckets; the last bucket is +Inf
+HISTOGRAM_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0)
+
+
+class TimingHistograms:
+    """Process-wide latency histograms, one per parser stage."""
+
+    def __init__(self, buckets: tuple[float, ...] = HISTOGRAM_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._metrics: dict[str, dict[str, Any]] = {}
+
+    def observe(self, metric: str, seconds: float) -> None:
+        """Record one observation of a metric."""
+        idx = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            data = self._metrics.get(metric)
+            if data is None:
+                data = {"count": 0, "sum": 0.0, "counts": [0] * (len(self.buckets) + 1)}
+                self._metrics[metric] = data
+            data["count"] += 1
+            data["sum"] += seconds
+            data["counts"][idx] += 1
+
+    def snapshot(self) -> dict[str, dict[str, Any]]:
+        """Get all histograms with cumulative bucket counts."""
+        labels = [str(bound) for bound in self.buckets] + ["+Inf"]
+        with self._lock:
+            result = {}
+            for metric, data in sorted(self._metrics.items()):
+                cumulative = 0
+                buckets = {}
+                for label, count in zip(labels, data["counts"]):
+                    cumulative += count
+                    buckets[label] = cumulative
+                result[metric] = {
+                    "count": data["count"],
+                    "sum": round(data["sum"], 6),
+                    "buckets": buckets,
+                }
+            return result
+
+
+_histograms = TimingHistograms()
+
+
+def get_timing_histograms() -> TimingHistograms:
+    """Get the shared process-wide histogram registry."""
+    return _histograms
+
+
+# tracemalloc is process-wide, so concurrent parses share one tracing session
+_memory_lock = threading.Lock()
+_memory_users = 0
+
+
+class ParseTimer:
+    """
+    Collects stage timings (and optionally peak traced memory) for one parse.
+
+    Stages are named phases such as "open", "table_strategies" or
+    "bank_detection"; repeated stages add up. Per-page details are kept
+    separately for PDFs.
+    """
+
+    def __init__(self, parser_name: str, trace_memory: bool = PARSE_TRACE_MEMORY):
+        self.parser_name = parser_name
+        self.trace_memory = trace_memory
+        self.stages: dict[str, dict[str, float]] = {}
+        self.pages: list[dict[str, Any]] = []
+        self._start = time.perf_counter()
+        self._memory_start: Optional[int] = None
+        if trace_memory:
+            self._start_memory()
+
+    def _start_memory(self) -> None:
+        global _memory_users
+
+        with _memory_lock:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            if _memory_users == 0:
+                tracemalloc.reset_peak()
+            _memory_users += 1
+            self._memory_start = tracemalloc.get_traced_memory()[0]
+
+    def _stop_memory(self) -> Optional[int]:
+        global _memory_users
+
+        with _memory_lock:
+            if self._memory_start is None:
+                return None
+            peak = tracemalloc.get_traced_memory()[1] - self._memory_start
+            _memory_users -= 1
+            if _memory_users == 0:
+                tracemalloc.stop()
+            self._memory_start = None
+            return max(peak, 0)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Time a block as one call of a stage."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def add(self, name: str, seconds: float, calls: int = 1) -> None:
+        """Add time spent in a stage."""
+        stage = self.stages.get(name)
+        if stage is None:
+            self.stages[name] = {"seconds": seconds, "calls": calls}
+        else:
+            stage["seconds"] += seconds
+            stage["calls"] += calls
+
+    def add_page(self, page_num: int, timings: dict[str, Any]) -> None:
+        """
+        Record the timings of one PDF page.
+
+        Args:
+            page_num: Zero-based page number
+            timings: {"seconds", "snapshot", "strategies": {index: seconds},
+                "text_fallback"}
+        """
+        if "snapshot" in timings:
+            self.add("page_snapshot", timings["snapshot"])
+        strategies = timings.get("strategies", {})
+        for seconds in strategies.values():
+            self.add("table_strategies", seconds)
+        if "text_fallback" in timings:
+            self.add("text_fallback", timings["text_fallback"])
+        self.pages.append(
+            {
+                "page": page_num + 1,
+                "seconds": round(timings.get("seconds", 0.0), 4),
+                "snapshot": round(timings.get("snapshot", 0.0), 4),
+                "strategies": {
+                    str(idx): round(seconds, 4) for idx, seconds in strategies.items()
+                },
+                "text_fallback": round(timings.get("text_fallback", 0.0), 4),
+            }
+        )
+        _histograms.observe(f"{self.parser_name}.page", timings.get("seconds", 0.0))
+
+    def finish(self) -> dict[str, Any]:
+        """
+        Stop timing, feed the histograms and build metadata["timings"].
+
+        Returns:
+            {"total", "stages": {name: {"seconds", "calls"}}, "pages",
+            "peak_memory_bytes"}
+        """
+        total = time.perf_counter() - self._start
+        peak = self._stop_memory() if self.trace_memory else None
+
+        _histograms.observe(f"{self.parser_name}.total", total)
+        for name, stage in self.stages.items():
+            _histograms.observe(f"{self.parser_name}.{name}", stage["seconds"])
+
+        timings: dict[str, Any] = {
+            "total": round(total, 4),
+            "stages": {
+                name: {"seconds": round(stage["seconds"], 4), "calls": stage["calls"]}
+                for name, stage in self.stages.items()
+            },
+        }
+        if self.pages:
+            timings["pages"] = self.pages
+        if peak is not None:
+            timings["peak_memory_bytes"] = peak
+        return timings
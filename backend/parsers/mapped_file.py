@@ -0,0 +1,63 @@
+"""
+Memory-mapped files as parser input.
+
+Parsers take the file content as bytes; a MappedFile can be passed instead
+so that a spooled upload is never read into memory as a whole.
+"""
+
+import io
+import mmap
+from typing import BinaryIO, Union
+
+
+class MappedFile(mmap.mmap):
+    """
+    Read-only memory map of a file, usable wherever parsers take bytes.
+
+    Slicing, len() and the buffer protocol (hashlib, codecs, xlrd) work as on
+    bytes, with pages read from the OS page cache on demand. Pickling sends
+    only the path, so the PDF page pool's workers map the file themselves.
+    """
+
+    def __new__(cls, path: str):
+        with open(path, "rb") as f:
+            mapped = super().__new__(cls, f.fileno(), 0, access=mmap.ACCESS_READ)
+        mapped.path = path
+        return mapped
+
+    def __reduce__(self):
+        return (MappedFile, (self.path,))
+
+    def open(self) -> BinaryIO:
+        """Open the file for reading, with a position of its own."""
+        return open(self.path, "rb")
+
+
+FileContent = Union[bytes, MappedFile]
+
+
+def map_file(path: str) -> FileContent:
+    """Map a file read-only (an empty file, which mmap rejects, gives b"")."""
+    try:
+        return MappedFile(path)
+    except ValueError:
+        return b""
+
+
+def open_content(file_content: FileContent) -> BinaryIO:
+    """File object over the content (the caller closes it)."""
+    if isinstance(file_content, MappedFile):
+        return file_content.open()
+    return io.BytesIO(file_content)
+
+
+def file_source(file_content: FileContent) -> Union[str, BinaryIO]:
+    """
+    Argument for libraries that take a path or a file object (pdfplumber,
+    openpyxl): the path of a mapped file, which the library then opens and
+    closes itself, or a BytesIO over bytes. openpyxl checks the extension of
+    a path, so mapped files keep the upload's extension (see uploads.py).
+    """
+    if isinstance(file_content, MappedFile):
+        return file_content.path
+    return io.BytesIO(file_content)
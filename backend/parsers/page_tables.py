@@ -0,0 +1,177 @@
+"""
+Table extraction engine that evaluates several pdfplumber table strategies
+on a single geometry snapshot of a page.
+"""
+
+from bisect import bisect_left
+from typing import Any, List, Optional
+
+from pdfplumber import utils
+from pdfplumber.table import (
+    Table,
+    TableFinder,
+    TableSettings,
+    cells_to_tables,
+    edges_to_intersections,
+    intersections_to_cells,
+)
+
+from .time_budget import Deadline, DeadlineDict
+
+# Vertical edges intersected per step of a deadline-bounded intersection search
+INTERSECTION_CHUNK = 64
+
+# Extracted table: rows of cell strings (None for missing cells)
+ExtractedTable = List[List[Optional[str]]]
+
+
+class PageSnapshot:
+    """
+    One-time snapshot of the page geometry pdfplumber's table finder needs.
+
+    Duck-types the parts of a pdfplumber Page used by TableFinder (bbox,
+    edges, extract_words), so chars, edges and words are computed once per
+    page instead of once per strategy. Chars are also indexed by vertical
+    midpoint so table rows can be filled without scanning the whole page.
+    """
+
+    def __init__(self, page):
+        self.page = page
+        self.bbox = page.bbox
+        self.chars = page.chars
+        self.edges = page.edges
+        self._words: dict[tuple, list] = {}
+
+        mids = sorted(
+            ((char["top"] + char["bottom"]) / 2, idx)
+            for idx, char in enumerate(self.chars)
+        )
+        self._char_v_mids = [v_mid for v_mid, _ in mids]
+        self._char_order = [idx for _, idx in mids]
+
+    def extract_words(self, **kwargs: Any) -> list:
+        """Memoized page.extract_words (text strategies share the same words)."""
+        key = tuple(sorted((k, repr(v)) for k, v in kwargs.items()))
+        if key not in self._words:
+            self._words[key] = self.page.extract_words(**kwargs)
+        return self._words[key]
+
+    def chars_in_bbox(self, bbox) -> list:
+        """
+        Chars whose midpoint falls inside bbox, in original page order.
+
+        Same containment rule as pdfplumber's Table.extract.
+        """
+        x0, top, x1, bottom = bbox
+        lo = bisect_left(self._char_v_mids, top)
+        hi = bisect_left(self._char_v_mids, bottom, lo)
+        indices = []
+        for idx in self._char_order[lo:hi]:
+            char = self.chars[idx]
+            h_mid = (char["x0"] + char["x1"]) / 2
+            if x0 <= h_mid < x1:
+                indices.append(idx)
+        indices.sort()
+        return [self.chars[idx] for idx in indices]
+
+
+class PageTableEngine:
+    """
+    Evaluates table strategies against one PageSnapshot.
+
+    Produces the same output as page.extract_tables(settings), but strategies
+    that resolve to identical settings are only evaluated once.
+    """
+
+    def __init__(self, page):
+        self.snapshot = PageSnapshot(page)
+        self._results: dict[str, List[ExtractedTable]] = {}
+
+    def extract_tables(
+        self, settings: dict, deadline: Optional[Deadline] = None
+    ) -> List[ExtractedTable]:
+        """
+        Find and extract all tables on the page for the given settings.
+
+        Raises:
+            BudgetExceeded: If deadline passes before the tables are found
+        """
+        tset = TableSettings.resolve(settings)
+        key = repr(tset)
+        if key not in self._results:
+            if deadline is None:
+                tables = TableFinder(self.snapshot, tset).tables
+            else:
+                tables = self._find_tables(tset, deadline)
+            text_settings = tset.text_settings or {}
+            self._results[key] = [
+                self._extract_table(table, text_settings) for table in tables
+            ]
+        return self._results[key]
+
+    def _find_tables(self, tset: TableSettings, deadline: Deadline) -> List[Table]:
+        """
+        Same steps as TableFinder, checking the deadline along the way.
+
+        Intersections are found a chunk of vertical edges at a time and the
+        cell search looks points up in a DeadlineDict, so even pages with
+        thousands of edges stop close to the deadline.
+        """
+        finder = TableFinder.__new__(TableFinder)
+        finder.page = self.snapshot
+        finder.settings = tset
+        edges = finder.get_edges()
+        deadline.check()
+
+        v_edges = sorted(
+            (edge for edge in edges if edge["orientation"] == "v"),
+            key=lambda edge: (edge["x0"], edge["top"]),
+        )
+        h_edges = [edge for edge in edges if edge["orientation"] == "h"]
+        intersections: dict = {}
+        for start in range(0, len(v_edges), INTERSECTION_CHUNK):
+            chunk = edges_to_intersections(
+                v_edges[start : start + INTERSECTION_CHUNK] + h_edges,
+                tset.intersection_x_tolerance,
+                tset.intersection_y_tolerance,
+            )
+            for vertex, touching in chunk.items():
+                if vertex in intersections:
+                    intersections[vertex]["v"].extend(touching["v"])
+                    intersections[vertex]["h"].extend(touching["h"])
+                else:
+                    intersections[vertex] = touching
+            deadline.check()
+
+        cells = intersections_to_cells(DeadlineDict(intersections, deadline))
+        deadline.check()
+        return [Table(self.snapshot, group) for group in cells_to_tables(cells)]
+
+    def _extract_table(self, table: Table, text_settings: dict) -> ExtractedTable:
+        """Equivalent of Table.extract using the snapshot's char index."""
+        table_arr = []
+        for row in table.rows:
+            row_chars = self.snapshot.chars_in_bbox(row.bbox)
+            arr = []
+            for cell in row.cells:
+                if cell is None:
+                    arr.append(None)
+                    continue
+                x0, top, x1, bottom = cell
+                cell_chars = [
+                    char
+                    for char in row_chars
+                    if x0 <= (char["x0"] + char["x1"]) / 2 < x1
+                    and top <= (char["top"] + char["bottom"]) / 2 < bottom
+                ]
+                if not cell_chars:
+                    arr.append("")
+                    continue
+                kwargs = dict(text_settings)
+                if "layout" in kwargs:
+                    kwargs["layout_width"] = x1 - x0
+                    kwargs["layout_height"] = bottom - top
+                    kwargs["layout_bbox"] = cell
+                arr.append(utils.extract_text(cell_chars, **kwargs))
+            table_arr.append(arr)
+        return table_arr
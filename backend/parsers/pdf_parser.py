@@ -5,30 +5,252 @@ Optimized for bank statement PDFs with tabular data.
 
 from __future__ import annotations
 
-import io
 import logging
+import math
+import multiprocessing
+import os
 import re
-from datetime import datetime
-from typing import List, Optional
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from itertools import islice
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Tuple
 
 import pdfplumber
 
-from .base import BaseParser, ParsedTransaction, ParseResult
+from .bank_detection import detect_bank_from_metadata
+from .base import (
+    PREVIEW_MAX_PAGES,
+    PREVIEW_MAX_ROWS,
+    PREVIEW_SAMPLE_SIZE,
+    BaseParser,
+    ParsedTransaction,
+    ParseResult,
+    TransactionBatch,
+)
+from .instrumentation import ParseTimer
+from .mapped_file import FileContent, file_source
+from .page_tables import PageTableEngine
+from .pdfium_text import PdfiumTextEngine
+from .strategy_cache import StrategyOrder, get_strategy_cache, page_layout_key
+from .time_budget import (
+    PDF_DOCUMENT_TIME_BUDGET,
+    PDF_PAGE_TIME_BUDGET,
+    BudgetExceeded,
+    Deadline,
+)
 
 logger = logging.getLogger(__name__)
 
+# Different table extraction strategies for different bank formats
+TABLE_SETTINGS_LIST = [
+    # Strategy 1: Default settings
+    {},
+    # Strategy 2: Explicit line detection (good for TDB)
+    {
+        "vertical_strategy": "lines",
+        "horizontal_strategy": "lines",
+    },
+    # Strategy 3: Text-based detection
+    {
+        "vertical_strategy": "text",
+        "horizontal_strategy": "text",
+    },
+    # Strategy 4: Lines + text hybrid
+    {
+        "vertical_strategy": "lines",
+        "horizontal_strategy": "text",
+    },
+    # Strategy 5: Relaxed tolerance
+    {
+        "snap_tolerance": 5,
+        "join_tolerance": 5,
+    },
+]
+
+# Page-parallel extraction: number of worker processes (0 or 1 disables it)
+# and the minimum page count before the process pool is used.
+PDF_PARALLEL_WORKERS = int(
+    os.environ.get("PDF_PARALLEL_WORKERS", min(4, os.cpu_count() or 1))
+)
+PDF_PARALLEL_MIN_PAGES = int(os.environ.get("PDF_PARALLEL_MIN_PAGES", "20"))
+
+# Run every transaction extractor and keep the best result, instead of only
+# the one the extraction planner picks for the statement layout.
+PDF_EXTRACTION_EXHAUSTIVE = (
+    os.environ.get("PDF_EXTRACTION_EXHAUSTIVE", "false").lower() == "true"
+)
+
+# Text engine for pages where no table strategy finds data rows: "pdfplumber"
+# (layout text) or "pdfium" (pypdfium2, much faster but without the column
+# alignment spaces). PDF_PDFIUM_TEXT_BANKS lists banks that use PDFium anyway
+# ("unknown" for statements without a detected bank).
+PDF_TEXT_BACKEND = os.environ.get("PDF_TEXT_BACKEND", "pdfplumber").lower()
+PDF_PDFIUM_TEXT_BANKS = [
+    bank.strip()
+    for bank in os.environ.get("PDF_PDFIUM_TEXT_BANKS", "").split(",")
+    if bank.strip()
+]
+
+
+class PageResult(NamedTuple):
+    """Extraction result for a single page."""
+
+    text_parts: List[str]
+    tables: List[List[List[str]]]
+    layout_key: str
+    # Index into TABLE_SETTINGS_LIST, None when the text fallback was used
+    strategy: Optional[int]
+    # True when the first strategy tried was the winner
+    strategy_hit: bool
+    # {"seconds", "snapshot", "strategies": {index: seconds}, "text_fallback"}
+    timings: dict
+    # "page_budget" or "document_budget" when the time budget ran out and the
+    # page fell back to plain text, None otherwise
+    degraded: Optional[str] = None
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+_process_pool_workers = 0
+_process_pool_lock = threading.Lock()
+
+
+def _get_process_pool(workers: int) -> ProcessPoolExecutor:
+    """Get the shared page-extraction process pool, creating it if needed."""
+    global _process_pool, _process_pool_workers
+
+    with _process_pool_lock:
+        if _process_pool is None or _process_pool_workers != workers:
+            if _process_pool is not None:
+                _process_pool.shutdown(wait=False)
+            # spawn: forking a threaded server process is not safe
+            _process_pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            _process_pool_workers = workers
+        return _process_pool
+
+
+def shutdown_process_pool() -> None:
+    """Shut down the shared page-extraction process pool (call on app shutdown)."""
+    global _process_pool, _process_pool_workers
+
+    with _process_pool_lock:
+        if _process_pool is not None:
+            _process_pool.shutdown(wait=True, cancel_futures=True)
+            _process_pool = None
+            _process_pool_workers = 0
+
+
+def _extract_page_range(
+    file_content: FileContent,
+    start: int,
+    end: int,
+    bank_name: Optional[str],
+    strategy_order: StrategyOrder,
+    page_time_budget: float,
+    document_deadline: Optional[Deadline],
+) -> List[PageResult]:
+    """
+    Worker entry point: open the PDF and extract pages [start, end).
+
+    Runs in a child process, so it must stay a module-level function.
+    """
+    parser = PdfParser(parallel_workers=0, page_time_budget=page_time_budget)
+    text_engine = parser._text_engine(file_content, bank_name)
+    fast_text_engine = text_engine or PdfiumTextEngine(file_content)
+    try:
+        with pdfplumber.open(file_source(file_content)) as pdf:
+            return [
+                parser._extract_page(
+                    pdf.pages[page_num],
+                    page_num,
+                    bank_name,
+                    strategy_order,
+                    text_engine,
+                    document_deadline,
+                    fast_text_engine,
+                )
+                for page_num in range(start, end)
+            ]
+    finally:
+        fast_text_engine.close()
+
 
 class PdfParser(BaseParser):
     """Parser for PDF bank statements using pdfplumber."""
 
+    def __init__(
+        self,
+        parallel_workers: Optional[int] = None,
+        parallel_min_pages: Optional[int] = None,
+        exhaustive: Optional[bool] = None,
+        text_backend: Optional[str] = None,
+        pdfium_text_banks: Optional[Iterable[str]] = None,
+        page_time_budget: Optional[float] = None,
+        document_time_budget: Optional[float] = None,
+    ):
+        """
+        Args:
+            parallel_workers: Worker processes for page-parallel extraction
+                (defaults to PDF_PARALLEL_WORKERS; 0 or 1 forces the serial path)
+            parallel_min_pages: Minimum page count for the parallel path
+                (defaults to PDF_PARALLEL_MIN_PAGES)
+            exhaustive: Run all transaction extractors instead of the planned
+                one (defaults to PDF_EXTRACTION_EXHAUSTIVE)
+            text_backend: Text engine for pages without a usable table,
+                "pdfplumber" or "pdfium" (defaults to PDF_TEXT_BACKEND)
+            pdfium_text_banks: Banks ("unknown" when undetected) whose
+                statements use PDFium text regardless of text_backend
+                (defaults to PDF_PDFIUM_TEXT_BANKS)
+            page_time_budget: Seconds of table extraction per page before
+                the page falls back to plain text (defaults to
+                PDF_PAGE_TIME_BUDGET; 0 disables)
+            document_time_budget: Seconds of table extraction per document;
+                later pages only get plain text and the result is marked
+                partial (defaults to PDF_DOCUMENT_TIME_BUDGET; 0 disables)
+        """
+        self.parallel_workers = (
+            PDF_PARALLEL_WORKERS if parallel_workers is None else parallel_workers
+        )
+        self.parallel_min_pages = (
+            PDF_PARALLEL_MIN_PAGES if parallel_min_pages is None else parallel_min_pages
+        )
+        self.exhaustive = (
+            PDF_EXTRACTION_EXHAUSTIVE if exhaustive is None else exhaustive
+        )
+        self.text_backend = PDF_TEXT_BACKEND if text_backend is None else text_backend
+        self.pdfium_text_banks = frozenset(
+            PDF_PDFIUM_TEXT_BANKS if pdfium_text_banks is None else pdfium_text_banks
+        )
+        self.page_time_budget = (
+            PDF_PAGE_TIME_BUDGET if page_time_budget is None else page_time_budget
+        )
+        self.document_time_budget = (
+            PDF_DOCUMENT_TIME_BUDGET
+            if document_time_budget is None
+            else document_time_budget
+        )
+
     def _extract_with_table_settings(
-        self, page, settings: dict
+        self,
+        engine: PageTableEngine,
+        settings: dict,
+        deadline: Optional[Deadline] = None,
     ) -> Optional[List[List[str]]]:
-        """Try to extract tables with specific settings."""
+        """
+        Try to extract tables with specific settings.
+
+        Raises:
+            BudgetExceeded: If deadline passes during extraction
+        """
         try:
-            tables = page.extract_tables(settings)
+            tables = engine.extract_tables(settings, deadline)
             if tables:
                 return tables
+        except BudgetExceeded:
+            raise
         except Exception:
             pass
         return None
@@ -51,205 +273,279 @@ class PdfParser(BaseParser):
 
         return has_dates
 
-    def _parse_amount(self, amount_str: str) -> float:
-        """Parse amount string to float, handling Mongolian number formats."""
-        if not amount_str:
-            return 0.0
-        # Remove commas and spaces, handle both . and , as decimal separators
-        cleaned = amount_str.replace(",", "").replace(" ", "").strip()
+    def _extract_page(
+        self,
+        page,
+        page_num: int,
+        bank_name: Optional[str],
+        strategy_order: StrategyOrder,
+        text_engine: Optional[PdfiumTextEngine] = None,
+        document_deadline: Optional[Deadline] = None,
+        fast_text_engine: Optional[PdfiumTextEngine] = None,
+    ) -> PageResult:
+        """
+        Extract text parts and tables from a single page.
+
+        pdfplumber's per-page caches (objects, edges, layout, text maps) are
+        flushed afterwards, so peak memory does not grow with page count.
+        """
+        start = time.perf_counter()
         try:
-            return float(cleaned)
-        except ValueError:
-            return 0.0
+            result = self._extract_page_content(
+                page,
+                page_num,
+                bank_name,
+                strategy_order,
+                text_engine,
+                document_deadline,
+                fast_text_engine,
+            )
+        finally:
+            page.close()
+        result.timings["seconds"] = time.perf_counter() - start
+        return result
+
+    def _extract_page_content(
+        self,
+        page,
+        page_num: int,
+        bank_name: Optional[str],
+        strategy_order: StrategyOrder,
+        text_engine: Optional[PdfiumTextEngine] = None,
+        document_deadline: Optional[Deadline] = None,
+        fast_text_engine: Optional[PdfiumTextEngine] = None,
+    ) -> PageResult:
+        """
+        Try the table strategies in learned order (see StrategyOrder) on one
+        geometry snapshot of the page, falling back to text extraction (layout
+        text, or PDFium text when text_engine is given) when none of them
+        yields valid data rows.
+
+        Table extraction stops at the page time budget or document_deadline,
+        whichever comes first; the page then gets the cheapest text
+        (fast_text_engine) and is marked degraded.
+        """
+        logger.info(f"[PDF Parser] Processing page {page_num + 1}")
+        page_text_parts = []
+        timings = {"strategies": {}}
+        deadline = Deadline.after(self.page_time_budget, "page_budget").earliest(
+            document_deadline
+        )
+        degraded = deadline.reason if deadline.expired() else None
+        layout_key = ""
+
+        if degraded is None:
+            start = time.perf_counter()
+            engine = PageTableEngine(page)
+            timings["snapshot"] = time.perf_counter() - start
+            layout_key = page_layout_key(bank_name, page)
+            order = strategy_order.order(layout_key)
+            # Only a learned or carried-over first choice can count as a cache hit
+            guided = strategy_order.has_preference(layout_key)
+        else:
+            order = []
+
+        # Try different table extraction strategies
+        for strategy in order:
+            settings = TABLE_SETTINGS_LIST[strategy]
+            start = time.perf_counter()
+            try:
+                deadline.check()
+                tables = self._extract_with_table_settings(engine, settings, deadline)
+            except BudgetExceeded:
+                timings["strategies"][strategy] = time.perf_counter() - start
+                degraded = deadline.reason
+                logger.warning(
+                    f"[PDF Parser] Page {page_num + 1}: {degraded} exceeded, "
+                    "skipping remaining table strategies"
+                )
+                break
+            if tables:
+                temp_parts = []
+                for table in tables:
+                    for row in table:
+                        if row:
+                            # Filter out None values and join
+                            cells = [str(cell).strip() if cell else "" for cell in row]
+                            row_text = "\t".join(cells)
+                            if row_text.strip():
+                                temp_parts.append(row_text)
+
+                # Check if this extraction has valid data
+                if self._has_valid_data_rows(temp_parts):
+                    logger.debug(
+                        f"Page {page_num + 1}: Table extraction successful "
+                        f"with strategy {strategy + 1}"
+                    )
+                    timings["strategies"][strategy] = time.perf_counter() - start
+                    strategy_order.record(strategy)
+                    # Save tables for transaction extraction
+                    return PageResult(
+                        temp_parts,
+                        tables,
+                        layout_key,
+                        strategy,
+                        guided and strategy == order[0],
+                        timings,
+                    )
+            timings["strategies"][strategy] = time.perf_counter() - start
+
+        # Fallback: Use regular text extraction
+        start = time.perf_counter()
+        page_text = None
+        if degraded is not None and fast_text_engine is not None:
+            text_engine = fast_text_engine
+        if text_engine is not None:
+            page_text = text_engine.page_text(page_num)
+        if page_text is None:
+            page_text = page.extract_text(
+                layout=True,  # Preserve layout
+                x_tolerance=3,
+                y_tolerance=3,
+            )
+        if page_text:
+            # Split by lines and clean up
+            lines = page_text.split("\n")
+            page_text_parts = [line.strip() for line in lines if line.strip()]
+            logger.debug(f"Page {page_num + 1}: Using text extraction fallback")
+
+        timings["text_fallback"] = time.perf_counter() - start
+        return PageResult(
+            page_text_parts, [], layout_key, None, False, timings, degraded
+        )
 
-    def _parse_date(self, date_str: str) -> Optional[datetime]:
-        """Parse various date formats from bank statements."""
-        if not date_str:
+    def _detect_metadata_bank(self, pdf) -> Optional[str]:
+        """Detect the bank from the PDF document info (Producer, Title, ...)."""
+        try:
+            return detect_bank_from_metadata(pdf.metadata)
+        except Exception as e:
+            logger.debug(f"Metadata bank detection failed: {e}")
             return None
 
-        date_str = date_str.strip()
-
-        # Common date formats in Mongolian bank statements
-        formats = [
-            "%Y.%m.%d",  # 2026.02.01
-            "%Y.%m.%d %H:%M:%S%p",  # 2026.2.1 3:32:01AM
-            "%Y.%m.%d %I:%M:%S%p",  # 2026.2.1 3:32:01AM (12-hour)
-            "%Y-%m-%d",  # 2026-02-01
-            "%d.%m.%Y",  # 01.02.2026
-            "%d/%m/%Y",  # 01/02/2026
-            "%Y/%m/%d",  # 2026/02/01
-        ]
+    def _detect_header_bank(self, pdf) -> Optional[str]:
+        """Detect the bank from the first page only (used before full extraction)."""
+        if not pdf.pages:
+            return None
+        # The page stays cached: page 1 extraction reuses its parsed objects
+        try:
+            return self.detect_bank(pdf.pages[0].extract_text() or "")
+        except Exception as e:
+            logger.debug(f"Header bank detection failed: {e}")
+            return None
 
-        # Try to extract just the date part if there's time info
-        date_part = re.split(r"\s+", date_str)[0]
+    def _should_parallelize(self, page_count: int) -> bool:
+        """Check whether the page count justifies the process pool overhead."""
+        return self.parallel_workers > 1 and page_count >= max(
+            2, self.parallel_min_pages
+        )
 
-        for fmt in formats:
-            try:
-                return datetime.strptime(date_str, fmt)
-            except ValueError:
-                pass
-            try:
-                return datetime.strptime(date_part, fmt.split()[0])
-            except ValueError:
-                pass
+    def _text_engine(
+        self, file_content: FileContent, bank_name: Optional[str]
+    ) -> Optional[PdfiumTextEngine]:
+        """
+        Get the text engine for fallback pages of a bank's statements.
 
+        Returns:
+            PdfiumTextEngine when PDFium text is configured for the bank
+            (PDF_TEXT_BACKEND / PDF_PDFIUM_TEXT_BANKS), None for pdfplumber
+        """
+        if self.text_backend == "pdfium" or (bank_name or "unknown") in (
+            self.pdfium_text_banks
+        ):
+            return PdfiumTextEngine(file_content)
         return None
 
-    def _extract_transactions_from_table(
-        self, table: List[List[str]], bank_name: Optional[str]
-    ) -> List[ParsedTransaction]:
-        """Extract transactions from a parsed table based on bank format."""
-        transactions = []
-
-        if not table or len(table) < 2:
-            return transactions
-
-        # Find header row and column indices
-        header_row = None
-        header_idx = -1
-
-        for idx, row in enumerate(table):
-            if not row:
-                continue
-            row_lower = [str(cell).lower() if cell else "" for cell in row]
-            row_text = " ".join(row_lower)
-
-            # Look for common header patterns
-            if any(
-                kw in row_text
-                for kw in ["огноо", "date", "орлого", "зарлага", "дебит", "кредит"]
-            ):
-                header_row = row
-                header_idx = idx
-                break
-
-        if header_row is None:
-            return transactions
-
-        # Map column indices
-        col_map = {}
-        for i, cell in enumerate(header_row):
-            if not cell:
-                continue
-            cell_lower = str(cell).lower().strip()
-
-            if "огноо" in cell_lower or "date" in cell_lower:
-                col_map["date"] = i
-            elif (
-                "орлого" in cell_lower
-                or "credit" in cell_lower
-                or "кредит" in cell_lower
-            ):
-                col_map["income"] = i
-            elif (
-                "зарлага" in cell_lower
-                or "debit" in cell_lower
-                or "дебит" in cell_lower
-            ):
-                col_map["expense"] = i
-            elif (
-                "утга" in cell_lower
-                or "description" in cell_lower
-                or "тайлбар" in cell_lower
-            ):
-                col_map["description"] = i
-            elif "үлдэгдэл" in cell_lower or "balance" in cell_lower:
-                col_map["balance"] = i
-
-        # Need at least date and one of income/expense
-        if "date" not in col_map:
-            return transactions
-        if "income" not in col_map and "expense" not in col_map:
-            return transactions
-
-        logger.info(f"Found column mapping: {col_map}")
-
-        # Process data rows
-        for row in table[header_idx + 1 :]:
-            if not row:
-                continue
+    def _extract_pages_serial(
+        self,
+        pdf,
+        bank_name: Optional[str],
+        strategy_order: StrategyOrder,
+        text_engine: Optional[PdfiumTextEngine] = None,
+        document_deadline: Optional[Deadline] = None,
+        fast_text_engine: Optional[PdfiumTextEngine] = None,
+    ) -> Iterator[PageResult]:
+        """Extract pages one by one in the current process."""
+        for page_num, page in enumerate(pdf.pages):
+            yield self._extract_page(
+                page,
+                page_num,
+                bank_name,
+                strategy_order,
+                text_engine,
+                document_deadline,
+                fast_text_engine,
+            )
 
-            # Skip summary rows (Нийт:, Total:, etc.)
-            first_cell = str(row[0]).lower() if row[0] else ""
-            if any(kw in first_cell for kw in ["нийт", "total", "дүн", "sum"]):
-                continue
+    def _extract_pages_parallel(
+        self,
+        pdf,
+        file_content: FileContent,
+        page_count: int,
+        bank_name: Optional[str],
+        strategy_order: StrategyOrder,
+        text_engine: Optional[PdfiumTextEngine] = None,
+        document_deadline: Optional[Deadline] = None,
+        fast_text_engine: Optional[PdfiumTextEngine] = None,
+    ) -> Iterator[PageResult]:
+        """
+        Shard page ranges across the process pool and yield results in page order.
 
-            try:
-                # Extract date
-                date_str = row[col_map["date"]] if col_map["date"] < len(row) else None
-                parsed_date = self._parse_date(str(date_str) if date_str else "")
-                if not parsed_date:
-                    continue
-
-                # Extract amounts
-                income_amount = 0.0
-                expense_amount = 0.0
-
-                if "income" in col_map and col_map["income"] < len(row):
-                    income_amount = self._parse_amount(
-                        str(row[col_map["income"]] or "")
-                    )
+        Each worker opens the PDF itself and keeps its own copy of the strategy
+        order. Falls back to the serial path for the remaining pages if the
+        pool breaks (e.g. a worker was OOM-killed).
+        """
+        workers = min(self.parallel_workers, page_count)
+        # Two shards per worker smooths out uneven page costs
+        shard_size = max(1, math.ceil(page_count / (workers * 2)))
+        shards = [
+            (start, min(start + shard_size, page_count))
+            for start in range(0, page_count, shard_size)
+        ]
+        logger.info(
+            f"[PDF Parser] Parallel extraction: {len(shards)} shards on {workers} workers"
+        )
 
-                if "expense" in col_map and col_map["expense"] < len(row):
-                    expense_amount = self._parse_amount(
-                        str(row[col_map["expense"]] or "")
-                    )
+        # Workers parse every page themselves; drop the header page parsed here
+        pdf.pages[0].close()
 
-                # Determine transaction type and amount
-                if income_amount > 0 and expense_amount == 0:
-                    txn_type = "credit"
-                    amount = income_amount
-                elif expense_amount > 0 and income_amount == 0:
-                    txn_type = "debit"
-                    amount = expense_amount
-                elif income_amount > 0:
-                    txn_type = "credit"
-                    amount = income_amount
-                elif expense_amount > 0:
-                    txn_type = "debit"
-                    amount = expense_amount
-                else:
-                    continue  # Skip rows with no amounts
-
-                # Extract description
-                description = ""
-                if "description" in col_map and col_map["description"] < len(row):
-                    description = str(row[col_map["description"]] or "").strip()
-
-                # If no description column, try to build from other cells
-                if not description:
-                    # Use non-numeric cells as description
-                    desc_parts = []
-                    for i, cell in enumerate(row):
-                        if i in col_map.values():
-                            continue
-                        if cell and not re.match(r"^[\d,.\s]+$", str(cell)):
-                            desc_parts.append(str(cell).strip())
-                    description = " ".join(desc_parts)[:200]
-
-                # Extract balance if available
-                balance = None
-                if "balance" in col_map and col_map["balance"] < len(row):
-                    balance = self._parse_amount(str(row[col_map["balance"]] or ""))
-
-                txn = ParsedTransaction(
-                    date=parsed_date.date(),
-                    description=description or "Гүйлгээ",
-                    amount=amount,
-                    transaction_type=txn_type,
-                    balance=balance,
-                    raw_data={"row": row},
+        next_page = 0
+        try:
+            pool = _get_process_pool(workers)
+            futures = [
+                pool.submit(
+                    _extract_page_range,
+                    file_content,
+                    start,
+                    end,
+                    bank_name,
+                    strategy_order,
+                    self.page_time_budget,
+                    document_deadline,
+                )
+                for start, end in shards
+            ]
+            for future in futures:
+                for page_result in future.result():
+                    yield page_result
+                    next_page += 1
+        except BrokenProcessPool:
+            logger.warning(
+                f"[PDF Parser] Process pool broken at page {next_page + 1}, "
+                "continuing serially"
+            )
+            shutdown_process_pool()
+            for page_num in range(next_page, page_count):
+                yield self._extract_page(
+                    pdf.pages[page_num],
+                    page_num,
+                    bank_name,
+                    strategy_order,
+                    text_engine,
+                    document_deadline,
+                    fast_text_engine,
                 )
-                transactions.append(txn)
-
-            except Exception as e:
-                logger.debug(f"Failed to parse row: {row}, error: {e}")
-                continue
-
-        logger.info(f"Extracted {len(transactions)} transactions from table")
-        return transactions
 
-    def _extract_transactions_from_text(self, raw_text: str) -> List[ParsedTransaction]:
+    def _extract_transactions_from_text(self, raw_text: str) -> TransactionBatch:
         """
         Extract transactions from raw text when table extraction fails.
         Tries multiple bank-specific extraction methods.
@@ -275,11 +571,12 @@ class PdfParser(BaseParser):
         )
 
         # Combine both results
-        all_transactions = tab_transactions + line_transactions
+        all_transactions = TransactionBatch(tab_transactions)
+        all_transactions.extend(line_transactions)
 
         # Deduplicate by (date, amount, type) - same transaction might be extracted twice
         seen = set()
-        unique_transactions = []
+        unique_transactions = TransactionBatch()
         for txn in all_transactions:
             key = (txn.date, txn.amount, txn.transaction_type)
             if key not in seen:
@@ -292,7 +589,14 @@ class PdfParser(BaseParser):
         )
         return unique_transactions
 
-    def _extract_from_mbank(self, raw_text: str) -> List[ParsedTransaction]:
+    def _is_mbank_format(self, lines: List[str]) -> bool:
+        """Check for the MBank header in the first lines of the text."""
+        return any(
+            "Гүйлгээний" in line and "Орлого" in line and "Зарлага" in line
+            for line in lines[:10]
+        )
+
+    def _extract_from_mbank(self, raw_text: str) -> TransactionBatch:
         """
         Extract transactions from MBank format.
 
@@ -304,17 +608,11 @@ class PdfParser(BaseParser):
         1\t2025-07-03
         02:45:46\t2025-07-03 SMB\tLoan Auto Recovery\t\t0.00\t4,588.71\t74,407.62
         """
-        transactions = []
+        transactions = TransactionBatch()
         lines = raw_text.split("\n")
 
-        # Check if this is MBank format by looking for header
-        is_mbank = any(
-            "Гүйлгээний" in line and "Орлого" in line and "Зарлага" in line
-            for line in lines[:10]
-        )
-
-        if not is_mbank:
-            return []
+        if not self._is_mbank_format(lines):
+            return transactions
 
         logger.info("[PDF Parser] Detected MBank format")
 
@@ -403,15 +701,13 @@ class PdfParser(BaseParser):
                                 i += 1
                                 continue
 
-                            txn = ParsedTransaction(
+                            transactions.add(
                                 date=parsed_date.date(),
                                 description=description or "Гүйлгээ",
                                 amount=amount,
                                 transaction_type=txn_type,
                                 balance=balance,
-                                raw_data={"line1": line1, "line2": line2},
                             )
-                            transactions.append(txn)
 
                             # Skip the second line since we processed it
                             i += 2
@@ -424,7 +720,7 @@ class PdfParser(BaseParser):
 
         return transactions
 
-    def _extract_from_tab_separated(self, raw_text: str) -> List[ParsedTransaction]:
+    def _extract_from_tab_separated(self, raw_text: str) -> TransactionBatch:
         """
         Extract from tab-separated single-line format (TDB single page).
 
@@ -439,7 +735,7 @@ class PdfParser(BaseParser):
           +6 = Balance (Үлдэгдэл)
           +7 = Description (Гүйлгээний утга) - LAST
         """
-        transactions = []
+        transactions = TransactionBatch()
         parts = raw_text.split("\t")
 
         i = 0
@@ -514,7 +810,7 @@ class PdfParser(BaseParser):
                                 if i + 6 < len(parts):
                                     balance = self._parse_amount(parts[i + 6].strip())
 
-                                txn = ParsedTransaction(
+                                transactions.add(
                                     date=parsed_date.date(),
                                     description=description or "Гүйлгээ",
                                     amount=amount,
@@ -522,9 +818,7 @@ class PdfParser(BaseParser):
                                     balance=balance
                                     if balance and balance > 0
                                     else None,
-                                    raw_data={"parts": parts[i : i + 10]},
                                 )
-                                transactions.append(txn)
 
                             except (IndexError, ValueError) as e:
                                 logger.debug(f"Tab parse failed at {i}: {e}")
@@ -533,7 +827,7 @@ class PdfParser(BaseParser):
 
         return transactions
 
-    def _extract_from_lines(self, raw_text: str) -> List[ParsedTransaction]:
+    def _extract_from_lines(self, raw_text: str) -> TransactionBatch:
         """
         Extract from multi-line format with full dates (multi-page PDFs).
 
@@ -542,7 +836,7 @@ class PdfParser(BaseParser):
         The FIRST amount after teller is Income, SECOND is Expense.
         Description is typically at the END of the line.
         """
-        transactions = []
+        transactions = TransactionBatch()
 
         # Split by newlines
         lines = raw_text.split("\n")
@@ -616,230 +910,479 @@ class PdfParser(BaseParser):
                         description = part[:100]
                         break
 
-            txn = ParsedTransaction(
+            transactions.add(
                 date=parsed_date.date(),
                 description=description or "Гүйлгээ",
                 amount=amount,
                 transaction_type=txn_type,
                 balance=None,
-                raw_data={"line": line[:200]},
             )
-            transactions.append(txn)
 
         return transactions
 
-    async def parse(
-        self, file_content: bytes, filename: str, max_chars: int = 2000000
-    ) -> ParseResult:
+    def _plan_extraction(
+        self, first_page: Optional[PageResult], bank_name: Optional[str]
+    ) -> Tuple[str, str]:
         """
-        Extract text from a PDF file.
+        Pick the transaction extractor for the statement layout.
 
-        Args:
-            file_content: Raw bytes of the PDF file
-            filename: Original filename
-            max_chars: Maximum characters to extract (default 2MB for large statements)
+        The layout is classified from the first page: a statement table with a
+        usable column mapping, an MBank text header, or plain text lines.
 
         Returns:
-            ParseResult with extracted text and metadata
+            (plan, reason) where plan is "table", "mbank", "text" or
+            "exhaustive" (all extractors, best result wins)
         """
-        try:
-            text_parts = []
-            total_chars = 0
-            page_count = 0
-            all_transactions = []
-            all_tables = []  # Store raw tables for transaction extraction
-            text_limit_reached = False
-
-            # Different table extraction strategies for different bank formats
-            table_settings_list = [
-                # Strategy 1: Default settings
-                {},
-                # Strategy 2: Explicit line detection (good for TDB)
-                {
-                    "vertical_strategy": "lines",
-                    "horizontal_strategy": "lines",
-                },
-                # Strategy 3: Text-based detection
-                {
-                    "vertical_strategy": "text",
-                    "horizontal_strategy": "text",
-                },
-                # Strategy 4: Lines + text hybrid
-                {
-                    "vertical_strategy": "lines",
-                    "horizontal_strategy": "text",
-                },
-                # Strategy 5: Relaxed tolerance
-                {
-                    "snap_tolerance": 5,
-                    "join_tolerance": 5,
-                },
-            ]
-
-            # Collect ALL raw text for transaction extraction (separate from display text)
-            all_raw_text_parts = []
+        bank = bank_name or "unknown bank"
+        if self.exhaustive:
+            return "exhaustive", "exhaustive mode"
+        if first_page is None:
+            return "exhaustive", "no pages"
+        if any(self._find_table_header(table) for table in first_page.tables):
+            return "table", f"statement table on first page ({bank})"
+        if self._is_mbank_format(first_page.text_parts):
+            return "mbank", f"MBank header on first page ({bank})"
+        return "text", f"no statement table on first page ({bank})"
+
+    def iter_pages(self, file_content: FileContent) -> Iterator[PageResult]:
+        """
+        Extract a PDF page by page.
 
-            with pdfplumber.open(io.BytesIO(file_content)) as pdf:
-                page_count = len(pdf.pages)
-                logger.info(f"[PDF Parser] Starting PDF with {page_count} pages")
+        Args:
+            file_content: Raw bytes of the PDF file
 
-                for page_num, page in enumerate(pdf.pages):
-                    logger.info(
-                        f"[PDF Parser] Processing page {page_num + 1}/{page_count}"
-                    )
-                    page_text_parts = []
-                    extraction_success = False
-                    page_tables = []
-
-                    # Try different table extraction strategies
-                    for settings in table_settings_list:
-                        tables = self._extract_with_table_settings(page, settings)
-                        if tables:
-                            temp_parts = []
-                            for table in tables:
-                                for row in table:
-                                    if row:
-                                        # Filter out None values and join
-                                        cells = [
-                                            str(cell).strip() if cell else ""
-                                            for cell in row
-                                        ]
-                                        row_text = "\t".join(cells)
-                                        if row_text.strip():
-                                            temp_parts.append(row_text)
-
-                            # Check if this extraction has valid data
-                            if self._has_valid_data_rows(temp_parts):
-                                page_text_parts = temp_parts
-                                page_tables = (
-                                    tables  # Save tables for transaction extraction
-                                )
-                                extraction_success = True
-                                logger.debug(
-                                    f"Page {page_num + 1}: Table extraction successful"
-                                )
-                                break
-
-                    # Fallback: Use regular text extraction
-                    if not extraction_success:
-                        page_text = page.extract_text(
-                            layout=True,  # Preserve layout
-                            x_tolerance=3,
-                            y_tolerance=3,
-                        )
-                        if page_text:
-                            # Split by lines and clean up
-                            lines = page_text.split("\n")
-                            page_text_parts = [
-                                line.strip() for line in lines if line.strip()
-                            ]
-                            logger.debug(
-                                f"Page {page_num + 1}: Using text extraction fallback"
-                            )
+        Yields:
+            PageResult for each page, in page order
+        """
+        return PdfDocumentStream(self, file_content).pages()
 
-                    # ALWAYS collect raw text for transaction extraction (all pages)
-                    all_raw_text_parts.extend(page_text_parts)
-
-                    # Add text to display results (up to limit)
-                    if not text_limit_reached:
-                        for line in page_text_parts:
-                            text_parts.append(line)
-                            total_chars += len(line)
-                            if total_chars >= max_chars:
-                                text_limit_reached = True
-                                text_parts.append(
-                                    "\n\n[Текст хэт урт тул товчилсон...]"
-                                )
-                                break
+    def iter_transactions(
+        self, file_content: FileContent
+    ) -> Iterator[ParsedTransaction]:
+        """
+        Extract transactions from a PDF incrementally.
 
-                    # Always collect tables for transaction extraction (even after text limit)
-                    all_tables.extend(page_tables)
+        For statements with tables, each page's transactions are yielded as
+        soon as the page is extracted. Text-only statements need the whole
+        text, so their transactions are yielded after the last page. Uploads
+        and statement jobs go through parse() instead (one result for the
+        parse executor and the result cache), which collects all batches.
 
-                    logger.info(
-                        f"[PDF Parser] Page {page_num + 1}: extracted {len(page_text_parts)} text parts, "
-                        f"{len(page_tables)} tables, total_chars={total_chars}, text_limit_reached={text_limit_reached}"
-                    )
+        Args:
+            file_content: Raw bytes of the PDF file
 
-                logger.info(
-                    f"[PDF Parser] Finished all pages: {page_count} pages, {len(all_tables)} total tables, {total_chars} total chars"
-                )
+        Yields:
+            ParsedTransaction objects, in statement order
+        """
+        return PdfDocumentStream(self, file_content).transactions()
 
-            full_text = "\n".join(text_parts).strip()
-            # Use ALL raw text (not truncated) for transaction extraction
-            full_raw_text = "\n".join(all_raw_text_parts).strip()
+    def parse(
+        self, file_content: FileContent, filename: str, max_chars: int = 2000000
+    ) -> ParseResult:
+        """
+        Extract text from a PDF file.
 
-            # Log extraction result for debugging
-            logger.info(
-                f"PDF extraction: {len(text_parts)} display lines, {len(all_raw_text_parts)} raw lines"
-            )
-            if text_parts:
-                logger.debug(f"First 3 lines: {text_parts[:3]}")
+        Args:
+            file_content: Raw bytes of the PDF file
+            filename: Original filename
+            max_chars: Maximum characters to extract (default 2MB for large statements)
 
-            if not full_raw_text:
+        Returns:
+            ParseResult with extracted text and metadata
+        """
+        timer = ParseTimer("pdf")
+        try:
+            # The result is one value (it goes through the parse executor and
+            # the result cache), so the batches are collected; the page text
+            # past max_chars is not kept (see PdfDocumentStream)
+            stream = PdfDocumentStream(self, file_content, timer, max_chars)
+            all_transactions = TransactionBatch()
+            for batch in stream.batches():
+                all_transactions.extend(batch)
+
+            if not stream.line_count:
+                timer.finish()
                 return ParseResult(
                     success=False,
                     raw_text="",
                     error="PDF файлаас текст олдсонгүй. Зураг PDF байж магадгүй.",
                 )
 
-            # Detect bank name from full raw text
-            bank_name = self.detect_bank(full_raw_text)
-
-            # Extract transactions from tables
-            logger.info(
-                f"[PDF Parser] Extracting transactions from {len(all_tables)} tables"
-            )
-            table_transactions = []
-            for idx, table in enumerate(all_tables):
-                txns = self._extract_transactions_from_table(table, bank_name)
-                logger.info(
-                    f"[PDF Parser] Table {idx + 1}: extracted {len(txns)} transactions"
-                )
-                table_transactions.extend(txns)
+            # Display text (up to limit); transactions were extracted from all pages
+            text_parts = stream.display_lines
+            full_text = "\n".join(text_parts).strip()
 
-            # ALWAYS try raw text extraction as well (to catch transactions from pages where table extraction failed)
-            logger.info(
-                "[PDF Parser] Also trying raw text extraction for complete coverage"
-            )
-            text_transactions = self._extract_transactions_from_text(full_raw_text)
+            # Log extraction result for debugging
             logger.info(
-                f"[PDF Parser] Raw text extraction: {len(text_transactions)} transactions"
+                f"PDF extraction: {len(text_parts)} display lines, {stream.line_count} raw lines"
             )
+            logger.debug(f"First 3 lines: {text_parts[:3]}")
 
-            # Combine both methods and deduplicate
-            # Use the method that found more transactions, OR combine if they found different ones
-            if len(table_transactions) >= len(text_transactions):
-                all_transactions = table_transactions
-                logger.info(
-                    f"[PDF Parser] Using table extraction: {len(all_transactions)} transactions"
-                )
-            else:
-                all_transactions = text_transactions
-                logger.info(
-                    f"[PDF Parser] Using text extraction: {len(all_transactions)} transactions"
-                )
+            # Detect bank name from document metadata, then the statement text
+            # (the display text: all of it unless it is over max_chars)
+            with timer.stage("bank_detection"):
+                bank_name = stream.metadata_bank or self.detect_bank(full_text)
 
             logger.info(
-                f"[PDF Parser] COMPLETE: {len(all_transactions)} total transactions extracted from {page_count} pages"
+                f"[PDF Parser] COMPLETE: {len(all_transactions)} total transactions extracted from {stream.page_count} pages"
             )
+            if stream.degraded_pages:
+                logger.warning(
+                    f"[PDF Parser] Partial result: {len(stream.degraded_pages)} pages "
+                    "ran out of time budget and used plain text"
+                )
 
             return ParseResult(
                 success=True,
                 raw_text=full_text[:max_chars],
                 transactions=all_transactions,
                 metadata={
-                    "pages": page_count,
+                    "pages": stream.page_count,
                     "bank_name": bank_name,
                     "format": "pdf",
                     "filename": filename,
                     "transactions_extracted": len(all_transactions),
+                    "strategy_cache": {
+                        "hits": stream.strategy_hits,
+                        "misses": stream.strategy_misses,
+                    },
+                    "extraction_plan": stream.extraction_plan,
+                    "text_backend": stream.text_backend,
+                    "partial": bool(stream.degraded_pages),
+                    "degraded_pages": stream.degraded_pages,
+                    "timings": timer.finish(),
                 },
             )
 
         except Exception as e:
             logger.exception("PDF parsing error")
+            timer.finish()
+            return ParseResult(
+                success=False,
+                raw_text="",
+                error=f"PDF уншихад алдаа гарлаа: {str(e)}",
+            )
+
+    def preview(
+        self,
+        file_content: FileContent,
+        filename: str,
+        max_pages: int = PREVIEW_MAX_PAGES,
+        max_rows: int = PREVIEW_MAX_ROWS,
+        sample_size: int = PREVIEW_SAMPLE_SIZE,
+    ) -> ParseResult:
+        """
+        Extract only the first pages of a PDF (see BaseParser.preview).
+
+        Returns:
+            ParseResult with the first pages' text, sample transactions and
+            metadata (pages, bank_name, layout, header, column_map)
+        """
+        try:
+            with pdfplumber.open(file_source(file_content)) as pdf:
+                page_count = len(pdf.pages)
+                bank_name = self._detect_metadata_bank(pdf)
+                strategy_order = StrategyOrder(
+                    len(TABLE_SETTINGS_LIST), get_strategy_cache().snapshot()
+                )
+                text_engine = self._text_engine(file_content, bank_name)
+                fast_text_engine = text_engine or PdfiumTextEngine(file_content)
+                try:
+                    pages = [
+                        self._extract_page(
+                            pdf.pages[page_num],
+                            page_num,
+                            bank_name,
+                            strategy_order,
+                            text_engine,
+                            fast_text_engine=fast_text_engine,
+                        )
+                        for page_num in range(min(max_pages, page_count))
+                    ]
+                finally:
+                    fast_text_engine.close()
+
+            text = "\n".join(line for page in pages for line in page.text_parts)
+            text = text.strip()
+            if not text:
+                return ParseResult(
+                    success=False,
+                    raw_text="",
+                    error="PDF файлаас текст олдсонгүй. Зураг PDF байж магадгүй.",
+                )
+
+            bank_name = bank_name or self.detect_bank(text)
+            layout, _ = self._plan_extraction(pages[0], bank_name)
+            result = self._build_preview(
+                [table for page in pages for table in page.tables],
+                text,
+                {
+                    "pages": page_count,
+                    "preview_pages": len(pages),
+                    "bank_name": bank_name,
+                    "layout": layout,
+                    "format": "pdf",
+                    "filename": filename,
+                },
+                sample_size,
+            )
+            if not result.transactions:
+                result.transactions = TransactionBatch(
+                    islice(self._extract_transactions_from_text(text), sample_size)
+                )
+            return result
+
+        except Exception as e:
+            logger.exception("PDF preview error")
             return ParseResult(
                 success=False,
                 raw_text="",
                 error=f"PDF уншихад алдаа гарлаа: {str(e)}",
             )
+
+
+class PdfDocumentStream:
+    """
+    Incremental extraction of one PDF document.
+
+    Pages are dropped once they are yielded: tables are turned into
+    transactions page by page, and page text is kept only where it is
+    needed. That is the display text, up to max_chars, and the text the
+    extractors need. Under the table plan, that is the text of pages without
+    a table, plus the whole text only until the first table rows are found
+    (for the fallback). Text, MBank and exhaustive plans need the whole text.
+    Document-level facts (page count, banks, strategy cache stats,
+    extraction plan) are filled in while the iterators run.
+    """
+
+    def __init__(
+        self,
+        parser: PdfParser,
+        file_content: FileContent,
+        timer: Optional[ParseTimer] = None,
+        max_chars: Optional[int] = None,
+    ):
+        self.parser = parser
+        self.file_content = file_content
+        self.timer = timer or ParseTimer("pdf", trace_memory=False)
+        self.page_count = 0
+        self.metadata_bank: Optional[str] = None
+        self.header_bank: Optional[str] = None
+        self.strategy_hits = 0
+        self.strategy_misses = 0
+        self.text_backend = "pdfplumber"
+        self.line_count = 0
+        # Text lines kept for the text extractors, in page order (see above)
+        self.raw_lines: List[str] = []
+        # Text lines for display, up to max_chars (None: no display text)
+        self.max_chars = max_chars
+        self.display_lines: List[str] = []
+        self._display_chars = 0
+        self.extraction_plan: dict = {}
+        # Pages whose table extraction ran out of time: {"page", "reason"}
+        self.degraded_pages: List[dict] = []
+
+    def raw_text(self) -> str:
+        """Join the text lines kept for the text extractors."""
+        return "\n".join(self.raw_lines).strip()
+
+    def _add_display_lines(self, lines: List[str]) -> None:
+        """Add a page's lines to the display text until max_chars is reached."""
+        if self.max_chars is None or self._display_chars >= self.max_chars:
+            return
+        for line in lines:
+            self.display_lines.append(line)
+            self._display_chars += len(line)
+            if self._display_chars >= self.max_chars:
+                self.display_lines.append("\n\n[Текст хэт урт тул товчилсон...]")
+                return
+
+    def pages(self) -> Iterator[PageResult]:
+        """Extract the pages in order, learning table strategies as they win."""
+        parser = self.parser
+        start = time.perf_counter()
+        document_deadline = Deadline.after(
+            parser.document_time_budget, "document_budget"
+        )
+        with pdfplumber.open(file_source(self.file_content)) as pdf:
+            self.page_count = len(pdf.pages)
+            logger.info(f"[PDF Parser] Starting PDF with {self.page_count} pages")
+
+            # Learned table strategy order for this bank's layouts
+            self.metadata_bank = parser._detect_metadata_bank(pdf)
+            self.header_bank = self.metadata_bank or parser._detect_header_bank(pdf)
+            strategy_cache = get_strategy_cache()
+            strategy_order = StrategyOrder(
+                len(TABLE_SETTINGS_LIST), strategy_cache.snapshot()
+            )
+
+            self.timer.add("open", time.perf_counter() - start)
+
+            text_engine = parser._text_engine(self.file_content, self.header_bank)
+            self.text_backend = "pdfium" if text_engine else "pdfplumber"
+            # Opened lazily, only if a page runs out of time
+            fast_text_engine = text_engine or PdfiumTextEngine(self.file_content)
+
+            if parser._should_parallelize(self.page_count):
+                page_results = parser._extract_pages_parallel(
+                    pdf,
+                    self.file_content,
+                    self.page_count,
+                    self.header_bank,
+                    strategy_order,
+                    text_engine,
+                    document_deadline,
+                    fast_text_engine,
+                )
+            else:
+                page_results = parser._extract_pages_serial(
+                    pdf,
+                    self.header_bank,
+                    strategy_order,
+                    text_engine,
+                    document_deadline,
+                    fast_text_engine,
+                )
+
+            try:
+                for page_num, page_result in enumerate(page_results):
+                    if page_result.strategy_hit:
+                        self.strategy_hits += 1
+                    else:
+                        self.strategy_misses += 1
+                    if page_result.strategy is not None:
+                        strategy_cache.record(
+                            page_result.layout_key, page_result.strategy
+                        )
+                    if page_result.degraded is not None:
+                        self.degraded_pages.append(
+                            {"page": page_num + 1, "reason": page_result.degraded}
+                        )
+                    self.line_count += len(page_result.text_parts)
+                    self._add_display_lines(page_result.text_parts)
+                    self.timer.add_page(page_num, page_result.timings)
+
+                    logger.info(
+                        f"[PDF Parser] Page {page_num + 1}: extracted {len(page_result.text_parts)} text parts, "
+                        f"{len(page_result.tables)} tables"
+                    )
+                    yield page_result
+            finally:
+                strategy_cache.save()
+                fast_text_engine.close()
+
+            logger.info(
+                f"[PDF Parser] Finished all pages: {self.page_count} pages, {self.line_count} text lines"
+            )
+
+    def transactions(self) -> Iterator[ParsedTransaction]:
+        """Extract transactions as row objects (see batches)."""
+        for batch in self.batches():
+            yield from batch
+
+    def batches(self) -> Iterator[TransactionBatch]:
+        """
+        Extract transactions with the planned extractor (see _plan_extraction).
+
+        Under the table plan each page's table rows are yielded right away, and
+        pages without a statement table go through the text extractors at the
+        end. Other plans need the whole text, so table rows are held back as
+        their fallback. If the plan finds nothing, every extractor is tried.
+        """
+        parser = self.parser
+        plan = reason = None
+        seconds = {"table": 0.0}
+        held_transactions = TransactionBatch()
+        text_page_lines: List[str] = []
+        yielded = 0
+        keep_lines = True
+
+        for page in self.pages():
+            if plan is None:
+                plan, reason = parser._plan_extraction(page, self.header_bank)
+                logger.info(f"[PDF Parser] Extraction plan: {plan} ({reason})")
+            if keep_lines:
+                self.raw_lines.extend(page.text_parts)
+            if page.strategy is None:
+                if plan == "table":
+                    text_page_lines.extend(page.text_parts)
+                continue
+
+            start = time.perf_counter()
+            page_transactions = TransactionBatch()
+            for table in page.tables:
+                page_transactions.extend(
+                    parser._extract_transactions_from_table(table, self.header_bank)
+                )
+            seconds["table"] += time.perf_counter() - start
+
+            if plan == "table":
+                yielded += len(page_transactions)
+                yield page_transactions
+                if yielded and keep_lines:
+                    # The whole text is only needed if no table rows are found
+                    keep_lines = False
+                    self.raw_lines = []
+            else:
+                held_transactions.extend(page_transactions)
+
+        if plan is None:
+            plan, reason = parser._plan_extraction(None, self.header_bank)
+
+        fallback = False
+        text_transactions = TransactionBatch()
+        start = time.perf_counter()
+        if plan == "table":
+            if not yielded:
+                fallback = True
+                text_transactions = parser._extract_transactions_from_text(
+                    self.raw_text()
+                )
+            elif text_page_lines:
+                # Text-only pages (no usable table) in a table statement
+                text_transactions = parser._extract_transactions_from_text(
+                    "\n".join(text_page_lines).strip()
+                )
+            result = text_transactions
+        else:
+            if plan == "mbank":
+                text_transactions = parser._extract_from_mbank(self.raw_text())
+                fallback = not text_transactions
+                if fallback:
+                    text_transactions = parser._extract_transactions_from_text(
+                        self.raw_text()
+                    )
+            else:
+                text_transactions = parser._extract_transactions_from_text(
+                    self.raw_text()
+                )
+                fallback = plan == "text" and not text_transactions
+
+            if plan == "exhaustive" or fallback:
+                # Use the method that found more transactions
+                if len(held_transactions) >= len(text_transactions):
+                    result = held_transactions
+                else:
+                    result = text_transactions
+            else:
+                result = text_transactions
+        seconds["text"] = time.perf_counter() - start
+
+        if fallback:
+            logger.info(
+                f"[PDF Parser] Plan '{plan}' found no transactions, "
+                "fell back to all extractors"
+            )
+        logger.info(
+            f"[PDF Parser] Table rows: {yielded + len(held_transactions)}, "
+            f"text extraction: {len(text_transactions)} transactions"
+        )
+        self.timer.add("table_transactions", seconds["table"])
+        self.timer.add("text_transactions", seconds["text"])
+        self.extraction_plan = {
+            "plan": plan,
+            "reason": reason,
+            "fallback_to_exhaustive": fallback,
+            "seconds": {name: round(value, 4) for name, value in seconds.items()},
+        }
+        yield result
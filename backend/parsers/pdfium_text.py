@@ -0,0 +1,61 @@
+"""
+Fast page text extraction with pypdfium2 for pages that have no usable table.
+"""
+
+import logging
+import threading
+from typing import Optional
+
+from .mapped_file import FileContent, MappedFile
+
+logger = logging.getLogger(__name__)
+
+# PDFium is not thread-safe; every call into it goes through this lock
+_pdfium_lock = threading.Lock()
+
+
+class PdfiumTextEngine:
+    """
+    Plain page text from PDFium, opened lazily once per document.
+
+    Much faster than pdfplumber's layout text, but runs of spaces used for
+    column alignment are not reproduced, so only use it for layouts whose
+    text extractors are known to give the same transactions.
+    """
+
+    def __init__(self, file_content: FileContent):
+        self.file_content = file_content
+        self._document = None
+
+    def page_text(self, page_num: int) -> Optional[str]:
+        """Get the text of a page, or None if PDFium cannot read it."""
+        try:
+            import pypdfium2 as pdfium
+        except ImportError:
+            return None
+
+        try:
+            with _pdfium_lock:
+                if self._document is None:
+                    # PDFium reads a mapped file from its path itself
+                    source = self.file_content
+                    if isinstance(source, MappedFile):
+                        source = source.path
+                    self._document = pdfium.PdfDocument(source)
+                page = self._document[page_num]
+                text_page = page.get_textpage()
+                try:
+                    return text_page.get_text_range()
+                finally:
+                    text_page.close()
+                    page.close()
+        except Exception as e:
+            logger.warning(f"[PDFium] Page {page_num + 1} text failed: {e}")
+            return None
+
+    def close(self) -> None:
+        """Release the PDFium document."""
+        if self._document is not None:
+            with _pdfium_lock:
+                self._document.close()
+            self._document = None
@@ -0,0 +1,216 @@
+"""
+Content-addressed cache of parse results.
+
+Results are keyed by the SHA-256 of the file bytes plus the parser version,
+stored in a size-bounded on-disk LRU and optionally in a shared remote store
+(e.g. a Postgres table) so several app instances share hits.
+"""
+
+import asyncio
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+from typing import Optional, Protocol
+
+from .base import PARSER_CACHE_DIR, PARSER_VERSION, FileFormat, ParseResult
+from .mapped_file import FileContent
+
+logger = logging.getLogger(__name__)
+
+PARSE_CACHE_ENABLED = os.environ.get("PARSE_CACHE_ENABLED", "true").lower() == "true"
+PARSE_CACHE_DIR = os.environ.get(
+    "PARSE_CACHE_DIR", os.path.join(PARSER_CACHE_DIR, "parse_results")
+)
+PARSE_CACHE_MAX_BYTES = int(
+    os.environ.get("PARSE_CACHE_MAX_BYTES", str(512 * 1024 * 1024))
+)
+
+_CACHE_SUFFIX = ".json.gz"
+
+
+def make_cache_key(
+    file_content: FileContent,
+    file_format: FileFormat,
+    max_chars: int,
+    sha256: Optional[str] = None,
+) -> str:
+    """
+    Build the cache key for a file.
+
+    The format and max_chars are part of the key because they change the
+    parser that runs and how much raw_text is kept. sha256 is the file's
+    hex digest if the caller already computed it.
+    """
+    digest = sha256 or hashlib.sha256(file_content).hexdigest()
+    return f"{digest}-{file_format.value}-{max_chars}-v{PARSER_VERSION}"
+
+
+def encode_result(result: ParseResult) -> bytes:
+    """Serialize a parse result to compressed JSON."""
+    payload = json.dumps(result.to_dict(), ensure_ascii=False, default=str)
+    return gzip.compress(payload.encode("utf-8"), compresslevel=5)
+
+
+def decode_result(blob: bytes) -> ParseResult:
+    """Deserialize a parse result produced by encode_result."""
+    return ParseResult.from_dict(json.loads(gzip.decompress(blob)))
+
+
+class RemoteResultStore(Protocol):
+    """Shared store for encoded parse results (see database.PostgresParseCache)."""
+
+    async def get(self, key: str) -> Optional[bytes]: ...
+
+    async def set(self, key: str, blob: bytes) -> None: ...
+
+
+class DiskLRUCache:
+    """
+    Size-bounded directory of blobs with least-recently-used eviction.
+
+    File modification times track recency: reads touch the file and eviction
+    removes the oldest files until the total size fits max_bytes.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._total_bytes: Optional[int] = None
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + _CACHE_SUFFIX)
+
+    def _entries(self) -> list[tuple[float, int, str]]:
+        entries = []
+        try:
+            with os.scandir(self.directory) as it:
+                for entry in it:
+                    if entry.name.endswith(_CACHE_SUFFIX):
+                        try:
+                            stat = entry.stat()
+                        except FileNotFoundError:
+                            continue
+                        entries.append((stat.st_mtime, stat.st_size, entry.path))
+        except FileNotFoundError:
+            pass
+        return entries
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Read a blob and mark it as recently used."""
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                blob = f.read()
+            os.utime(path)
+            return blob
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            logger.warning(f"[Parse Cache] Failed to read {key}: {e}")
+            return None
+
+    def set(self, key: str, blob: bytes) -> None:
+        """Write a blob, then evict old entries if over the size limit."""
+        if len(blob) > self.max_bytes:
+            return
+        path = self._path(key)
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(blob)
+            try:
+                replaced = os.path.getsize(path)
+            except FileNotFoundError:
+                replaced = 0
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"[Parse Cache] Failed to write {key}: {e}")
+            return
+
+        with self._lock:
+            if self._total_bytes is None:
+                self._total_bytes = sum(size for _, size, _ in self._entries())
+            else:
+                self._total_bytes += len(blob) - replaced
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self) -> None:
+        """Remove least recently used entries until under the limit (lock held)."""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except FileNotFoundError:
+                total -= size
+            except OSError as e:
+                logger.warning(f"[Parse Cache] Failed to evict {path}: {e}")
+        self._total_bytes = total
+
+
+class ParseResultCache:
+    """Two-tier parse result cache: local disk LRU, then an optional remote store."""
+
+    def __init__(
+        self,
+        disk: Optional[DiskLRUCache] = None,
+        remote: Optional[RemoteResultStore] = None,
+    ):
+        self.disk = disk or DiskLRUCache(PARSE_CACHE_DIR, PARSE_CACHE_MAX_BYTES)
+        self.remote = remote
+
+    async def get(self, key: str) -> Optional[ParseResult]:
+        """
+        Look up a cached result.
+
+        Returns:
+            ParseResult with metadata['parse_cache'] set to the tier that hit,
+            or None on a miss
+        """
+        tier = "disk"
+        blob = await asyncio.to_thread(self.disk.get, key)
+        if blob is None and self.remote is not None:
+            tier = "remote"
+            try:
+                blob = await self.remote.get(key)
+            except Exception as e:
+                logger.warning(f"[Parse Cache] Remote lookup failed: {e}")
+                blob = None
+            if blob is not None:
+                await asyncio.to_thread(self.disk.set, key, blob)
+        if blob is None:
+            return None
+
+        try:
+            result = await asyncio.to_thread(decode_result, blob)
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"[Parse Cache] Dropping corrupt entry {key}: {e}")
+            return None
+        result.metadata["parse_cache"] = tier
+        return result
+
+    async def set(self, key: str, result: ParseResult) -> None:
+        """
+        Store a successful result in every tier.
+
+        Partial results (PDF pages that ran out of time budget) are not
+        stored, so a later upload of the same file gets a full parse.
+        """
+        if not result.success or result.metadata.get("partial"):
+            return
+        blob = await asyncio.to_thread(encode_result, result)
+        await asyncio.to_thread(self.disk.set, key, blob)
+        if self.remote is not None:
+            try:
+                await self.remote.set(key, blob)
+            except Exception as e:
+                logger.warning(f"[Parse Cache] Remote store failed: {e}")
@@ -0,0 +1,151 @@
+"""
+Learned ordering of pdfplumber table strategies per bank and page layout.
+"""
+
+import json
+import logging
+import os
+import threading
+from typing import Optional
+
+from .base import PARSER_CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+TABLE_STRATEGY_CACHE_PATH = os.environ.get(
+    "TABLE_STRATEGY_CACHE_PATH",
+    os.path.join(PARSER_CACHE_DIR, "table_strategies.json"),
+)
+
+
+def page_layout_key(bank_name: Optional[str], page) -> str:
+    """
+    Build a cheap layout fingerprint for a page.
+
+    Uses only the bank, page orientation and the amount of ruling lines,
+    which pdfplumber already has from the page objects.
+    """
+    orientation = "landscape" if page.width > page.height else "portrait"
+    rulings = len(page.lines) + len(page.rects)
+    if rulings == 0:
+        ruling_bucket = "none"
+    elif rulings < 10:
+        ruling_bucket = "few"
+    elif rulings < 100:
+        ruling_bucket = "some"
+    else:
+        ruling_bucket = "many"
+    return f"{bank_name or 'unknown'}|{orientation}|{ruling_bucket}"
+
+
+class StrategyOrder:
+    """
+    Per-document strategy ordering.
+
+    Tries the strategy that won on the previous page first, then the learned
+    winners for the page's layout key, then the remaining default order.
+    Plain data only, so it can be sent to page-extraction worker processes.
+    """
+
+    def __init__(self, strategy_count: int, learned: Optional[dict] = None):
+        self.strategy_count = strategy_count
+        self.learned: dict[str, list[int]] = learned or {}
+        self.last_winner: Optional[int] = None
+
+    def has_preference(self, layout_key: str) -> bool:
+        """Check whether the order for a layout key is learned rather than default."""
+        return self.last_winner is not None or bool(self.learned.get(layout_key))
+
+    def order(self, layout_key: str) -> list[int]:
+        """Get the strategy indices to try for a page, best guess first."""
+        preferred = []
+        if self.last_winner is not None:
+            preferred.append(self.last_winner)
+        preferred.extend(self.learned.get(layout_key, []))
+
+        order = []
+        for idx in preferred + list(range(self.strategy_count)):
+            if idx not in order and 0 <= idx < self.strategy_count:
+                order.append(idx)
+        return order
+
+    def record(self, strategy: Optional[int]) -> None:
+        """Remember the winning strategy (None for text fallback) for the next page."""
+        if strategy is not None:
+            self.last_winner = strategy
+
+
+class TableStrategyCache:
+    """
+    Process-wide cache of winning table strategies, persisted as JSON.
+
+    Maps a page layout key to win counts per strategy index.
+    """
+
+    def __init__(self, path: str = TABLE_STRATEGY_CACHE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._wins: Optional[dict[str, dict[str, int]]] = None
+        self._dirty = False
+
+    def _load(self) -> dict[str, dict[str, int]]:
+        if self._wins is None:
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    self._wins = json.load(f)
+            except FileNotFoundError:
+                self._wins = {}
+            except (OSError, ValueError) as e:
+                logger.warning(f"[Strategy Cache] Ignoring unreadable cache: {e}")
+                self._wins = {}
+        return self._wins
+
+    def snapshot(self) -> dict[str, list[int]]:
+        """Get learned strategy orders per layout key, most wins first."""
+        with self._lock:
+            wins = self._load()
+            return {
+                key: [
+                    int(idx)
+                    for idx, _ in sorted(
+                        counts.items(), key=lambda item: item[1], reverse=True
+                    )
+                ]
+                for key, counts in wins.items()
+            }
+
+    def record(self, layout_key: str, strategy: int) -> None:
+        """Count a win for a strategy on a layout key."""
+        with self._lock:
+            counts = self._load().setdefault(layout_key, {})
+            counts[str(strategy)] = counts.get(str(strategy), 0) + 1
+            self._dirty = True
+
+    def save(self) -> None:
+        """Write the cache to disk if it changed (atomic replace)."""
+        with self._lock:
+            if not self._dirty or self._wins is None:
+                return
+            try:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                tmp_path = f"{self.path}.{os.getpid()}.tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(self._wins, f, ensure_ascii=False)
+                os.replace(tmp_path, self.path)
+                self._dirty = False
+            except OSError as e:
+                logger.warning(f"[Strategy Cache] Could not persist cache: {e}")
+
+
+_default_cache: Optional[TableStrategyCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_strategy_cache() -> TableStrategyCache:
+    """Get the shared process-wide strategy cache."""
+    global _default_cache
+
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = TableStrategyCache()
+        return _default_cache
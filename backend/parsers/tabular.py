@@ -0,0 +1,65 @@
+"""
+Transaction extraction from spreadsheet rows (Excel sheets, CSV files).
+"""
+
+import logging
+from typing import Any, Optional, Sequence
+
+from .base import BaseParser, TransactionBatch
+
+logger = logging.getLogger(__name__)
+
+# Non-empty rows at the top of a sheet searched for the statement header
+TABULAR_HEADER_SCAN_ROWS = 50
+
+
+class TabularTransactionExtractor:
+    """
+    Turns the rows of a sheet into transactions while the sheet is read.
+
+    Uses the same header detection, column mapping and row rules as PDF
+    tables (BaseParser._map_header_row / _add_table_row), but cells keep
+    their types: openpyxl datetimes and numbers are used without a string
+    round trip. Rows are fed one at a time, so large sheets are never held
+    in memory.
+    """
+
+    def __init__(
+        self, parser: BaseParser, header_scan_rows: int = TABULAR_HEADER_SCAN_ROWS
+    ):
+        self.parser = parser
+        self.header_scan_rows = header_scan_rows
+        self.transactions = TransactionBatch()
+        # Column map of each sheet where a statement header was found
+        self.column_maps: list[dict[str, int]] = []
+        self.col_map: Optional[dict[str, int]] = None
+        self._scanned = 0
+
+    def start_sheet(self) -> None:
+        """Reset the header search for the next sheet."""
+        self.col_map = None
+        self._scanned = 0
+
+    def wants_rows(self) -> bool:
+        """Whether more rows of the current sheet can still yield transactions."""
+        return self.col_map is not None or self._scanned < self.header_scan_rows
+
+    def feed(self, row: Sequence[Any]) -> None:
+        """
+        Read the next non-empty row of the current sheet.
+
+        Rows before the header are only checked for being the header; rows
+        after it are added as transactions.
+        """
+        if self.col_map is not None:
+            self.parser._add_table_row(self.transactions, row, self.col_map)
+            return
+        if self._scanned >= self.header_scan_rows:
+            return
+
+        self._scanned += 1
+        col_map = self.parser._map_header_row(row)
+        if self.parser._is_statement_header(col_map):
+            logger.info(f"Found column mapping: {col_map}")
+            self.col_map = col_map
+            self.column_maps.append(col_map)
@@ -0,0 +1,84 @@
+"""
+Time budgets for PDF extraction, so pathological pages cannot stall a parse.
+
+Budgets are cooperative: table extraction checks its Deadline between
+stages and inside the cell search, and gives up by raising BudgetExceeded.
+"""
+
+import os
+import time
+from typing import Optional
+
+# Seconds of table extraction allowed per page and per document (0 disables).
+# Pages over budget skip their remaining table strategies and use plain text.
+PDF_PAGE_TIME_BUDGET = float(os.environ.get("PDF_PAGE_TIME_BUDGET", "10"))
+PDF_DOCUMENT_TIME_BUDGET = float(os.environ.get("PDF_DOCUMENT_TIME_BUDGET", "120"))
+
+
+class BudgetExceeded(Exception):
+    """Raised when extraction runs past its Deadline."""
+
+
+class Deadline:
+    """
+    A point in wall-clock time after which work should stop.
+
+    Wall-clock (not monotonic) time, so deadlines can be handed to the page
+    extraction worker processes.
+    """
+
+    __slots__ = ("expires_at", "reason")
+
+    def __init__(self, expires_at: Optional[float], reason: str):
+        self.expires_at = expires_at
+        self.reason = reason
+
+    @classmethod
+    def after(cls, seconds: float, reason: str) -> "Deadline":
+        """Deadline `seconds` from now, or one that never expires if seconds <= 0."""
+        return cls(time.time() + seconds if seconds > 0 else None, reason)
+
+    def expired(self) -> bool:
+        return self.expires_at is not None and time.time() >= self.expires_at
+
+    def check(self) -> None:
+        """
+        Raises:
+            BudgetExceeded: If the deadline has passed
+        """
+        if self.expired():
+            raise BudgetExceeded(self.reason)
+
+    def earliest(self, other: Optional["Deadline"]) -> "Deadline":
+        """The deadline of the two that expires first."""
+        if other is None or other.expires_at is None:
+            return self
+        if self.expires_at is None or other.expires_at < self.expires_at:
+            return other
+        return self
+
+    def __repr__(self) -> str:
+        return f"Deadline(expires_at={self.expires_at!r}, reason={self.reason!r})"
+
+
+class DeadlineDict(dict):
+    """
+    Dict that checks a Deadline every `interval` item lookups.
+
+    pdfplumber's cell search (intersections_to_cells) is quadratic in the
+    number of edge intersections and spends its time looking points up in
+    this dict, so wrapping it makes that loop cancellable.
+    """
+
+    def __init__(self, data: dict, deadline: Deadline, interval: int = 512):
+        super().__init__(data)
+        self._deadline = deadline
+        self._interval = interval
+        self._lookups = 0
+
+    def __getitem__(self, key):
+        self._lookups += 1
+        if self._lookups >= self._interval:
+            self._lookups = 0
+            self._deadline.check()
+        return super().__getitem__(key)
@@ -15,15 +15,35 @@ from typing import Optional
 logger = logging.getLogger(__name__)
 
 from auth import require_auth, verify_google_token
-from database import close_db, get_db, init_db
-from fastapi import Depends, FastAPI, File, Form, HTTPException, UploadFile
+from database import (
+    PostgresParseCache,
+    close_db,
+    delete_unlinked_statements,
+    detach_statements,
+    get_db,
+    init_db,
+    insert_transactions,
+)
+from fastapi import (
+    Depends,
+    FastAPI,
+    File,
+    Form,
+    HTTPException,
+    UploadFile,
+)
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
+from jobs import StatementWorkerPool, create_pending_statement
 from models import (
     AnalysisCreate,
     AnalysisListItem,
     AnalysisResponse,
+    BatchUploadResponse,
+    BatchUploadResult,
     CategoryListResponse,
     CategoryResponse,
+    ExtractionPreview,
     ExtractionResult,
     KeyInfoResponse,
     KeySetupRequest,
@@ -40,16 +60,32 @@ from models import (
     TransactionUpdate,
     UserResponse,
 )
-from parsers import ParserFactory
+from parsers import ParserBusyError, ParserFactory, get_timing_histograms
 from pydantic import BaseModel
+from uploads import (
+    RequestSizeLimit,
+    UploadTooLargeError,
+    read_batch,
+    remove_batch,
+    spool_upload,
+)
+
+
+# Background statement processing in this process (see jobs.py)
+statement_workers = StatementWorkerPool()
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """Initialize database on startup, close on shutdown."""
+    """Initialize database and statement workers on startup, close on shutdown."""
     await init_db()
+    if os.environ.get("PARSE_CACHE_POSTGRES", "false").lower() == "true":
+        ParserFactory.configure_result_cache(remote=PostgresParseCache())
+    statement_workers.start()
     yield
+    await statement_workers.stop()
     await close_db()
+    ParserFactory.shutdown()
 
 
 app = FastAPI(
@@ -59,6 +95,12 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
+
+# Added before CORS, so CORS stays the outer middleware and the 413 carries
+# its headers
+app.add_middleware(RequestSizeLimit)
+
+
 # CORS: allow configured origins + localhost for dev
 allowed_origins = [
     "http://localhost:3000",
@@ -82,6 +124,22 @@ app.add_middleware(
 )
 
 
+@app.exception_handler(ParserBusyError)
+async def parser_busy_handler(request, exc: ParserBusyError):
+    """Apply backpressure when the parse executor is saturated."""
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Сервер завгүй байна. Түр хүлээгээд дахин оролдоно уу."},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
+@app.exception_handler(UploadTooLargeError)
+async def upload_too_large_handler(request, exc: UploadTooLargeError):
+    """Reject an uploaded file over UPLOAD_MAX_BYTES."""
+    return JSONResponse(status_code=413, content={"detail": str(exc)})
+
+
 # --- File Extraction (Multi-format) ---
 
 
@@ -91,6 +149,12 @@ async def health_check():
     return {"status": "ok"}
 
 
+@app.get("/metrics/parse-timings")
+async def parse_timings():
+    """Parse latency histograms per parser stage since the process started."""
+    return get_timing_histograms().snapshot()
+
+
 @app.post("/extract", response_model=ExtractionResult)
 async def extract_text(file: UploadFile = File(...), max_chars: int = 500000):
     """
@@ -111,9 +175,12 @@ async def extract_text(file: UploadFile = File(...), max_chars: int = 500000):
             detail=f"Дэмжигдээгүй файлын формат. Дэмжигдэх форматууд: {supported}",
         )
 
+    spooled = await spool_upload(file)
     try:
-        content = await file.read()
-        result = await ParserFactory.parse_file(content, file.filename, max_chars)
+        with spooled.mapped() as content:
+            result = await ParserFactory.parse_file(
+                content, file.filename, max_chars, sha256=spooled.sha256
+            )
 
         if not result.success:
             return ExtractionResult(success=False, error=result.error)
@@ -124,10 +191,66 @@ async def extract_text(file: UploadFile = File(...), max_chars: int = 500000):
             metadata=result.metadata,
         )
 
+    except ParserBusyError:
+        raise
     except Exception as e:
         return ExtractionResult(
             success=False, error=f"Файл уншихад алдаа гарлаа: {str(e)}"
         )
+    finally:
+        spooled.remove()
+
+
+@app.post("/extract/preview", response_model=ExtractionPreview)
+async def extract_preview(
+    file: UploadFile = File(...),
+    max_pages: int = 2,
+    max_rows: int = 50,
+    sample_size: int = 5,
+):
+    """
+    Quick look at a file before the full parse: bank, page count, header row,
+    column mapping and a few sample transactions.
+
+    - **file**: File to preview (PDF, xlsx, xls, or csv)
+    - **max_pages**: PDF pages to read (default 2)
+    - **max_rows**: Excel/CSV rows to read (default 50)
+    - **sample_size**: Maximum sample transactions (default 5)
+    """
+    if not file.filename:
+        raise HTTPException(status_code=400, detail="Файлын нэр байхгүй байна")
+
+    file_format = ParserFactory.detect_format(file.filename)
+    if not file_format:
+        supported = ", ".join(ParserFactory.get_supported_extensions())
+        raise HTTPException(
+            status_code=400,
+            detail=f"Дэмжигдээгүй файлын формат. Дэмжигдэх форматууд: {supported}",
+        )
+
+    spooled = await spool_upload(file)
+    try:
+        with spooled.mapped() as content:
+            result = await ParserFactory.preview_file(
+                content, file.filename, max_pages, max_rows, sample_size
+            )
+    finally:
+        spooled.remove()
+
+    if not result.success:
+        return ExtractionPreview(success=False, error=result.error)
+
+    metadata = result.metadata
+    return ExtractionPreview(
+        success=True,
+        bank_name=metadata.get("bank_name"),
+        pages=metadata.get("pages"),
+        header=metadata.get("header"),
+        column_map=metadata.get("column_map"),
+        sample_transactions=[t.to_dict() for t in result.transactions],
+        text=result.raw_text,
+        metadata=metadata,
+    )
 
 
 # --- Auth Endpoints ---
@@ -363,9 +486,9 @@ async def list_report_groups(
                 """
                 SELECT rg.id, rg.name, rg.description, rg.status, rg.parent_report_id,
                        rg.created_at, rg.updated_at,
-                       COUNT(s.id) as statement_count
+                       COUNT(gs.statement_id) as statement_count
                 FROM report_groups rg
-                LEFT JOIN statements s ON s.report_group_id = rg.id
+                LEFT JOIN report_group_statements gs ON gs.report_group_id = rg.id
                 WHERE rg.user_id = $1 AND rg.status = $2
                 GROUP BY rg.id
                 ORDER BY rg.updated_at DESC
@@ -381,9 +504,9 @@ async def list_report_groups(
                 """
                 SELECT rg.id, rg.name, rg.description, rg.status, rg.parent_report_id,
                        rg.created_at, rg.updated_at,
-                       COUNT(s.id) as statement_count
+                       COUNT(gs.statement_id) as statement_count
                 FROM report_groups rg
-                LEFT JOIN statements s ON s.report_group_id = rg.id
+                LEFT JOIN report_group_statements gs ON gs.report_group_id = rg.id
                 WHERE rg.user_id = $1
                 GROUP BY rg.id
                 ORDER BY rg.updated_at DESC
@@ -432,11 +555,12 @@ async def get_report_group(group_id: str, user: dict = Depends(require_auth)):
         # Get statements
         statement_rows = await conn.fetch(
             """
-            SELECT id, file_name, file_format, file_size, bank_name, status,
-                   error_message, created_at
-            FROM statements
-            WHERE report_group_id = $1
-            ORDER BY created_at ASC
+            SELECT s.id, s.file_name, s.file_format, s.file_size, s.bank_name,
+                   s.status, s.error_message, s.created_at
+            FROM statements s
+            JOIN report_group_statements gs ON gs.statement_id = s.id
+            WHERE gs.report_group_id = $1
+            ORDER BY s.created_at ASC
             """,
             group_id,
         )
@@ -522,11 +646,12 @@ async def update_report_group(
         # Get statements
         statement_rows = await conn.fetch(
             """
-            SELECT id, file_name, file_format, file_size, bank_name, status,
-                   error_message, created_at
-            FROM statements
-            WHERE report_group_id = $1
-            ORDER BY created_at ASC
+            SELECT s.id, s.file_name, s.file_format, s.file_size, s.bank_name,
+                   s.status, s.error_message, s.created_at
+            FROM statements s
+            JOIN report_group_statements gs ON gs.statement_id = s.id
+            WHERE gs.report_group_id = $1
+            ORDER BY s.created_at ASC
             """,
             group_id,
         )
@@ -564,16 +689,32 @@ async def update_report_group(
 
 @app.delete("/report-groups/{group_id}")
 async def delete_report_group(group_id: str, user: dict = Depends(require_auth)):
-    """Delete a report group and all its statements."""
-    async with get_db() as conn:
-        result = await conn.execute(
-            "DELETE FROM report_groups WHERE id = $1 AND user_id = $2",
+    """
+    Delete a report group and its statements, except those still in other
+    report groups (extended from it).
+    """
+    async with get_db() as conn, conn.transaction():
+        # The group, then its statements, are locked as in delete_statement
+        rg = await conn.fetchrow(
+            "SELECT id FROM report_groups WHERE id = $1 AND user_id = $2 FOR UPDATE",
             group_id,
             user["id"],
         )
+        if not rg:
+            raise HTTPException(status_code=404, detail="Тайлангийн бүлэг олдсонгүй")
 
-    if result == "DELETE 0":
-        raise HTTPException(status_code=404, detail="Тайлангийн бүлэг олдсонгүй")
+        statement_rows = await conn.fetch(
+            """
+            SELECT s.id FROM statements s
+            JOIN report_group_statements gs ON gs.statement_id = s.id
+            WHERE gs.report_group_id = $1
+            ORDER BY s.id
+            FOR UPDATE OF s
+            """,
+            group_id,
+        )
+        await conn.execute("DELETE FROM report_groups WHERE id = $1", group_id)
+        await delete_unlinked_statements(conn, [row["id"] for row in statement_rows])
 
     return {"deleted": True}
 
@@ -584,7 +725,7 @@ async def delete_report_group(group_id: str, user: dict = Depends(require_auth))
 @app.post(
     "/report-groups/{group_id}/statements",
     response_model=StatementResponse,
-    status_code=201,
+    status_code=202,
 )
 async def upload_statement(
     group_id: str,
@@ -593,7 +734,13 @@ async def upload_statement(
     encryption_iv: Optional[str] = Form(None),
     user: dict = Depends(require_auth),
 ):
-    """Upload and parse a statement file for a report group."""
+    """
+    Upload a statement file for a report group.
+
+    The file is stored with a 'pending' statement and parsed in the
+    background (see jobs.py); the statement's status becomes 'extracted' or
+    'error' once it is processed.
+    """
     # Verify report group exists and belongs to user
     async with get_db() as conn:
         rg = await conn.fetchrow(
@@ -616,76 +763,25 @@ async def upload_statement(
             detail=f"Дэмжигдээгүй файлын формат. Дэмжигдэх форматууд: {supported}",
         )
 
-    content = await file.read()
-    file_size = len(content)
-
-    # Parse the file
-    result = await ParserFactory.parse_file(content, file.filename)
-
-    if result.success:
-        status = "extracted"
-        error_message = None
-        extracted_text = encrypted_text if encrypted_text else result.raw_text
-        bank_name = result.metadata.get("bank_name")
-    else:
-        status = "error"
-        error_message = result.error
-        extracted_text = None
-        bank_name = None
+    spooled = await spool_upload(file)
 
-    async with get_db() as conn:
-        row = await conn.fetchrow(
-            """
-            INSERT INTO statements (
-                user_id, report_group_id, file_name, file_format, file_size,
-                bank_name, encrypted_text, encryption_iv, status, error_message
-            )
-            VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10)
-            RETURNING id, file_name, file_format, file_size, bank_name,
-                      encrypted_text, encryption_iv, status, error_message, created_at
-            """,
-            user["id"],
-            group_id,
-            file.filename,
-            file_format.value,
-            file_size,
-            bank_name,
-            extracted_text,
-            encryption_iv,
-            status,
-            error_message,
-        )
-
-        statement_id = row["id"]
-
-        # If transactions were extracted directly from the file, save them
-        if result.success and result.transactions:
-            for txn in result.transactions:
-                txn_type = "income" if txn.transaction_type == "credit" else "expense"
-                await conn.execute(
-                    """
-                    INSERT INTO transactions (
-                        statement_id, user_id, date, description, amount, type,
-                        is_categorized
-                    )
-                    VALUES ($1, $2, $3, $4, $5, $6, false)
-                    """,
-                    statement_id,
-                    user["id"],
-                    txn.date,
-                    txn.description,
-                    txn.amount,
-                    txn_type,
-                )
-            logger.info(
-                f"Saved {len(result.transactions)} transactions for statement {statement_id}"
+    # Statement and its processing job are created together
+    try:
+        async with get_db() as conn, conn.transaction():
+            row = await create_pending_statement(
+                conn,
+                user["id"],
+                group_id,
+                file.filename,
+                file_format.value,
+                spooled,
+                encrypted_text,
+                encryption_iv,
             )
+    finally:
+        spooled.remove()
 
-        # Update report group's updated_at
-        await conn.execute(
-            "UPDATE report_groups SET updated_at = NOW() WHERE id = $1",
-            group_id,
-        )
+    statement_workers.notify()
 
     return StatementResponse(
         id=str(row["id"]),
@@ -701,6 +797,82 @@ async def upload_statement(
     )
 
 
+@app.post(
+    "/report-groups/{group_id}/statements/batch",
+    response_model=BatchUploadResponse,
+    status_code=202,
+)
+async def upload_statements_batch(
+    group_id: str,
+    files: list[UploadFile] = File(...),
+    user: dict = Depends(require_auth),
+):
+    """
+    Upload many statement files at once, as separate files and/or ZIP archives.
+
+    All accepted files become 'pending' statements in one DB transaction and
+    are parsed concurrently by the statement workers (see upload_statement).
+    Files that cannot be accepted (unsupported format, too large, ...) are
+    reported with an error instead; results are in upload order, with ZIP
+    archives expanded to their members.
+    """
+    # Verify report group exists and belongs to user
+    async with get_db() as conn:
+        rg = await conn.fetchrow(
+            "SELECT id FROM report_groups WHERE id = $1 AND user_id = $2",
+            group_id,
+            user["id"],
+        )
+        if not rg:
+            raise HTTPException(status_code=404, detail="Тайлангийн бүлэг олдсонгүй")
+
+    batch = await read_batch(files)
+
+    results = []
+    try:
+        async with get_db() as conn, conn.transaction():
+            for batch_file in batch:
+                if batch_file.spooled is None:
+                    results.append(
+                        BatchUploadResult(
+                            file_name=batch_file.file_name, error=batch_file.error
+                        )
+                    )
+                    continue
+
+                row = await create_pending_statement(
+                    conn,
+                    user["id"],
+                    group_id,
+                    batch_file.file_name,
+                    ParserFactory.detect_format(batch_file.file_name).value,
+                    batch_file.spooled,
+                )
+                results.append(
+                    BatchUploadResult(
+                        file_name=batch_file.file_name,
+                        statement=StatementResponse(
+                            id=str(row["id"]),
+                            file_name=row["file_name"],
+                            file_format=row["file_format"],
+                            file_size=row["file_size"],
+                            bank_name=row["bank_name"],
+                            encrypted_text=row["encrypted_text"],
+                            encryption_iv=row["encryption_iv"],
+                            status=row["status"],
+                            error_message=row["error_message"],
+                            created_at=row["created_at"].isoformat(),
+                        ),
+                    )
+                )
+    finally:
+        remove_batch(batch)
+
+    statement_workers.notify()
+
+    return BatchUploadResponse(results=results)
+
+
 @app.get("/report-groups/{group_id}/statements", response_model=list[StatementListItem])
 async def list_statements(group_id: str, user: dict = Depends(require_auth)):
     """List all statements in a report group."""
@@ -716,11 +888,12 @@ async def list_statements(group_id: str, user: dict = Depends(require_auth)):
 
         rows = await conn.fetch(
             """
-            SELECT id, file_name, file_format, file_size, bank_name, status,
-                   error_message, created_at
-            FROM statements
-            WHERE report_group_id = $1
-            ORDER BY created_at ASC
+            SELECT s.id, s.file_name, s.file_format, s.file_size, s.bank_name,
+                   s.status, s.error_message, s.created_at
+            FROM statements s
+            JOIN report_group_statements gs ON gs.statement_id = s.id
+            WHERE gs.report_group_id = $1
+            ORDER BY s.created_at ASC
             """,
             group_id,
         )
@@ -752,11 +925,13 @@ async def get_statement(
         row = await conn.fetchrow(
             """
             SELECT s.id, s.file_name, s.file_format, s.file_size, s.bank_name,
-                   s.encrypted_text, s.encryption_iv, s.status, s.error_message,
-                   s.created_at
+                   b.content AS encrypted_text, s.encryption_iv, s.status,
+                   s.error_message, s.created_at
             FROM statements s
-            JOIN report_groups rg ON rg.id = s.report_group_id
-            WHERE s.id = $1 AND s.report_group_id = $2 AND rg.user_id = $3
+            JOIN report_group_statements gs ON gs.statement_id = s.id
+            JOIN report_groups rg ON rg.id = gs.report_group_id
+            LEFT JOIN statement_blobs b ON b.sha256 = s.text_sha256
+            WHERE s.id = $1 AND gs.report_group_id = $2 AND rg.user_id = $3
             """,
             statement_id,
             group_id,
@@ -784,24 +959,44 @@ async def get_statement(
 async def delete_statement(
     group_id: str, statement_id: str, user: dict = Depends(require_auth)
 ):
-    """Remove a statement from a report group."""
-    async with get_db() as conn:
-        # Verify ownership through report group
+    """
+    Remove a statement from a report group; it is deleted once it is in no
+    report group (extended reports share their statements).
+    """
+    async with get_db() as conn, conn.transaction():
+        # Verify ownership through report group. The group, then the
+        # statement, are locked as the statement workers lock them; with the
+        # statement locked, concurrent removals from its groups see each
+        # other and the last one deletes it.
+        rg = await conn.fetchrow(
+            """
+            SELECT id FROM report_groups
+            WHERE id = $1 AND user_id = $2
+            FOR NO KEY UPDATE
+            """,
+            group_id,
+            user["id"],
+        )
+        if not rg:
+            raise HTTPException(status_code=404, detail="Хуулга олдсонгүй")
+
+        await conn.execute(
+            "SELECT 1 FROM statements WHERE id = $1 FOR UPDATE", statement_id
+        )
         result = await conn.execute(
             """
-            DELETE FROM statements s
-            USING report_groups rg
-            WHERE s.id = $1 AND s.report_group_id = $2
-              AND rg.id = s.report_group_id AND rg.user_id = $3
+            DELETE FROM report_group_statements
+            WHERE statement_id = $1 AND report_group_id = $2
             """,
             statement_id,
             group_id,
-            user["id"],
         )
 
         if result == "DELETE 0":
             raise HTTPException(status_code=404, detail="Хуулга олдсонгүй")
 
+        await delete_unlinked_statements(conn, [statement_id])
+
         # Update report group's updated_at
         await conn.execute(
             "UPDATE report_groups SET updated_at = NOW() WHERE id = $1",
@@ -814,6 +1009,11 @@ async def delete_statement(
 # --- Combined Analysis ---
 
 
+def _statement_heading(row) -> str:
+    """Separator put before a statement's text in a group's combined text."""
+    return f"\n--- {row['file_name']} ({row['bank_name'] or 'Unknown'}) ---\n"
+
+
 @app.post("/report-groups/{group_id}/analyze")
 async def analyze_report_group(group_id: str, user: dict = Depends(require_auth)):
     """
@@ -833,10 +1033,12 @@ async def analyze_report_group(group_id: str, user: dict = Depends(require_auth)
         # Get all successfully extracted statements
         rows = await conn.fetch(
             """
-            SELECT id, file_name, bank_name, encrypted_text
-            FROM statements
-            WHERE report_group_id = $1 AND status = 'extracted'
-            ORDER BY created_at ASC
+            SELECT s.id, s.file_name, s.bank_name, b.content AS encrypted_text
+            FROM statements s
+            JOIN report_group_statements gs ON gs.statement_id = s.id
+            LEFT JOIN statement_blobs b ON b.sha256 = s.text_sha256
+            WHERE gs.report_group_id = $1 AND s.status = 'extracted'
+            ORDER BY s.created_at ASC
             """,
             group_id,
         )
@@ -850,9 +1052,7 @@ async def analyze_report_group(group_id: str, user: dict = Depends(require_auth)
     # Combine all statement texts
     combined_parts = []
     for row in rows:
-        combined_parts.append(
-            f"\n--- {row['file_name']} ({row['bank_name'] or 'Unknown'}) ---\n"
-        )
+        combined_parts.append(_statement_heading(row))
         combined_parts.append(row["encrypted_text"] or "")
 
     combined_text = "\n".join(combined_parts)
@@ -865,6 +1065,70 @@ async def analyze_report_group(group_id: str, user: dict = Depends(require_auth)
     }
 
 
+async def _stream_combined_text(group_id: str):
+    """
+    Yield a report group's combined text (as in analyze_report_group) one
+    statement at a time, read through a server-side cursor.
+    """
+    async with get_db() as conn, conn.transaction(readonly=True):
+        separator = ""
+        async for row in conn.cursor(
+            """
+            SELECT s.file_name, s.bank_name, b.content AS encrypted_text
+            FROM statements s
+            JOIN report_group_statements gs ON gs.statement_id = s.id
+            LEFT JOIN statement_blobs b ON b.sha256 = s.text_sha256
+            WHERE gs.report_group_id = $1 AND s.status = 'extracted'
+            ORDER BY s.created_at ASC
+            """,
+            group_id,
+            prefetch=1,
+        ):
+            yield separator + _statement_heading(row) + "\n"
+            yield row["encrypted_text"] or ""
+            separator = "\n"
+
+
+@app.post("/report-groups/{group_id}/analyze/stream")
+async def stream_report_group_text(group_id: str, user: dict = Depends(require_auth)):
+    """
+    Stream the combined text of /analyze as plain text.
+
+    Statements are sent as they are read, so only one statement's text is
+    held in memory and the response starts before the last one is read.
+    """
+    async with get_db() as conn:
+        # Verify report group exists and belongs to user
+        rg = await conn.fetchrow(
+            "SELECT id FROM report_groups WHERE id = $1 AND user_id = $2",
+            group_id,
+            user["id"],
+        )
+        if not rg:
+            raise HTTPException(status_code=404, detail="Тайлангийн бүлэг олдсонгүй")
+
+        has_statements = await conn.fetchval(
+            """
+            SELECT EXISTS (
+                SELECT 1 FROM statements s
+                JOIN report_group_statements gs ON gs.statement_id = s.id
+                WHERE gs.report_group_id = $1 AND s.status = 'extracted'
+            )
+            """,
+            group_id,
+        )
+
+    if not has_statements:
+        raise HTTPException(
+            status_code=400,
+            detail="Шинжлэх хуулга олдсонгүй. Хуулга оруулна уу.",
+        )
+
+    return StreamingResponse(
+        _stream_combined_text(group_id), media_type="text/plain; charset=utf-8"
+    )
+
+
 @app.post("/report-groups/{group_id}/save-result")
 async def save_report_result(
     group_id: str,
@@ -896,14 +1160,24 @@ async def save_report_result(
 
 @app.post("/report-groups/{group_id}/extend", response_model=ReportGroupResponse)
 async def extend_report(group_id: str, user: dict = Depends(require_auth)):
-    """Create a new report group extending an existing one."""
-    async with get_db() as conn:
-        # Get original report group
+    """
+    Create a new report group extending an existing one.
+
+    The new group shares the original's statements (with their texts and
+    transactions) rather than copying them, so extending is one row per
+    statement in report_group_statements however large the statements are.
+    A statement is copied only once either group changes its transactions
+    (detach_statements).
+    """
+    async with get_db() as conn, conn.transaction():
+        # Get original report group; locked so its statements are read after
+        # a concurrent detach_statements moved them
         original = await conn.fetchrow(
             """
             SELECT id, name, description
             FROM report_groups
             WHERE id = $1 AND user_id = $2
+            FOR SHARE
             """,
             group_id,
             user["id"],
@@ -927,32 +1201,29 @@ async def extend_report(group_id: str, user: dict = Depends(require_auth)):
             group_id,
         )
 
-        # Copy statements to new group
+        # Share the statements with the new group
         await conn.execute(
             """
-            INSERT INTO statements (
-                user_id, report_group_id, file_name, file_format, file_size,
-                bank_name, encrypted_text, encryption_iv, status
-            )
-            SELECT user_id, $1, file_name, file_format, file_size,
-                   bank_name, encrypted_text, encryption_iv, status
-            FROM statements
+            INSERT INTO report_group_statements (report_group_id, statement_id)
+            SELECT $1, statement_id
+            FROM report_group_statements
             WHERE report_group_id = $2
             """,
-            str(new_row["id"]),
+            new_row["id"],
             group_id,
         )
 
-        # Get copied statements
+        # Get shared statements
         statement_rows = await conn.fetch(
             """
-            SELECT id, file_name, file_format, file_size, bank_name, status,
-                   error_message, created_at
-            FROM statements
-            WHERE report_group_id = $1
-            ORDER BY created_at ASC
+            SELECT s.id, s.file_name, s.file_format, s.file_size, s.bank_name,
+                   s.status, s.error_message, s.created_at
+            FROM statements s
+            JOIN report_group_statements gs ON gs.statement_id = s.id
+            WHERE gs.report_group_id = $1
+            ORDER BY s.created_at ASC
             """,
-            str(new_row["id"]),
+            new_row["id"],
         )
 
     statements = [
@@ -1093,9 +1364,7 @@ async def get_statement_transactions(
         # Verify statement belongs to user
         stmt = await conn.fetchrow(
             """
-            SELECT s.id FROM statements s
-            JOIN report_groups rg ON rg.id = s.report_group_id
-            WHERE s.id = $1 AND rg.user_id = $2
+            SELECT id FROM statements WHERE id = $1 AND user_id = $2
             """,
             statement_id,
             user["id"],
@@ -1156,24 +1425,35 @@ async def get_statement_transactions(
     status_code=201,
 )
 async def create_transaction(
-    statement_id: str, data: TransactionCreate, user: dict = Depends(require_auth)
+    statement_id: str,
+    data: TransactionCreate,
+    report_group_id: Optional[str] = None,
+    user: dict = Depends(require_auth),
 ):
-    """Manually add a transaction to a statement."""
+    """
+    Manually add a transaction to a statement.
+
+    Transaction writes made from a report group (report_group_id) are seen
+    by that group only: a statement it shares with extended reports is
+    copied for the others first (detach_statements).
+    """
     from datetime import date as date_type
 
-    async with get_db() as conn:
+    async with get_db() as conn, conn.transaction():
         # Verify statement belongs to user
         stmt = await conn.fetchrow(
             """
-            SELECT s.id FROM statements s
-            JOIN report_groups rg ON rg.id = s.report_group_id
-            WHERE s.id = $1 AND rg.user_id = $2
+            SELECT id FROM statements WHERE id = $1 AND user_id = $2
             """,
             statement_id,
             user["id"],
         )
         if not stmt:
             raise HTTPException(status_code=404, detail="Хуулга олдсонгүй")
+        if report_group_id and not await detach_statements(
+            conn, [statement_id], report_group_id
+        ):
+            raise HTTPException(status_code=404, detail="Хуулга олдсонгүй")
 
         # Validate type
         if data.type not in ("income", "expense"):
@@ -1241,20 +1521,31 @@ async def create_transaction(
 
 @app.put("/transactions/{transaction_id}", response_model=TransactionResponse)
 async def update_transaction(
-    transaction_id: str, data: TransactionUpdate, user: dict = Depends(require_auth)
+    transaction_id: str,
+    data: TransactionUpdate,
+    report_group_id: Optional[str] = None,
+    user: dict = Depends(require_auth),
 ):
-    """Update a transaction (e.g., assign category)."""
+    """Update a transaction (e.g., assign category); see create_transaction."""
     from datetime import date as date_type
 
-    async with get_db() as conn:
+    async with get_db() as conn, conn.transaction():
         # Verify transaction belongs to user
         txn = await conn.fetchrow(
-            "SELECT id FROM transactions WHERE id = $1 AND user_id = $2",
+            "SELECT id, statement_id FROM transactions WHERE id = $1 AND user_id = $2",
             transaction_id,
             user["id"],
         )
         if not txn:
             raise HTTPException(status_code=404, detail="Гүйлгээ олдсонгүй")
+        if (
+            report_group_id
+            and txn["statement_id"]
+            and not await detach_statements(
+                conn, [txn["statement_id"]], report_group_id
+            )
+        ):
+            raise HTTPException(status_code=404, detail="Гүйлгээ олдсонгүй")
 
         # Build dynamic update
         updates = ["updated_at = NOW()"]
@@ -1358,9 +1649,24 @@ async def update_transaction(
 
 
 @app.delete("/transactions/{transaction_id}")
-async def delete_transaction(transaction_id: str, user: dict = Depends(require_auth)):
-    """Delete a transaction."""
-    async with get_db() as conn:
+async def delete_transaction(
+    transaction_id: str,
+    report_group_id: Optional[str] = None,
+    user: dict = Depends(require_auth),
+):
+    """Delete a transaction; see create_transaction."""
+    async with get_db() as conn, conn.transaction():
+        if report_group_id:
+            statement_id = await conn.fetchval(
+                "SELECT statement_id FROM transactions WHERE id = $1 AND user_id = $2",
+                transaction_id,
+                user["id"],
+            )
+            if statement_id and not await detach_statements(
+                conn, [statement_id], report_group_id
+            ):
+                raise HTTPException(status_code=404, detail="Гүйлгээ олдсонгүй")
+
         result = await conn.execute(
             "DELETE FROM transactions WHERE id = $1 AND user_id = $2",
             transaction_id,
@@ -1389,58 +1695,64 @@ class BulkCreateRequest(BaseModel):
 async def bulk_create_transactions(
     statement_id: str,
     data: BulkCreateRequest,
+    report_group_id: Optional[str] = None,
     user: dict = Depends(require_auth),
 ):
-    """Bulk create transactions for a statement (from AI parsing)."""
+    """
+    Bulk create transactions for a statement (from AI parsing); see
+    create_transaction.
+    """
     from datetime import date as date_type
 
-    async with get_db() as conn:
+    # Columns of the rows to insert (rows with an invalid type or date are skipped)
+    dates, descriptions, amounts, types, category_ids = [], [], [], [], []
+    for txn in data.transactions:
+        if txn.type not in ("income", "expense"):
+            continue
+
+        # Parse date string to date object
+        try:
+            txn_date = date_type.fromisoformat(txn.date)
+        except ValueError:
+            # Try to parse common date formats
+            try:
+                txn_date = datetime.strptime(txn.date, "%Y-%m-%d").date()
+            except ValueError:
+                continue  # Skip invalid dates
+
+        dates.append(txn_date)
+        descriptions.append(txn.description)
+        amounts.append(txn.amount)
+        types.append(txn.type)
+        category_ids.append(txn.ai_suggested_category_id)
+
+    async with get_db() as conn, conn.transaction():
         # Verify statement belongs to user
         stmt = await conn.fetchrow(
             """
-            SELECT s.id FROM statements s
-            JOIN report_groups rg ON rg.id = s.report_group_id
-            WHERE s.id = $1 AND rg.user_id = $2
+            SELECT id FROM statements WHERE id = $1 AND user_id = $2
             """,
             statement_id,
             user["id"],
         )
         if not stmt:
             raise HTTPException(status_code=404, detail="Хуулга олдсонгүй")
+        if report_group_id and not await detach_statements(
+            conn, [statement_id], report_group_id
+        ):
+            raise HTTPException(status_code=404, detail="Хуулга олдсонгүй")
 
-        created_ids = []
-        for txn in data.transactions:
-            if txn.type not in ("income", "expense"):
-                continue
-
-            # Parse date string to date object
-            try:
-                txn_date = date_type.fromisoformat(txn.date)
-            except ValueError:
-                # Try to parse common date formats
-                try:
-                    txn_date = datetime.strptime(txn.date, "%Y-%m-%d").date()
-                except ValueError:
-                    continue  # Skip invalid dates
-
-            row = await conn.fetchrow(
-                """
-                INSERT INTO transactions (
-                    statement_id, user_id, date, description, amount, type,
-                    ai_suggested_category_id, is_categorized
-                )
-                VALUES ($1, $2, $3, $4, $5, $6, $7, false)
-                RETURNING id
-                """,
-                statement_id,
-                user["id"],
-                txn_date,
-                txn.description,
-                txn.amount,
-                txn.type,
-                txn.ai_suggested_category_id,
-            )
-            created_ids.append(str(row["id"]))
+        created_ids = await insert_transactions(
+            conn,
+            statement_id,
+            user["id"],
+            dates,
+            descriptions,
+            amounts,
+            types,
+            ai_suggested_category_ids=category_ids,
+            return_ids=True,
+        )
 
     return {"created": len(created_ids), "ids": created_ids}
 
@@ -1453,13 +1765,31 @@ class BulkUpdateRequest(BaseModel):
 @app.post("/transactions/bulk-update")
 async def bulk_update_transactions(
     data: BulkUpdateRequest,
+    report_group_id: Optional[str] = None,
     user: dict = Depends(require_auth),
 ):
-    """Bulk update multiple transactions with the same category."""
+    """
+    Bulk update multiple transactions with the same category; see
+    create_transaction.
+    """
     if not data.transaction_ids:
         raise HTTPException(status_code=400, detail="Гүйлгээ сонгоогүй байна")
 
-    async with get_db() as conn:
+    async with get_db() as conn, conn.transaction():
+        if report_group_id:
+            statement_ids = await conn.fetch(
+                """
+                SELECT DISTINCT statement_id FROM transactions
+                WHERE id = ANY($1) AND user_id = $2 AND statement_id IS NOT NULL
+                """,
+                data.transaction_ids,
+                user["id"],
+            )
+            if not await detach_statements(
+                conn, [row["statement_id"] for row in statement_ids], report_group_id
+            ):
+                raise HTTPException(status_code=404, detail="Гүйлгээ олдсонгүй")
+
         # Update all transactions that belong to user
         result = await conn.execute(
             """
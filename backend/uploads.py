@@ -0,0 +1,403 @@
+"""
+Reading uploaded files: spooling them to disk, and the files of a batch
+upload (many files and/or ZIP archives).
+
+Request bodies are cut off with 413 once they pass max_request_bytes
+(RequestSizeLimit), whether or not they declare a Content-Length. Starlette
+spools a multipart body to its own temporary file (in memory up to 1 MB)
+before the endpoint runs; each uploaded file is then copied from there to a
+named spool file in chunks, hashed (SHA-256, the parse cache key) and
+size-checked on the way, and parsers read that file through a memory map.
+"""
+
+import asyncio
+import hashlib
+import os
+import tempfile
+import zipfile
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import BinaryIO, Iterator, Optional
+
+from fastapi import UploadFile
+from fastapi.responses import JSONResponse
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from parsers import FileContent, MappedFile, ParserFactory, map_file
+
+# Largest file accepted, per upload and per file of a batch (ZIP members
+# included), in bytes
+UPLOAD_MAX_BYTES = int(os.environ.get("UPLOAD_MAX_BYTES", str(50 * 1024 * 1024)))
+# Directory uploads are spooled to while they are parsed or queued (default:
+# the system temp directory)
+UPLOAD_SPOOL_DIR = os.environ.get("UPLOAD_SPOOL_DIR") or None
+# Files accepted per batch (ZIP members count individually; rejected files
+# do not count)
+BATCH_MAX_FILES = int(os.environ.get("BATCH_MAX_FILES", "50"))
+# Zip bomb bounds per batch, across all of its ZIP archives: entries read
+# (folders and rejected members included) and bytes decompressed
+BATCH_MAX_ZIP_ENTRIES = int(os.environ.get("BATCH_MAX_ZIP_ENTRIES", "1000"))
+BATCH_MAX_ZIP_BYTES = int(
+    os.environ.get("BATCH_MAX_ZIP_BYTES", str(BATCH_MAX_FILES * UPLOAD_MAX_BYTES))
+)
+
+SPOOL_CHUNK_BYTES = 1024 * 1024
+
+
+class UploadTooLargeError(Exception):
+    """An uploaded file is over UPLOAD_MAX_BYTES."""
+
+    def __init__(self, max_bytes: int = UPLOAD_MAX_BYTES):
+        self.max_bytes = max_bytes
+        super().__init__(_too_large(max_bytes))
+
+
+@dataclass
+class SpooledFile:
+    """An upload spooled to disk; remove() it once it is parsed or stored."""
+
+    path: str
+    size: int
+    sha256: str
+
+    @contextmanager
+    def mapped(self) -> Iterator[FileContent]:
+        """The file's content as a read-only memory map (for the parsers)."""
+        content = map_file(self.path)
+        try:
+            yield content
+        finally:
+            if isinstance(content, MappedFile):
+                try:
+                    content.close()
+                except BufferError:
+                    # Still exported by a parse that outlived its time
+                    # budget; unmapped when that lets go of it
+                    pass
+
+    def chunks(self, chunk_size: int = SPOOL_CHUNK_BYTES) -> Iterator[bytes]:
+        """Read the file in chunks."""
+        with open(self.path, "rb") as f:
+            while chunk := f.read(chunk_size):
+                yield chunk
+
+    def remove(self) -> None:
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+
+class SpoolWriter:
+    """
+    Write a spool file chunk by chunk, hashing it and enforcing max_bytes.
+
+    The spool file keeps the upload's extension (openpyxl checks the
+    extension of a path).
+    """
+
+    def __init__(self, file_name: str, max_bytes: Optional[int] = UPLOAD_MAX_BYTES):
+        extension = os.path.splitext(file_name)[1].lower()
+        if extension[1:] not in ParserFactory.get_supported_extensions():
+            extension = ""
+        fd, self.path = tempfile.mkstemp(
+            prefix="upload-", suffix=extension, dir=UPLOAD_SPOOL_DIR
+        )
+        self._file = os.fdopen(fd, "wb")
+        self._digest = hashlib.sha256()
+        self.max_bytes = max_bytes
+        self.size = 0
+
+    def write(self, chunk: bytes) -> None:
+        self.size += len(chunk)
+        if self.max_bytes is not None and self.size > self.max_bytes:
+            raise UploadTooLargeError(self.max_bytes)
+        self._digest.update(chunk)
+        self._file.write(chunk)
+
+    def close(self) -> SpooledFile:
+        """Finish the file."""
+        self._file.close()
+        return SpooledFile(self.path, self.size, self._digest.hexdigest())
+
+    def discard(self) -> None:
+        """Delete the file (after an error)."""
+        self._file.close()
+        SpooledFile(self.path, self.size, "").remove()
+
+
+def spool_file(
+    source: BinaryIO, file_name: str, max_bytes: Optional[int] = UPLOAD_MAX_BYTES
+) -> SpooledFile:
+    """
+    Copy a file object to a spool file in SPOOL_CHUNK_BYTES chunks.
+
+    Raises:
+        UploadTooLargeError: source is over max_bytes; nothing past the
+            limit is read, and the partial spool file is deleted
+    """
+    writer = SpoolWriter(file_name, max_bytes)
+    try:
+        while chunk := source.read(SPOOL_CHUNK_BYTES):
+            writer.write(chunk)
+    except BaseException:
+        writer.discard()
+        raise
+    return writer.close()
+
+
+async def spool_upload(
+    upload: UploadFile, max_bytes: int = UPLOAD_MAX_BYTES
+) -> SpooledFile:
+    """
+    Copy an uploaded file to a spool file (see spool_file).
+
+    Starlette has already written the upload to its own temporary file,
+    which has no path to map; this is the one copy made of it.
+
+    Raises:
+        UploadTooLargeError: the file is over max_bytes
+    """
+    if upload.size is not None and upload.size > max_bytes:
+        raise UploadTooLargeError(max_bytes)
+    return await asyncio.to_thread(
+        spool_file, upload.file, upload.filename or "", max_bytes
+    )
+
+
+def max_request_bytes(path: str) -> int:
+    """
+    Largest request body accepted for an upload endpoint: its files at
+    UPLOAD_MAX_BYTES each, plus as much again for form fields such as
+    encrypted_text and multipart overhead.
+    """
+    if path.endswith("/statements/batch"):
+        return BATCH_MAX_FILES * UPLOAD_MAX_BYTES + UPLOAD_MAX_BYTES
+    return 2 * UPLOAD_MAX_BYTES
+
+
+class RequestSizeLimit:
+    """
+    ASGI middleware rejecting POST bodies over max_request_bytes with 413.
+
+    A declared Content-Length is checked before anything is read; otherwise
+    (chunked requests) bytes are counted as they are received, and once the
+    limit is crossed the 413 is sent and the application sees the client
+    disconnect, so at most the limit is ever buffered.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] != "POST":
+            await self.app(scope, receive, send)
+            return
+
+        limit = max_request_bytes(scope["path"])
+        content_length = Headers(scope=scope).get("content-length")
+        if content_length and content_length.isdigit() and int(content_length) > limit:
+            await _request_too_large(scope, receive, send)
+            return
+
+        received = 0
+        rejected = False
+        response_started = False
+
+        async def limited_receive() -> Message:
+            nonlocal received, rejected
+            if rejected:
+                return {"type": "http.disconnect"}
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    rejected = True
+                    if not response_started:
+                        await _request_too_large(scope, receive, send)
+                    return {"type": "http.disconnect"}
+            return message
+
+        async def guarded_send(message: Message) -> None:
+            nonlocal response_started
+            # Whatever the application answers to the disconnect is dropped
+            if rejected:
+                return
+            response_started = True
+            await send(message)
+
+        await self.app(scope, limited_receive, guarded_send)
+
+
+async def _request_too_large(scope: Scope, receive: Receive, send: Send) -> None:
+    response = JSONResponse(status_code=413, content={"detail": "Хүсэлт хэт том байна"})
+    await response(scope, receive, send)
+
+
+@dataclass
+class BatchFile:
+    """One file of a batch: its spool file, or why it was not accepted."""
+
+    file_name: str
+    spooled: Optional[SpooledFile] = None
+    error: Optional[str] = None
+
+
+@dataclass
+class BatchLimits:
+    """What is left of a batch upload's limits as its files are read."""
+
+    files: int = BATCH_MAX_FILES
+    zip_entries: int = BATCH_MAX_ZIP_ENTRIES
+    zip_bytes: int = BATCH_MAX_ZIP_BYTES
+
+
+def is_zip(filename: str) -> bool:
+    """Check if a file is a ZIP archive by its extension."""
+    return filename.lower().endswith(".zip")
+
+
+def _too_many_files() -> str:
+    return f"Нэг удаад {BATCH_MAX_FILES}-аас олон файл байршуулах боломжгүй"
+
+
+def _too_many_zip_entries() -> str:
+    return (
+        f"Нэг удаад ZIP файлуудаас {BATCH_MAX_ZIP_ENTRIES}-аас олон файл "
+        "задлах боломжгүй"
+    )
+
+
+def _zip_too_large() -> str:
+    limit_mb = BATCH_MAX_ZIP_BYTES // (1024 * 1024)
+    return f"Нэг удаад ZIP файлуудаас {limit_mb} MB-аас их задлах боломжгүй"
+
+
+def _too_large(max_bytes: int = UPLOAD_MAX_BYTES) -> str:
+    limit_mb = max_bytes // (1024 * 1024)
+    return f"Файл {limit_mb} MB-аас их байна"
+
+
+def _unsupported_format(file_name: str) -> Optional[BatchFile]:
+    if ParserFactory.detect_format(file_name):
+        return None
+    supported = ", ".join(ParserFactory.get_supported_extensions())
+    return BatchFile(
+        file_name,
+        error=f"Дэмжигдээгүй файлын формат. Дэмжигдэх форматууд: {supported}",
+    )
+
+
+def _spooled_file(source: BinaryIO, file_name: str, limits: BatchLimits) -> BatchFile:
+    """Spool a file of a supported format, if it is small enough and fits the batch."""
+    unsupported = _unsupported_format(file_name)
+    if unsupported:
+        return unsupported
+    if limits.files <= 0:
+        return BatchFile(file_name, error=_too_many_files())
+    try:
+        spooled = spool_file(source, file_name)
+    except UploadTooLargeError:
+        return BatchFile(file_name, error=_too_large())
+    limits.files -= 1
+    return BatchFile(file_name, spooled)
+
+
+def read_zip_members(
+    archive: BinaryIO, archive_name: str, limits: BatchLimits
+) -> list[BatchFile]:
+    """
+    Spool the statement files of a ZIP archive, within the batch's limits.
+
+    Members are decompressed one at a time, straight to their spool files.
+    A member whose header declares more than UPLOAD_MAX_BYTES, or more than
+    is left of limits.zip_bytes, is rejected without being inflated, and
+    zipfile inflates no member past its declared size. Only accepted members
+    count toward limits.files; members past it, or of an unsupported format,
+    are not decompressed at all. Every entry counts toward
+    limits.zip_entries, and reading stops once it runs out. Folders, hidden
+    files and macOS metadata are skipped.
+    """
+    try:
+        zf = zipfile.ZipFile(archive)
+    except zipfile.BadZipFile:
+        return [BatchFile(archive_name, error="ZIP файл уншихад алдаа гарлаа")]
+
+    files = []
+    with zf:
+        for info in zf.infolist():
+            if limits.zip_entries <= 0:
+                files.append(BatchFile(archive_name, error=_too_many_zip_entries()))
+                break
+            limits.zip_entries -= 1
+
+            file_name = os.path.basename(info.filename)
+            if (
+                info.is_dir()
+                or not file_name
+                or file_name.startswith(".")
+                or info.filename.startswith("__MACOSX/")
+            ):
+                continue
+
+            unsupported = _unsupported_format(file_name)
+            if unsupported:
+                files.append(unsupported)
+                continue
+            if limits.files <= 0:
+                files.append(BatchFile(file_name, error=_too_many_files()))
+                continue
+            if info.file_size > UPLOAD_MAX_BYTES:
+                files.append(BatchFile(file_name, error=_too_large()))
+                continue
+            if info.file_size > limits.zip_bytes:
+                files.append(BatchFile(file_name, error=_zip_too_large()))
+                continue
+            # zipfile inflates no more than the size the header declares
+            limits.zip_bytes -= info.file_size
+
+            try:
+                with zf.open(info) as member:
+                    files.append(_spooled_file(member, file_name, limits))
+            except (zipfile.BadZipFile, RuntimeError, NotImplementedError) as e:
+                # Corrupt member, encrypted member or unsupported compression
+                files.append(
+                    BatchFile(file_name, error=f"ZIP файл уншихад алдаа гарлаа: {e}")
+                )
+    return files
+
+
+def _read_batch(uploads: list[UploadFile]) -> list[BatchFile]:
+    files: list[BatchFile] = []
+    limits = BatchLimits()
+    try:
+        for upload in uploads:
+            file_name = upload.filename or ""
+            if is_zip(file_name):
+                files.extend(read_zip_members(upload.file, file_name, limits))
+            else:
+                files.append(_spooled_file(upload.file, file_name, limits))
+    except BaseException:
+        remove_batch(files)
+        raise
+    return files
+
+
+async def read_batch(uploads: list[UploadFile]) -> list[BatchFile]:
+    """
+    Spool the files of a batch upload in order, expanding ZIP archives.
+
+    Files past BATCH_MAX_FILES accepted ones, and ZIP members past
+    BATCH_MAX_ZIP_ENTRIES or BATCH_MAX_ZIP_BYTES, are returned unread, with
+    an error. The caller removes the spool files (remove_batch) once they
+    are stored.
+    """
+    return await asyncio.to_thread(_read_batch, uploads)
+
+
+def remove_batch(files: list[BatchFile]) -> None:
+    """Delete the spool files of a batch."""
+    for batch_file in files:
+        if batch_file.spooled:
+            batch_file.spooled.remove()
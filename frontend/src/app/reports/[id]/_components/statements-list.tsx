@@ -1,6 +1,6 @@
 "use client";
 
-import { Trash2 } from "lucide-react";
+import { Loader2, Trash2 } from "lucide-react";
 import { Button } from "@/components/ui/button";
 import {
   Card,
@@ -52,6 +52,12 @@ export function StatementsList({ statements, onDeleteStatement }: StatementsList
                 </div>
               </div>
               <div className="flex items-center gap-2">
+                {statement.status === "pending" && (
+                  <Badge variant="outline" className="text-xs">
+                    <Loader2 className="w-3 h-3 animate-spin mr-1" />
+                    Боловсруулж байна
+                  </Badge>
+                )}
                 {statement.status === "error" && (
                   <Badge variant="destructive" className="text-xs">
                     Алдаа
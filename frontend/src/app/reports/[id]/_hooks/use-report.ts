@@ -13,6 +13,10 @@ import {
 } from "@/lib/api/reports";
 import { analyzeText } from "@/actions/analyze-pdf";
 
+// How often the report is reloaded while uploaded statements are still
+// being processed on the server
+const PENDING_POLL_INTERVAL_MS = 2000;
+
 export function useReport(reportId: string) {
   const { data: session, status: sessionStatus } = useSession();
   const router = useRouter();
@@ -53,6 +57,17 @@ export function useReport(reportId: string) {
     loadReport();
   }, [session, sessionStatus, router, loadReport]);
 
+  // Uploads are processed in the background (the statement stays "pending"
+  // until then), so keep reloading until none is left pending
+  const hasPendingStatements =
+    report?.statements.some((s) => s.status === "pending") ?? false;
+
+  useEffect(() => {
+    if (!hasPendingStatements) return;
+    const timer = setTimeout(loadReport, PENDING_POLL_INTERVAL_MS);
+    return () => clearTimeout(timer);
+  }, [report, hasPendingStatements, loadReport]);
+
   const handleAnalyze = useCallback(async () => {
     if (!accessToken || !report) return;
 
@@ -61,10 +76,10 @@ export function useReport(reportId: string) {
 
     try {
       // Get combined text from server
-      const { combined_text } = await getCombinedText(accessToken, reportId);
+      const combinedText = await getCombinedText(accessToken, reportId);
 
       // Analyze with Gemini (via server action)
-      const analysisResult = await analyzeText(combined_text);
+      const analysisResult = await analyzeText(combinedText);
 
       if (!analysisResult.success) {
         throw new Error(analysisResult.error);
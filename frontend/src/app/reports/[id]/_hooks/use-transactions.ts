@@ -16,9 +16,10 @@ import { parseTransactions } from "@/actions/parse-transactions";
 interface UseTransactionsOptions {
   statementId?: string;
   statementText?: string;
+  reportGroupId?: string;
 }
 
-export function useTransactions({ statementId, statementText }: UseTransactionsOptions) {
+export function useTransactions({ statementId, statementText, reportGroupId }: UseTransactionsOptions) {
   const { data: session } = useSession();
   const accessToken = (session as any)?.accessToken;
 
@@ -94,7 +95,7 @@ export function useTransactions({ statementId, statementText }: UseTransactionsO
         ai_suggested_category_id: p.suggested_category_id,
       }));
 
-      await bulkCreateTransactions(accessToken, statementId, toCreate);
+      await bulkCreateTransactions(accessToken, statementId, toCreate, reportGroupId);
       await loadTransactions();
       return true;
     } catch (err) {
@@ -103,7 +104,7 @@ export function useTransactions({ statementId, statementText }: UseTransactionsO
     } finally {
       setIsLoading(false);
     }
-  }, [accessToken, statementId, loadTransactions]);
+  }, [accessToken, statementId, reportGroupId, loadTransactions]);
 
   // Update single transaction
   const handleUpdateTransaction = useCallback(async (
@@ -115,14 +116,14 @@ export function useTransactions({ statementId, statementText }: UseTransactionsO
     try {
       const updated = await updateTransaction(accessToken, transactionId, {
         category_id: categoryId || undefined,
-      });
+      }, reportGroupId);
       setTransactions((prev) =>
         prev.map((t) => (t.id === transactionId ? updated : t))
       );
     } catch (err) {
       setError(err instanceof Error ? err.message : "Алдаа гарлаа");
     }
-  }, [accessToken]);
+  }, [accessToken, reportGroupId]);
 
   // Bulk update transactions
   const handleBulkUpdate = useCallback(async (
@@ -132,25 +133,25 @@ export function useTransactions({ statementId, statementText }: UseTransactionsO
     if (!accessToken || transactionIds.length === 0) return;
 
     try {
-      await bulkUpdateTransactions(accessToken, transactionIds, categoryId);
+      await bulkUpdateTransactions(accessToken, transactionIds, categoryId, reportGroupId);
       // Refresh to get updated data
       await loadTransactions();
     } catch (err) {
       setError(err instanceof Error ? err.message : "Алдаа гарлаа");
     }
-  }, [accessToken, loadTransactions]);
+  }, [accessToken, reportGroupId, loadTransactions]);
 
   // Delete transaction
   const handleDeleteTransaction = useCallback(async (transactionId: string) => {
     if (!accessToken) return;
 
     try {
-      await deleteTransaction(accessToken, transactionId);
+      await deleteTransaction(accessToken, transactionId, reportGroupId);
       setTransactions((prev) => prev.filter((t) => t.id !== transactionId));
     } catch (err) {
       setError(err instanceof Error ? err.message : "Алдаа гарлаа");
     }
-  }, [accessToken]);
+  }, [accessToken, reportGroupId]);
 
   // Load categories on mount
   useEffect(() => {
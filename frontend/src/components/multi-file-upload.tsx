@@ -38,6 +38,12 @@ interface ProcessedFile {
   statementId?: string;
 }
 
+interface BatchUploadResult {
+  file_name: string;
+  statement: { id: string } | null;
+  error: string | null;
+}
+
 interface MultiFileUploadProps {
   reportGroupId: string;
   onUploadComplete?: (statementIds: string[]) => void;
@@ -160,38 +166,32 @@ export function MultiFileUpload({
     [files, onFilesChange],
   );
 
-  const uploadFile = async (
-    processedFile: ProcessedFile,
-  ): Promise<string | null> => {
+  const uploadBatch = async (
+    processedFiles: ProcessedFile[],
+  ): Promise<BatchUploadResult[]> => {
     const formData = new FormData();
-    formData.append("file", processedFile.file);
-
-    // If encryption is enabled, encrypt the text after extraction
-    // For now, we'll let the server handle extraction and just upload the file
-    // The encrypted_text will be added if encryption key is available
+    for (const pf of processedFiles) {
+      formData.append("files", pf.file);
+    }
 
-    try {
-      const response = await fetch(
-        `${BACKEND_URL}/report-groups/${reportGroupId}/statements`,
-        {
-          method: "POST",
-          headers: {
-            Authorization: `Bearer ${accessToken}`,
-          },
-          body: formData,
+    const response = await fetch(
+      `${BACKEND_URL}/report-groups/${reportGroupId}/statements/batch`,
+      {
+        method: "POST",
+        headers: {
+          Authorization: `Bearer ${accessToken}`,
         },
-      );
-
-      if (!response.ok) {
-        const data = await response.json();
-        throw new Error(data.detail || "Файл байршуулахад алдаа гарлаа");
-      }
+        body: formData,
+      },
+    );
 
+    if (!response.ok) {
       const data = await response.json();
-      return data.id;
-    } catch (err) {
-      throw err;
+      throw new Error(data.detail || "Файл байршуулахад алдаа гарлаа");
     }
+
+    const data = await response.json();
+    return data.results;
   };
 
   const handleUploadAll = useCallback(async () => {
@@ -201,51 +201,62 @@ export function MultiFileUpload({
     setError(null);
 
     const pendingFiles = files.filter((f) => f.status === "pending");
+    const pendingIds = new Set(pendingFiles.map((f) => f.id));
     const statementIds: string[] = [];
 
-    for (const pf of pendingFiles) {
-      // Update status to uploading
+    // Update status to uploading
+    setFiles((prev) =>
+      prev.map((f) =>
+        pendingIds.has(f.id)
+          ? { ...f, status: "uploading" as const, progress: 50 }
+          : f,
+      ),
+    );
+
+    try {
+      // All files in one request; results come back in upload order
+      const results = await uploadBatch(pendingFiles);
+      const resultById = new Map(
+        pendingFiles.map((pf, idx) => [pf.id, results[idx]]),
+      );
+      for (const result of results) {
+        if (result.statement) {
+          statementIds.push(result.statement.id);
+        }
+      }
+
+      setFiles((prev) =>
+        prev.map((f) => {
+          const result = resultById.get(f.id);
+          if (!result) return f;
+          if (!result.statement) {
+            return {
+              ...f,
+              status: "error" as const,
+              error: result.error || "Алдаа гарлаа",
+            };
+          }
+          return {
+            ...f,
+            status: "done" as const,
+            progress: 100,
+            statementId: result.statement.id,
+          };
+        }),
+      );
+    } catch (err) {
+      // Update status to error
       setFiles((prev) =>
         prev.map((f) =>
-          f.id === pf.id
-            ? { ...f, status: "uploading" as const, progress: 50 }
+          pendingIds.has(f.id)
+            ? {
+                ...f,
+                status: "error" as const,
+                error: err instanceof Error ? err.message : "Алдаа гарлаа",
+              }
             : f,
         ),
       );
-
-      try {
-        const statementId = await uploadFile(pf);
-        if (statementId) {
-          statementIds.push(statementId);
-        }
-
-        // Update status to done
-        setFiles((prev) =>
-          prev.map((f) =>
-            f.id === pf.id
-              ? {
-                  ...f,
-                  status: "done" as const,
-                  progress: 100,
-                  statementId: statementId || undefined,
-                }
-              : f,
-          ),
-        );
-      } catch (err) {
-        // Update status to error
-        setFiles((prev) =>
-          prev.map((f) =>
-            f.id === pf.id
-              ? {
-                  ...f,
-                  status: "error" as const,
-                  error: err instanceof Error ? err.message : "Алдаа гарлаа",
-                }
-              : f,
-          ),
-        );
-      }
     }
 
     setIsUploading(false);
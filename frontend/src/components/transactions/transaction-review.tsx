@@ -112,7 +112,12 @@ export function TransactionReview({
         ai_suggested_category_id: p.suggested_category_id,
       }));
 
-      await bulkCreateTransactions(accessToken, statementId, toCreate);
+      await bulkCreateTransactions(
+        accessToken,
+        statementId,
+        toCreate,
+        reportGroupId,
+      );
 
       // Reload transactions
       const txnData = await fetchTransactions(accessToken, statementId);
@@ -132,9 +137,12 @@ export function TransactionReview({
     if (!accessToken) return;
 
     try {
-      const updated = await updateTransaction(accessToken, id, {
-        category_id: categoryId || undefined,
-      });
+      const updated = await updateTransaction(
+        accessToken,
+        id,
+        { category_id: categoryId || undefined },
+        reportGroupId,
+      );
       setTransactions((prev) => prev.map((t) => (t.id === id ? updated : t)));
     } catch (err) {
       setError(err instanceof Error ? err.message : "Алдаа гарлаа");
@@ -146,7 +154,12 @@ export function TransactionReview({
     if (!accessToken) return;
 
     try {
-      await bulkUpdateTransactions(accessToken, ids, categoryId);
+      await bulkUpdateTransactions(
+        accessToken,
+        ids,
+        categoryId,
+        reportGroupId,
+      );
       const txnData = await fetchTransactions(accessToken, statementId);
       setTransactions(txnData.transactions);
     } catch (err) {
@@ -159,7 +172,7 @@ export function TransactionReview({
     if (!accessToken) return;
 
     try {
-      await deleteTransactionApi(accessToken, id);
+      await deleteTransactionApi(accessToken, id, reportGroupId);
       setTransactions((prev) => prev.filter((t) => t.id !== id));
     } catch (err) {
       setError(err instanceof Error ? err.message : "Алдаа гарлаа");
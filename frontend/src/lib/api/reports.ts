@@ -183,9 +183,9 @@ export async function deleteStatement(
 export async function getCombinedText(
   accessToken: string,
   reportId: string
-): Promise<{ combined_text: string; statement_count: number; report_name: string }> {
+): Promise<string> {
   const response = await fetch(
-    `${BACKEND_URL}/report-groups/${reportId}/analyze`,
+    `${BACKEND_URL}/report-groups/${reportId}/analyze/stream`,
     {
       method: "POST",
       headers: {
@@ -199,7 +199,7 @@ export async function getCombinedText(
     throw new Error(data.detail || "Нэгтгэхэд алдаа гарлаа");
   }
 
-  return response.json();
+  return response.text();
 }
 
 export async function saveAnalysisResult(
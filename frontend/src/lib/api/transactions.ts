@@ -12,6 +12,14 @@ import type {
 const BACKEND_URL =
   process.env.NEXT_PUBLIC_BACKEND_URL || "http://localhost:8001";
 
+// Transaction writes made from a report group change only that group's
+// transactions, even for a statement it shares with extended reports
+function withReportGroup(url: string, reportGroupId?: string): string {
+  return reportGroupId
+    ? `${url}?report_group_id=${encodeURIComponent(reportGroupId)}`
+    : url;
+}
+
 // --- Statement Text ---
 
 export interface StatementWithText {
@@ -93,9 +101,13 @@ export async function createTransaction(
     type: "income" | "expense";
     category_id?: string;
   },
+  reportGroupId?: string,
 ): Promise<Transaction> {
   const response = await fetch(
-    `${BACKEND_URL}/statements/${statementId}/transactions`,
+    withReportGroup(
+      `${BACKEND_URL}/statements/${statementId}/transactions`,
+      reportGroupId,
+    ),
     {
       method: "POST",
       headers: {
@@ -124,15 +136,22 @@ export async function updateTransaction(
     category_id?: string;
     is_categorized?: boolean;
   },
+  reportGroupId?: string,
 ): Promise<Transaction> {
-  const response = await fetch(`${BACKEND_URL}/transactions/${transactionId}`, {
-    method: "PUT",
-    headers: {
-      "Content-Type": "application/json",
-      Authorization: `Bearer ${accessToken}`,
+  const response = await fetch(
+    withReportGroup(
+      `${BACKEND_URL}/transactions/${transactionId}`,
+      reportGroupId,
+    ),
+    {
+      method: "PUT",
+      headers: {
+        "Content-Type": "application/json",
+        Authorization: `Bearer ${accessToken}`,
+      },
+      body: JSON.stringify(data),
     },
-    body: JSON.stringify(data),
-  });
+  );
 
   if (!response.ok) {
     throw new Error("Гүйлгээ шинэчлэхэд алдаа гарлаа");
@@ -144,13 +163,20 @@ export async function updateTransaction(
 export async function deleteTransaction(
   accessToken: string,
   transactionId: string,
+  reportGroupId?: string,
 ): Promise<void> {
-  const response = await fetch(`${BACKEND_URL}/transactions/${transactionId}`, {
-    method: "DELETE",
-    headers: {
-      Authorization: `Bearer ${accessToken}`,
+  const response = await fetch(
+    withReportGroup(
+      `${BACKEND_URL}/transactions/${transactionId}`,
+      reportGroupId,
+    ),
+    {
+      method: "DELETE",
+      headers: {
+        Authorization: `Bearer ${accessToken}`,
+      },
     },
-  });
+  );
 
   if (!response.ok) {
     throw new Error("Гүйлгээ устгахад алдаа гарлаа");
@@ -161,18 +187,22 @@ export async function bulkUpdateTransactions(
   accessToken: string,
   transactionIds: string[],
   categoryId: string,
+  reportGroupId?: string,
 ): Promise<{ updated: number }> {
-  const response = await fetch(`${BACKEND_URL}/transactions/bulk-update`, {
-    method: "POST",
-    headers: {
-      "Content-Type": "application/json",
-      Authorization: `Bearer ${accessToken}`,
+  const response = await fetch(
+    withReportGroup(`${BACKEND_URL}/transactions/bulk-update`, reportGroupId),
+    {
+      method: "POST",
+      headers: {
+        "Content-Type": "application/json",
+        Authorization: `Bearer ${accessToken}`,
+      },
+      body: JSON.stringify({
+        transaction_ids: transactionIds,
+        category_id: categoryId,
+      }),
     },
-    body: JSON.stringify({
-      transaction_ids: transactionIds,
-      category_id: categoryId,
-    }),
-  });
+  );
 
   if (!response.ok) {
     throw new Error("Гүйлгээнүүд шинэчлэхэд алдаа гарлаа");
@@ -191,9 +221,13 @@ export async function bulkCreateTransactions(
     type: "income" | "expense";
     ai_suggested_category_id?: string;
   }>,
+  reportGroupId?: string,
 ): Promise<{ created: number; ids: string[] }> {
   const response = await fetch(
-    `${BACKEND_URL}/statements/${statementId}/transactions/bulk`,
+    withReportGroup(
+      `${BACKEND_URL}/statements/${statementId}/transactions/bulk`,
+      reportGroupId,
+    ),
     {
       method: "POST",
       headers: {